@@ -1,81 +1,577 @@
-import cv2
-import mediapipe as mp
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, send_file
 from werkzeug.utils import secure_filename
+from minio.error import S3Error
 from utils.minio import MinioClientManager
+from utils.local_storage import LocalObjectStore
 from utils.env import *
+import dataclasses
+import mimetypes
 import os
-from utils.extract_frame import *
-
-mp_drawing = mp.solutions.drawing_utils  # mediapipe 繪圖方法
-mp_drawing_styles = mp.solutions.drawing_styles  # mediapipe 繪圖樣式
-mp_holistic = mp.solutions.holistic  # mediapipe 全身偵測方法
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from contextlib import nullcontext
+from functools import partial
+from utils import metrics
+from utils.ingest import MultipartFileStream, save_file
+from utils.jobs import JobManager, JobFailed, JobQueueFull
+from utils.growing_upload import GrowingFileUpload
+from utils.landmarks import LANDMARK_FILE_EXTENSION, load_landmarks
+from utils.model_pool import ModelPool, ModelUnavailable
+from utils.object_cache import ObjectCache
+from utils.pose import process_video, create_detector, parse_frame_size, ProcessOptions, DETECTOR_TIERS
+from utils.render import render_overlay
+from utils.result_cache import ResultCache, new_content_hash
+from utils.scheduler import FrameScheduler
+from utils.spool import LocalSpool
+from utils.segment import process_video_segmented, warm_pool as warm_segment_pool
+from utils.thumbnails import thumbnail_paths, sprite_path
+from utils.trace import JobTrace, StackSampler, TRACE_FILE_EXTENSION, PROFILE_FILE_EXTENSION
+from utils.write_behind import WriteBehindUploader
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['RESULT_FOLDER'] = 'results'
+app.config['RESULT_INDEX_BUCKET'] = 'result-index'
+
+# 開啟剖析的工作與其物件名稱前綴，MinIO 寫入依物件名稱記到對應工作的時間軸
+active_traces = {}
+
+
+def observe_minio_write(operation, bucket, object_name, seconds, etag=None):
+    metrics.observe_minio_put(operation, bucket, object_name, seconds)
+    for trace, prefixes in list(active_traces.items()):
+        if object_name.startswith(prefixes):
+            trace.observe_write(operation, bucket, object_name, seconds)
+    if spool is not None and operation in ("put", "compose") and spool.tracks(object_name):
+        # 本機檔案已安全寫入 MinIO，記下寫入回傳的版本後即可刪除或作為讀取快取
+        spool.stored(object_name, etag)
+    if object_cache is not None and object_name.endswith(CACHED_MEDIA_SUFFIXES):
+        # 同名物件被改寫（例如重新上傳同名影片），快取中的舊版本不再有效
+        object_cache.invalidate(bucket, object_name)
 
+
+# POSE_STORAGE_BACKEND=local 時以本機目錄（未設定目錄則為記憶體）代替 MinIO，離線測試與效能量測不需連線
+storage_backend = LocalObjectStore(get_env_local_storage_dir() or None, get_env_local_storage_latency(),
+                                   get_env_local_storage_bandwidth()) \
+    if get_env_storage_backend() == "local" else None
 minioClient = MinioClientManager(
     get_env_minio_host(),
     get_env_minio_user(),
     get_env_minio_password(),
-    secure=False
+    secure=False,
+    part_size=get_env_upload_part_size(),
+    parallel_uploads=get_env_upload_parallelism(),
+    observe=observe_minio_write,
+    client=storage_backend
 )
 
+
+
+def read_object(bucket, filename):
+    data = minioClient.get_resource(bucket, filename)
+    try:
+        return data.read()
+    finally:
+        data.close()
+        data.release_conn()
+
+
+# 縮圖與關鍵點檔小且寫入後不再變動，下載時由記憶體與磁碟 LRU 快取回應，圖庫載入不必每張都連線 MinIO；
+# 由 start_services 建立
+CACHED_MEDIA_SUFFIXES = (".jpg", ".webp", LANDMARK_FILE_EXTENSION)
+object_cache = None
+
+# 啟用影格排程時可同時執行較多工作（CPU 由排程器分配），等待中的工作依上傳大小由小到大開始
+jobs = JobManager(get_env_running_jobs(), get_env_job_queue_size(), get_env_job_ttl())
+# 模型池只預先暖機服務預設等級的偵測器，上傳時指定其他等級則另行建立
+holistic_pool = ModelPool(get_env_pose_detector(), partial(create_detector, get_env_pose_detector()),
+                          get_env_model_pool_size())
+segment_pool_ready = threading.Event()
+# 啟用時所有工作的推論交由固定數量的推論執行緒公平輪流處理
+frame_scheduler = FrameScheduler(get_env_inference_workers(), get_env_scheduler_max_in_flight(),
+                                 get_env_scheduler_policy(), job_queue=get_env_scheduler_job_queue()) \
+    if get_env_frame_scheduler() else None
+# 繪製中的結果影片名稱對應背景工作編號，同一支影片只繪製一次
+rendering = {}
+render_lock = threading.Lock()
+result_cache = ResultCache(minioClient, app.config['RESULT_INDEX_BUCKET'])
+# 啟用時產出物先寫入本機日誌，由背景執行緒送往 MinIO，處理流程不等待上傳；由 start_services 建立
+uploader = None
+
+
+def pending_upload(path):
+    return uploader is not None and any(uploader.pending_file(app.config[folder], path)
+                                        for folder in ('UPLOAD_FOLDER', 'RESULT_FOLDER'))
+
+
+# 追蹤 uploads/、results/ 下的檔案，寫入 MinIO 後依容量與存取時間刪除，磁碟用量維持在上限內；由 start_services 建立
+spool = None
+
+# 佇列與執行中的數量在 Prometheus 抓取時才計算，不增加處理流程的負擔
+metrics.jobs_in_flight.set_function(lambda: jobs.count("running"))
+metrics.job_queue_depth.set_function(lambda: jobs.count("queued"))
+if frame_scheduler is not None:
+    metrics.inference_frames_in_flight.set_function(lambda: frame_scheduler.in_flight)
+
 thumbnail_file_extension = "-thumbnail.jpg"
+STREAM_URL_EXPIRES = timedelta(hours=12)
+MEDIA_CHUNK_SIZE = 256 * 1024
 
 @app.route('/', methods=['GET'])
 def index():
     return jsonify({"message": "Pose Analysis Service is running", "status": "ok"})
 
 
-def process_video(input_path, output_path):
-    cap = cv2.VideoCapture(input_path)
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    data, content_type = metrics.render()
+    return Response(data, content_type=content_type)
 
-    if not cap.isOpened():
-        print("Cannot open video")
-        return False
 
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, 20.0, (520, 300))
+@app.route('/ready', methods=['GET'])
+def ready():
+    is_ready = holistic_pool.ready.is_set() and segment_pool_ready.is_set()
+    return jsonify({
+        "ready": is_ready,
+        "models": {holistic_pool.name: holistic_pool.status()},
+        "segment_workers_ready": segment_pool_ready.is_set()
+    }), 200 if is_ready else 503
 
-    with mp_holistic.Holistic(min_detection_confidence=0.5, min_tracking_confidence=0.5) as holistic:
-        while cap.isOpened():
-            ret, img = cap.read()
-            if not ret:
-                break
-            img = cv2.resize(img, (520, 300))
-            img2 = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)  # 將 BGR 轉換成 RGB
-            results = holistic.process(img2)  # 開始偵測全身
-
-            # 面部偵測，繪製臉部網格
-            if results.face_landmarks:
-                mp_drawing.draw_landmarks(
-                    img,
-                    results.face_landmarks,
-                    mp_holistic.FACEMESH_CONTOURS,
-                    landmark_drawing_spec=None,
-                    connection_drawing_spec=mp_drawing_styles
-                    .get_default_face_mesh_contours_style())
-
-            # 身體偵測，繪製身體骨架
-            if results.pose_landmarks:
-                mp_drawing.draw_landmarks(
-                    img,
-                    results.pose_landmarks,
-                    mp_holistic.POSE_CONNECTIONS,
-                    landmark_drawing_spec=mp_drawing_styles
-                    .get_default_pose_landmarks_style())
-
-            out.write(img)
-
-    cap.release()
-    out.release()
-    return True
+
+def run_process_video(input_path, output_path, options, stats=None, trace=None, **kwargs):
+    segments = get_env_pose_segments()
+    pooled = options.detector == holistic_pool.name
+    stats = {} if stats is None else stats
+    observe = metrics.observe_stage
+    if trace is not None:
+        def observe(stage, seconds):
+            metrics.observe_stage(stage, seconds)
+            trace.observe_stage(stage, seconds)
+    acquire = holistic_pool.acquire if pooled else nullcontext
+    try:
+        if segments > 1:
+            # 多段時推論在子行程中進行，只有影片太短而不分段時才向模型池取用
+            processed = process_video_segmented(input_path, output_path, segments,
+                                                get_env_pose_segment_min_frames(), options=options, stats=stats,
+                                                acquire_holistic=acquire, scheduler=frame_scheduler,
+                                                observe=observe, **kwargs)
+        else:
+            with acquire() as holistic:
+                processed = process_video(input_path, output_path, options, stats=stats, holistic=holistic,
+                                          scheduler=frame_scheduler, observe=observe, **kwargs)
+    except ModelUnavailable as exc:
+        # 模型無法建立（例如下載失敗）時讓工作失敗，而不是一直佔用工作名額等待
+        raise JobFailed(str(exc)) from exc
+    if processed and stats.get("frames"):
+        metrics.processed_fps.observe(stats["fps"])
+        metrics.observe_stage_totals(stats["stages"])
+    return processed
 
 
-@app.route('/upload', methods=['POST'])
-def upload_file():
+def warm_up_models():
+    holistic_pool.start()
+    segments = get_env_pose_segments()
+    if segments > 1:
+        def warm_segment_workers():
+            if warm_segment_pool(segments):
+                segment_pool_ready.set()
+        threading.Thread(target=warm_segment_workers, name="warmup-segments", daemon=True).start()
+    else:
+        segment_pool_ready.set()
+
+
+def start_services():
+    # 背景服務只在提供服務的行程中建立：分段處理以 spawn 啟動的子行程會重新匯入本模組，
+    # 若在匯入時建立，每個子行程都會各自恢復上傳日誌並重複上傳，各自的 spool 也會刪除主行程仍在使用的檔案，
+    # 物件快取載入磁碟時也會刪掉主行程寫到一半的暫存檔
+    global uploader, spool, object_cache
+    if get_env_write_behind() and uploader is None:
+        uploader = WriteBehindUploader(minioClient, get_env_write_behind_dir(), get_env_write_behind_workers())
+        metrics.write_behind_pending.set_function(lambda: len(uploader.entries))
+    if get_env_spool() and spool is None:
+        spool = LocalSpool(get_env_spool_max_bytes(), get_env_spool_max_age(), in_use=pending_upload,
+                           interval=min(60.0, get_env_spool_max_age())).start()
+        metrics.spool_bytes.set_function(lambda: spool.total)
+        threading.Thread(target=adopt_spooled_files, name="spool-adopt", daemon=True).start()
+    if get_env_object_cache() and object_cache is None:
+        object_cache = ObjectCache(minioClient.stat_resource, read_object, get_env_object_cache_max_bytes(),
+                                   get_env_object_cache_max_object_bytes(), get_env_object_cache_dir() or None,
+                                   get_env_object_cache_disk_bytes(), get_env_object_cache_revalidate(),
+                                   observe=lambda result: metrics.object_cache_requests.labels(result).inc())
+        metrics.object_cache_bytes.labels("memory").set_function(lambda: object_cache.total)
+        metrics.object_cache_bytes.labels("disk").set_function(lambda: object_cache.disk_total)
+    warm_up_models()
+
+
+def spool_track(paths, replace=True):
+    if spool is not None:
+        for path in paths:
+            spool.track(path, replace)
+
+
+def spool_release(paths):
+    if spool is not None:
+        for path in paths:
+            spool.release(path)
+
+
+def adopt_spooled_files():
+    # 前次執行留下的檔案：MinIO 上有相同大小的物件即視為已保存（可作為讀取快取），否則等逾時後刪除
+    for folder in (app.config['UPLOAD_FOLDER'], app.config['RESULT_FOLDER']):
+        files = []
+        for dirpath, _, names in os.walk(folder):
+            for name in names:
+                path = os.path.join(dirpath, name)
+                try:
+                    files.append((os.stat(path), path))
+                except OSError:
+                    pass
+        for file_stat, path in sorted(files, key=lambda item: item[0].st_mtime):
+            try:
+                stat = minioClient.stat_resource(folder, path)
+            except S3Error:
+                stat = None
+            except Exception as exc:
+                print("Failed to check spooled file:", path, exc)
+                continue
+            if stat is not None and stat.size == file_stat.st_size:
+                spool.adopt(path, True, stat.etag, file_stat.st_mtime)
+            elif stat is not None:
+                # 本機內容與 MinIO 不同，以 MinIO 為準
+                spool.adopt(path, True, None, file_stat.st_mtime)
+            else:
+                spool.adopt(path, False, None, file_stat.st_mtime)
+
+
+def thumbnail_files(base_path, options):
+    # 各時間點的縮圖（含各寬度的 WebP）與縮圖列
+    paths = thumbnail_paths(base_path, options.thumbnail_times, options.thumbnail_sizes)
+    if options.sprite_frames:
+        paths.append(sprite_path(base_path))
+    return paths
+
+
+def run_upload_job(filename, upload_path, options, streamed=False, on_stored=None, trace=None):
+    # 原始影片在接收時已登記；產出物在工作結束前不會被刪除，寫入 MinIO 後交由 spool 管理
+    output_path = os.path.join(app.config['RESULT_FOLDER'], f'output_{filename}')
+    local_files = [output_path, output_path + LANDMARK_FILE_EXTENSION]
+    local_files += thumbnail_files(upload_path + thumbnail_file_extension, options)
+    local_files += thumbnail_files(output_path + thumbnail_file_extension, options)
+    spool_track(local_files)
+    if not streamed:
+        local_files.append(upload_path)
+    try:
+        return process_upload(filename, upload_path, options, streamed, on_stored, trace)
+    finally:
+        spool_release(local_files)
+
+
+def process_upload(filename, upload_path, options, streamed=False, on_stored=None, trace=None):
+    output_filename = f'output_{filename}'
+    output_path = os.path.join(app.config['RESULT_FOLDER'], output_filename)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    if streamed:
+        # 原始影片已在接收時直接寫入 MinIO，處理時透過預簽網址以 HTTP Range 讀取，不落地
+        os.makedirs(os.path.dirname(upload_path), exist_ok=True)
+        input_path = minioClient.get_resource_url(app.config['UPLOAD_FOLDER'], upload_path, STREAM_URL_EXPIRES)
+    else:
+        input_path = upload_path
+
+    landmarks_path = output_path + LANDMARK_FILE_EXTENSION
+    thumbnail_upload_path = upload_path + thumbnail_file_extension
+    thumbnail_output_path = output_path + thumbnail_file_extension
+    # 各縮圖對應的 bucket 與上傳失敗時的錯誤訊息
+    artifacts = {}
+    for path in thumbnail_files(thumbnail_upload_path, options):
+        artifacts[path] = (app.config['UPLOAD_FOLDER'], "Failed to upload extracted image")
+    for path in thumbnail_files(thumbnail_output_path, options):
+        artifacts[path] = (app.config['RESULT_FOLDER'], "Failed to  upload extracted processed video")
+
+    # 同步上傳時，原始影片在推論進行中就以批次交給背景 I/O 執行緒，結果影片邊編碼邊上傳
+    original_upload = None
+    result_upload = None
+    on_encoded = None
+    if uploader is None:
+        if not streamed:
+            original_upload = minioClient.save_resources_async([(app.config['UPLOAD_FOLDER'], upload_path)])
+        if options.writes_video:
+            result_upload = GrowingFileUpload(minioClient, app.config['RESULT_FOLDER'], output_path,
+                                              get_env_upload_part_size())
+            on_encoded = result_upload.poll
+    elif not streamed:
+        uploader.enqueue([(app.config['UPLOAD_FOLDER'], upload_path)])
+
+    stats = {}
+    processed = False
+    try:
+        # 原始與處理後的縮圖都在同一次解碼中擷取
+        with trace.span("process video") if trace is not None else nullcontext():
+            processed = run_process_video(input_path, output_path, options, stats, trace=trace,
+                                          landmarks_path=landmarks_path, source=upload_path,
+                                          original_thumbnail_path=thumbnail_upload_path,
+                                          output_thumbnail_path=thumbnail_output_path, on_encoded=on_encoded)
+        thumbnails = set(stats.get("thumbnails", []))
+        if not processed:
+            raise JobFailed("Failed to process video")
+        if thumbnail_upload_path not in thumbnails:
+            raise JobFailed("Failed to extract image")
+        if thumbnail_output_path not in thumbnails:
+            raise JobFailed("Failed to extract processed video")
+    except Exception:
+        if result_upload is not None:
+            result_upload.abort()
+        raise
+
+    written = [path for path in artifacts if path in thumbnails]
+    upload_objects = [upload_path] + [path for path in written if artifacts[path][0] == app.config['UPLOAD_FOLDER']]
+    result_objects = [path for path, enabled in ((output_path, options.writes_video),
+                                                 (landmarks_path, options.writes_landmarks)) if enabled]
+    result_objects += [path for path in written if artifacts[path][0] == app.config['RESULT_FOLDER']]
+    result = {
+        "output_file": output_filename,
+        "objects": {
+            app.config['UPLOAD_FOLDER']: upload_objects,
+            app.config['RESULT_FOLDER']: result_objects,
+        },
+        "stats": stats,
+    }
+    if uploader is not None:
+        items = [(app.config['UPLOAD_FOLDER'], path) for path in upload_objects[1:]]
+        items += [(app.config['RESULT_FOLDER'], path) for path in result_objects]
+        uploader.enqueue(items, on_complete=on_stored and (lambda ok: on_stored(result, ok)))
+        return result
+
+    # 縮圖、關鍵點檔與結果影片以一次批次上傳；結果影片已在編碼途中分段上傳時由 finish() 在 MinIO 端合併
+    items = [(artifacts[path][0], path) for path in written]
+    if options.writes_landmarks:
+        items.append((app.config['RESULT_FOLDER'], landmarks_path))
+    if result_upload is not None and not result_upload.streaming:
+        items.append((app.config['RESULT_FOLDER'], output_path))
+        result_upload = None
+    with trace.span("wait for uploads") if trace is not None else nullcontext():
+        failed = minioClient.save_resources(items)
+        if original_upload is not None:
+            failed = original_upload.result() + failed
+        if result_upload is not None and not result_upload.finish():
+            failed.append((app.config['RESULT_FOLDER'], output_path))
+    messages = {upload_path: "Failed to upload original video", landmarks_path: "Failed to upload landmarks",
+                output_path: "Failed to upload processed video"}
+    messages.update((path, error) for path, (_, error) in artifacts.items())
+    errors = [messages[path] for _, path in failed]
+    if errors:
+        raise JobFailed(errors[0])
+    if on_stored:
+        on_stored(result, True)
+    return result
+
+
+def run_cached_upload_job(cache_key, *args):
+    # 產出物全部寫入 MinIO 後才建立索引；在此之前重複上傳會沿用同一個工作
+    def stored(result, ok):
+        if ok and not result_cache.store(cache_key, result):
+            print("Failed to store result index:", cache_key)
+        with result_cache.lock:
+            result_cache.inflight.pop(cache_key, None)
+
+    try:
+        return run_upload_job(*args, on_stored=stored)
+    except Exception:
+        with result_cache.lock:
+            result_cache.inflight.pop(cache_key, None)
+        raise
+
+
+def run_profiled_upload_job(trace, queued_at, filename, upload_path, options, streamed=False):
+    # 記錄工作時間軸並以 Chrome trace 格式存放在結果影片旁；可另外附上取樣的 Python 呼叫堆疊
+    trace.add("queued", "job", queued_at, time.perf_counter() - queued_at)
+    output_path = os.path.join(app.config['RESULT_FOLDER'], f'output_{filename}')
+    interval = get_env_pose_profile_sample_interval()
+    sampler = StackSampler(interval, threading.get_ident()).start() if interval > 0 else None
+    active_traces[trace] = (upload_path, output_path)
+    result = None
+    try:
+        with trace.span("job"):
+            result = run_upload_job(filename, upload_path, options, streamed, trace=trace)
+        return result
+    finally:
+        del active_traces[trace]
+        profile_files = [output_path + TRACE_FILE_EXTENSION, output_path + PROFILE_FILE_EXTENSION]
+        spool_track(profile_files)
+        profile = {"trace": trace.save(profile_files[0],
+                                       {"source": upload_path, "options": dataclasses.asdict(options),
+                                        "stats": result and result["stats"]})}
+        if sampler is not None:
+            sampler.stop()
+            profile["profile"] = sampler.save(profile_files[1])
+            profile["samples"] = sampler.samples
+        # 診斷用的檔案直接上傳，不經延後寫入；失敗的工作也保留時間軸
+        for name in (profile["trace"], profile.get("profile")):
+            if name and not minioClient.save_resource(app.config['RESULT_FOLDER'], name):
+                print("Failed to upload profiling output:", name)
+        spool_release(profile_files)
+        if result is not None:
+            result["profile"] = profile
+
+
+def request_options():
+    # 服務預設值可由上傳網址的查詢參數覆寫，例如 /upload?detector=pose&resolution=640x360&roi=1
+    options = ProcessOptions.from_env()
+    detector = request.args.get("detector")
+    if detector:
+        if detector not in DETECTOR_TIERS:
+            raise ValueError(f"Unknown detector, expected one of: {', '.join(DETECTOR_TIERS)}")
+        options = dataclasses.replace(options, detector=detector)
+    resolution = request.args.get("resolution")
+    if resolution:
+        options = dataclasses.replace(options, frame_size=parse_frame_size(resolution))
+    roi = request.args.get("roi")
+    if roi:
+        options = dataclasses.replace(options, roi=roi == "1")
+    return options
+
+
+def submit_upload_job(filename, upload_path, content_hash, options, streamed=False, trace=None, on_accept=None,
+                      size=0):
+    # 回傳 (工作編號, 重複上傳時既有結果的原始影片名稱)；確定要送出新工作時先呼叫 on_accept()
+    def submit(fn, *args):
+        if on_accept is not None:
+            on_accept()
+        # 啟用影格排程時較小的上傳（通常是短片）先開始
+        return jobs.submit(fn, *args, priority=size if frame_scheduler is not None else 0)
+
+    if trace is not None:
+        # 剖析是為了觀察實際處理過程，不使用結果快取
+        trace.name = filename
+        return submit(run_profiled_upload_job, trace, time.perf_counter(), filename, upload_path, options,
+                      streamed), None
+    if not get_env_result_cache():
+        return submit(run_upload_job, filename, upload_path, options, streamed), None
+    cache_key = result_cache.key(content_hash, options)
+    cached = result_cache.lookup(cache_key)
+    if cached is not None:
+        return jobs.add_completed(dict(cached, cached=True)), cached["objects"][app.config['UPLOAD_FOLDER']][0]
+    with result_cache.lock:
+        running = result_cache.inflight.get(cache_key)
+        if running is not None:
+            return running
+        job_id = submit(run_cached_upload_job, cache_key, filename, upload_path, options, streamed)
+        result_cache.inflight[cache_key] = (job_id, upload_path)
+        return job_id, None
+
+
+def accepted_response(job_id, upload_path, duplicate_of=None):
+    # 重複上傳時回傳既有（或處理中）結果的工作，已完成則直接 200
+    done = jobs.get(job_id)["status"] == "done"
+    response = {
+        "message": "File already processed" if done else "File accepted",
+        "job_id": job_id,
+        "status_url": f"/jobs/{job_id}",
+        "output_file": f'output_{os.path.basename(duplicate_of or upload_path)}'
+    }
+    if duplicate_of:
+        response["duplicate"] = True
+    return jsonify(response), 200 if done else 202
+
+
+def fetch_local_copy(bucket, path):
+    # 本機已有的副本（例如 spool 的讀取快取）直接使用，否則從 MinIO 下載；使用完前不會被刪除
+    spool_track([path], replace=False)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        minioClient.download_resource(bucket, path, path)
+        if spool is not None:
+            # 下載的副本與 MinIO 相同，使用完即可刪除
+            spool.stored(path)
+
+
+def run_render_job(filename):
+    # 結果影片不存在但有關鍵點檔時，以原始影片與關鍵點繪製並存回 MinIO
+    landmarks_name = filename + LANDMARK_FILE_EXTENSION
+    try:
+        if minioClient.resource_exists(app.config['RESULT_FOLDER'], filename):
+            return {"output_file": filename}
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        spool_track([filename])
+        local_files = [filename, landmarks_name]
+        try:
+            fetch_local_copy(app.config['RESULT_FOLDER'], landmarks_name)
+            source = str(load_landmarks(landmarks_name)["source"])
+            local_files.append(source)
+            fetch_local_copy(app.config['UPLOAD_FOLDER'], source)
+            if not render_overlay(source, landmarks_name, filename, ProcessOptions.from_env()):
+                raise JobFailed("Failed to render video")
+            if not minioClient.save_resource(app.config['RESULT_FOLDER'], filename):
+                raise JobFailed("Failed to upload processed video")
+        finally:
+            spool_release(local_files)
+        return {"output_file": filename}
+    finally:
+        with render_lock:
+            rendering.pop(filename, None)
+
+
+def start_render(filename):
+    # 回傳繪製工作編號，已在繪製中時沿用同一個工作；沒有關鍵點檔可繪製時回傳 None
+    with render_lock:
+        job_id = rendering.get(filename)
+    if job_id is not None:
+        return job_id
+    if not minioClient.resource_exists(app.config['RESULT_FOLDER'], filename + LANDMARK_FILE_EXTENSION):
+        return None
+    with render_lock:
+        if filename not in rendering:
+            rendering[filename] = jobs.submit(run_render_job, filename)
+        return rendering[filename]
+
+
+def receive_streaming_upload(options, trace=None):
+    if not jobs.has_capacity():
+        return jsonify({"error": "Too many videos in progress, try again later"}), 503
+    try:
+        content_hash = new_content_hash()
+        stream = MultipartFileStream(request.stream, request.content_type or "", tees=[content_hash.update])
+        original_filename = stream.open()
+    except ValueError:
+        # 不是 multipart 請求，或主體在檔案欄位前就中斷
+        return jsonify({"error": "No file part"}), 400
+    if original_filename is None:
+        return jsonify({"error": "No file part"}), 400
+    if original_filename == '':
+        return jsonify({"error": "No selected file"}), 400
+    filename = secure_filename(original_filename)
+    upload_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    # 先串流寫到暫存物件並計算雜湊，同名影片的工作可能正在讀取 upload_path
+    staging_path = os.path.join(app.config['UPLOAD_FOLDER'], f".upload-{os.urandom(8).hex()}-{filename}")
+    if not minioClient.save_stream(app.config['UPLOAD_FOLDER'], staging_path, stream, get_env_ingest_part_size()):
+        return jsonify({"error": "Failed to upload original video"}), 500
+
+    def accept():
+        # 確定要送出新工作（不是重複上傳）才在 MinIO 端複製成正式名稱，不必再傳一次
+        if not minioClient.compose_resource(app.config['UPLOAD_FOLDER'], upload_path, [staging_path],
+                                            mimetypes.guess_type(filename)[0] or "application/octet-stream"):
+            raise OSError("Failed to upload original video")
+
+    try:
+        job_id, duplicate_of = submit_upload_job(filename, upload_path, content_hash.hexdigest(), options, True,
+                                                 trace, on_accept=accept, size=stream.size)
+    except JobQueueFull:
+        return jsonify({"error": "Too many videos in progress, try again later"}), 503
+    except OSError as exc:
+        return jsonify({"error": str(exc)}), 500
+    finally:
+        try:
+            minioClient.remove_resource(app.config['UPLOAD_FOLDER'], staging_path)
+        except S3Error as exc:
+            print("Error occurred:", exc)
+    return accepted_response(job_id, upload_path, duplicate_of)
+
+
+def receive_file_upload(options, trace=None):
+    if not jobs.has_capacity():
+        return jsonify({"error": "Too many videos in progress, try again later"}), 503
     if 'file' not in request.files:
         return jsonify({"error": "No file part"}), 400
     file = request.files['file']
@@ -85,46 +581,149 @@ def upload_file():
         filename = secure_filename(file.filename)
         upload_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         os.makedirs(os.path.dirname(upload_path), exist_ok=True)
-        file.save(upload_path)
-
-        output_filename = f'output_{filename}'
-        output_path = os.path.join(app.config['RESULT_FOLDER'], output_filename)
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-        save_status = minioClient.save_resource(app.config['UPLOAD_FOLDER'], upload_path)
-        if not save_status:
-            return jsonify({"error": "Failed to upload original video"}), 500
-
-        thumbnail_upload_path = upload_path + thumbnail_file_extension
-        extract_status=extract_first_frame(upload_path,thumbnail_upload_path)
-        if not extract_status:
-            return jsonify({"error": "Failed to extract image"}), 500
-        save_status = minioClient.save_resource(app.config['UPLOAD_FOLDER'], thumbnail_upload_path)
-        if not save_status:
-            return jsonify({"error": "Failed to upload extracted image"}), 500
-
-        if process_video(upload_path, output_path):
-            save_status = minioClient.save_resource(app.config['RESULT_FOLDER'], output_path)
-            if not save_status:
-                return jsonify({"error": "Failed to upload processed video"}), 500
-            thumbnail_output_path = output_path + thumbnail_file_extension
-            extract_status = extract_first_frame(output_path,thumbnail_output_path)
-            if not extract_status:
-                return jsonify({"error": "Failed to extract processed video"}), 500
-            save_status = minioClient.save_resource(app.config['RESULT_FOLDER'], thumbnail_output_path)
-            if not save_status:
-                return jsonify({"error": "Failed to  upload extracted processed video"}), 500
-            return jsonify({"message": "File processed successfully", "output_file": output_filename}), 200
-        else:
-            return jsonify({"error": "Failed to process video"}), 500
+        # 先寫到暫存檔並計算雜湊，同名影片的工作可能正在讀取 upload_path
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(upload_path), prefix=".upload-")
+        os.close(fd)
+        accepted = []
+
+        def accept():
+            # 確定要送出新工作（不是重複上傳）才換成正式檔名
+            os.replace(temp_path, upload_path)
+            # 工作結束時釋放；未送出工作的檔案在逾時後刪除
+            spool_track([upload_path])
+            accepted.append(upload_path)
+
+        try:
+            content_hash = new_content_hash()
+            save_file(file, temp_path, tees=[content_hash.update])
+            job_id, duplicate_of = submit_upload_job(filename, upload_path, content_hash.hexdigest(), options,
+                                                     trace=trace, on_accept=accept, size=os.path.getsize(temp_path))
+        except JobQueueFull:
+            spool_release(accepted)
+            return jsonify({"error": "Too many videos in progress, try again later"}), 503
+        finally:
+            if not accepted:
+                os.remove(temp_path)
+        return accepted_response(job_id, upload_path, duplicate_of)
+
+
+@app.route('/upload', methods=['POST'])
+def upload_file():
+    started = time.perf_counter()
+    # 以 /upload?profile=1 或 POSE_PROFILE=1 開啟單一工作的時間軸記錄
+    trace = JobTrace(None, origin=started) if request.args.get("profile") == "1" or get_env_pose_profile() else None
+    try:
+        options = request_options()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    if get_env_streaming_ingest():
+        mode, response = "streaming", receive_streaming_upload(options, trace)
+    else:
+        mode, response = "multipart", receive_file_upload(options, trace)
+    if response[1] < 400:
+        elapsed = time.perf_counter() - started
+        metrics.upload_receive_seconds.labels(mode).observe(elapsed)
+        if trace is not None:
+            trace.add("receive upload", "job", started, elapsed, {"mode": mode})
+    return response
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+
+def stream_object(data):
+    # 分段送出，用戶端中斷時 WSGI 伺服器會關閉產生器，確保連線歸還 MinIO 連線池
+    try:
+        for chunk in data.stream(MEDIA_CHUNK_SIZE):
+            yield chunk
+    finally:
+        data.close()
+        data.release_conn()
+
+
+def stream_file(data, offset, length):
+    try:
+        data.seek(offset)
+        while length > 0:
+            chunk = data.read(min(MEDIA_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        data.close()
+
 
 @app.route('/media/<bucket>/file/<path:filename>', methods=['GET'])
 def download_file(bucket,filename):
+    if uploader is not None and uploader.pending_file(bucket, filename):
+        # 尚在寫入佇列中的產出物直接由本機檔案提供
+        return send_file(os.path.abspath(filename), as_attachment=True, download_name=filename, conditional=True)
     try:
-        data = minioClient.get_resource(bucket,filename)
-        return data.read(), 200, {
-            'Content-Disposition': f'attachment; filename="{filename}"'
+        cacheable = filename.endswith(CACHED_MEDIA_SUFFIXES)
+        cached = object_cache.fetch(bucket, filename) if cacheable and object_cache is not None else None
+        try:
+            stat = cached or minioClient.stat_resource(bucket, filename)
+        except S3Error as exc:
+            job_id = exc.code == "NoSuchKey" and bucket == app.config['RESULT_FOLDER'] and start_render(filename)
+            if not job_id:
+                raise
+            # 結果影片在背景繪製，不佔住請求；完成後再以同一網址下載
+            return jsonify({"message": "Rendering", "job_id": job_id, "status_url": f"/jobs/{job_id}"}), 202, \
+                {'Retry-After': '1'}
+        etag = f'"{stat.etag}"'
+        headers = {
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Accept-Ranges': 'bytes',
+            'ETag': etag,
+            # 重新上傳同名影片會改寫原始影片、結果影片與縮圖，瀏覽器每次都以 ETag 重新確認，內容未變時回應 304
+            'Cache-Control': 'no-cache',
         }
+        if request.if_none_match.contains(stat.etag):
+            return Response(status=304, headers=headers)
+
+        mimetype = stat.content_type
+        if not mimetype or mimetype == "application/octet-stream":
+            mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        byte_range = request.range
+        if_range = request.if_range
+        if byte_range is not None and (len(byte_range.ranges) != 1
+                                       or if_range.etag not in (None, stat.etag)
+                                       or if_range.date not in (None, stat.last_modified)):
+            # 多段範圍或 If-Range 與目前版本不符時回傳完整內容
+            byte_range = None
+        status, offset, length = 200, 0, stat.size
+        if byte_range is not None:
+            bounds = byte_range.range_for_length(stat.size)
+            if bounds is None:
+                headers['Content-Range'] = f'bytes */{stat.size}'
+                return Response(status=416, headers=headers)
+            status, offset, length = 206, bounds[0], bounds[1] - bounds[0]
+            headers['Content-Range'] = f'bytes {bounds[0]}-{bounds[1] - 1}/{stat.size}'
+        headers['Content-Length'] = str(length)
+        if length == 0:
+            return Response(status=status, headers=headers, mimetype=mimetype)
+        if cached is not None:
+            return Response(cached.data[offset:offset + length], status=status, headers=headers, mimetype=mimetype)
+        local = spool.open(filename, stat.etag) if spool is not None else None
+        if local is not None:
+            # 本機讀取快取與 MinIO 上的版本相同，不必再從 MinIO 傳輸內容
+            return Response(stream_file(local, offset, length), status=status, headers=headers, mimetype=mimetype,
+                            direct_passthrough=True)
+        data = minioClient.get_resource(bucket, filename, offset, length)
+        return Response(stream_object(data), status=status, headers=headers, mimetype=mimetype,
+                        direct_passthrough=True)
+    except S3Error as exc:
+        if exc.code in ("NoSuchKey", "NoSuchBucket"):
+            return jsonify({"error": "file not found"}), 404
+        return jsonify({"error": "error to get file"}), 500
+    except JobQueueFull:
+        return jsonify({"error": "Too many videos in progress, try again later"}), 503
     except:
         return jsonify({"error": "error to get file"}), 500
 
@@ -132,4 +731,5 @@ def download_file(bucket,filename):
 if __name__ == "__main__":
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     os.makedirs(app.config['RESULT_FOLDER'], exist_ok=True)
+    start_services()
     app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
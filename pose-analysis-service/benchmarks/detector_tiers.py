@@ -0,0 +1,93 @@
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.landmarks import load_landmarks, iter_landmarks
+from utils.model_pool import WARMUP_FRAME
+from utils.pose import process_video, create_detector, parse_frame_size, ProcessOptions, DETECTOR_TIERS
+
+
+def run_tier(video_path, tier, frame_size, work_dir):
+    # 只輸出關鍵點，量測的是偵測成本而非繪圖與編碼
+    landmarks_path = os.path.join(work_dir, f"{tier}-{frame_size[0]}x{frame_size[1]}.npz")
+    options = ProcessOptions(detector=tier, frame_size=frame_size, output_mode="landmarks", thumbnail_times=())
+    detector = None
+    try:
+        detector = create_detector(tier)
+        detector.process(WARMUP_FRAME)
+    except Exception as exc:
+        # holistic-lite 等模型未隨 MediaPipe 附帶，第一次使用時才下載；離線環境無法量測時列出原因，不中斷其他等級
+        if detector is not None:
+            detector.close()
+        return {"tier": tier, "frame_size": frame_size, "error": f"{type(exc).__name__}: {exc}"}
+    try:
+        stats = {}
+        if not process_video(video_path, None, options, stats=stats, holistic=detector, landmarks_path=landmarks_path):
+            raise SystemExit(f"Cannot process {video_path}")
+    finally:
+        detector.close()
+    inference = stats["stages"]["inference"]
+    return {
+        "tier": tier,
+        "frame_size": frame_size,
+        "frames": stats["frames"],
+        "fps": stats["fps"],
+        "ms_per_frame": inference["busy_seconds"] * 1000 / max(inference["frames"], 1),
+        "landmarks": list(iter_landmarks(load_landmarks(landmarks_path))),
+    }
+
+
+def visible_pose_error(expected, actual, min_visibility=0.5):
+    # 只比較參考結果中可見的關鍵點，畫面外的點是模型猜測，不列入
+    if expected.pose is None or actual.pose is None:
+        return None
+    visible = expected.pose[:, 3] >= min_visibility
+    if not visible.any():
+        return None
+    return float(np.mean(np.linalg.norm(expected.pose[visible, :2] - actual.pose[visible, :2], axis=1)))
+
+
+def compare(reference, result):
+    # 以參考等級的身體關鍵點為準，計算偵測率與平均偏差（正規化座標）
+    errors = [visible_pose_error(expected, actual)
+              for expected, actual in zip(reference["landmarks"], result["landmarks"])]
+    errors = [error for error in errors if error is not None]
+    detected = sum(frame.pose is not None for frame in result["landmarks"])
+    return detected / max(len(result["landmarks"]), 1), float(np.mean(errors)) if errors else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detector tiers and processing resolutions")
+    parser.add_argument("video")
+    parser.add_argument("--tiers", nargs="+", default=list(DETECTOR_TIERS), choices=DETECTOR_TIERS)
+    parser.add_argument("--sizes", nargs="+", default=["520x300"], type=parse_frame_size)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = [run_tier(args.video, tier, size, work_dir) for tier in args.tiers for size in args.sizes]
+    measured = [result for result in results if "error" not in result]
+    if not measured:
+        raise SystemExit("No detector tier could be loaded")
+    # 以最完整的等級、最高解析度作為準確度參考
+    reference = max(measured, key=lambda item: (DETECTOR_TIERS.index(item["tier"]), item["frame_size"]))
+
+    print(f"| tier | resolution | ms/frame | fps | pose detected | pose deviation vs {reference['tier']} |")
+    print("|---|---|---|---|---|---|")
+    for result in results:
+        size = f"{result['frame_size'][0]}x{result['frame_size'][1]}"
+        if "error" in result:
+            print(f"| {result['tier']} | {size} | - | - | - | not measured ({result['error']}) |")
+            continue
+        detected, deviation = compare(reference, result)
+        deviation = "-" if deviation is None else f"{deviation:.4f}"
+        print(f"| {result['tier']} | {size} | {result['ms_per_frame']:.1f} | {result['fps']:.1f} "
+              f"| {detected:.0%} | {deviation} |")
+
+
+if __name__ == "__main__":
+    main()
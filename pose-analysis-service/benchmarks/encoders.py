@@ -0,0 +1,79 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.encode import create_writer, fit_frame_size, ENCODERS, X264_PRESETS
+from utils.pose import output_fps, parse_frame_size, FRAME_SIZE
+
+DEFAULT_PRESETS = ("ultrafast", "veryfast", "medium")
+
+
+def load_frames(video_path, frame_size, max_frames):
+    # 先把影格解碼並縮放到輸出尺寸放在記憶體，量測只包含編碼與寫檔
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise SystemExit(f"Cannot open {video_path}")
+    fps = output_fps(cap)
+    size = fit_frame_size(frame_size, (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))))
+    frames = []
+    while len(frames) < max_frames:
+        ret, img = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(img, size))
+    cap.release()
+    return frames, fps, size
+
+
+def run_encoder(frames, fps, size, encoder, preset, crf, work_dir):
+    output_path = os.path.join(work_dir, f"{encoder}-{preset}.mp4")
+    started = time.perf_counter()
+    out = create_writer(output_path, fps, size, encoder, preset, crf)
+    for img in frames:
+        out.write(img)
+    if not out.release():
+        raise SystemExit(f"{encoder} {preset} failed")
+    elapsed = time.perf_counter() - started
+    output_bytes = os.path.getsize(output_path)
+    return {
+        "encoder": encoder,
+        "preset": preset if encoder == "x264" else "-",
+        "fps": len(frames) / elapsed,
+        "bytes": output_bytes,
+        "kbps": output_bytes * 8 / (len(frames) / fps) / 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark output video encoders")
+    parser.add_argument("video")
+    parser.add_argument("--encoders", nargs="+", default=list(ENCODERS), choices=ENCODERS)
+    parser.add_argument("--presets", nargs="+", default=list(DEFAULT_PRESETS), choices=X264_PRESETS)
+    parser.add_argument("--crf", type=int, default=23)
+    parser.add_argument("--size", default=f"{FRAME_SIZE[0]}x{FRAME_SIZE[1]}", type=parse_frame_size)
+    parser.add_argument("--max-frames", type=int, default=900)
+    args = parser.parse_args()
+
+    frames, fps, size = load_frames(args.video, args.size, args.max_frames)
+    # mp4v 沒有速度預設，只量測一次
+    runs = [(encoder, preset) for encoder in args.encoders
+            for preset in (args.presets if encoder == "x264" else args.presets[:1])]
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = [run_encoder(frames, fps, size, encoder, preset, args.crf, work_dir) for encoder, preset in runs]
+
+    print(f"{len(frames)} frames at {size[0]}x{size[1]}, {fps:g} fps, crf {args.crf}")
+    print("| encoder | preset | encode fps | size KB | kbit/s |")
+    print("|---|---|---|---|---|")
+    for result in results:
+        print(f"| {result['encoder']} | {result['preset']} | {result['fps']:.1f} | {result['bytes'] / 1024:.1f} "
+              f"| {result['kbps']:.0f} |")
+
+
+if __name__ == "__main__":
+    main()
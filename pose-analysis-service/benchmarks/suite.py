@@ -0,0 +1,279 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 預設組態：名稱 -> (影格數, 寬, 高)；也可用 "<影格數>@<寬>x<高>" 指定其他組態
+CONFIGS = {
+    "short-360p": (90, 640, 360),
+    "short-720p": (90, 1280, 720),
+    "long-360p": (600, 640, 360),
+    "short-1080p": (90, 1920, 1080),
+}
+DEFAULT_CONFIGS = ("short-360p", "short-720p")
+SCENARIOS = ("process_video", "thumbnails", "upload")
+VIDEO_FPS = 30.0
+# 越大越好的指標與越小越好的指標，比較基準時依此判斷退步方向
+HIGHER_IS_BETTER = ("fps",)
+LOWER_IS_BETTER = ("p95_ms", "peak_rss_mb")
+
+
+def parse_config(value):
+    if value in CONFIGS:
+        return value, CONFIGS[value]
+    try:
+        frames, size = value.split("@")
+        width, height = size.lower().split("x")
+        return value, (int(frames), int(width), int(height))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"Expected one of {', '.join(CONFIGS)} or <frames>@<width>x<height>, got {value!r}")
+
+
+def percentiles(latencies):
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None}
+    p50, p95 = np.percentile(np.asarray(latencies) * 1000, [50, 95])
+    return {"p50_ms": float(p50), "p95_ms": float(p95)}
+
+
+def frame_latencies(observed):
+    # 每個階段依序處理影格，各階段第 k 次回報都屬於第 k 格；加總即為該格的處理時間（不含排隊）
+    per_stage = list(observed.values())
+    return [sum(times) for times in zip(*per_stage)]
+
+
+def bench_process_video(video_path, repeat, work_dir):
+    from utils.model_pool import WARMUP_FRAME
+    from utils.pose import process_video, create_detector, ProcessOptions
+
+    options = ProcessOptions.from_env()
+    detector = create_detector(options.detector)
+    runs = []
+    latencies = []
+    try:
+        # 模型載入與第一次推論不列入量測
+        detector.process(WARMUP_FRAME)
+        for index in range(repeat):
+            observed = {}
+            stats = {}
+            output_path = os.path.join(work_dir, f"output-{index}.mp4")
+            if not process_video(video_path, output_path, options, stats=stats, holistic=detector,
+                                 landmarks_path=output_path + ".npz",
+                                 original_thumbnail_path=output_path + "-original.jpg",
+                                 output_thumbnail_path=output_path + "-thumbnail.jpg",
+                                 observe=lambda name, seconds: observed.setdefault(name, []).append(seconds)):
+                raise SystemExit(f"Cannot process {video_path}")
+            runs.append(stats["fps"])
+            latencies += frame_latencies(observed)
+    finally:
+        detector.close()
+    return dict(fps=float(np.median(runs)), **percentiles(latencies))
+
+
+def bench_thumbnails(video_path, repeat, work_dir):
+    import cv2
+    from utils.pose import read_frames
+    from utils.thumbnails import ThumbnailCapture
+
+    # 只解碼並擷取縮圖（每秒一張），量測不含推論的固定成本
+    runs = []
+    latencies = []
+    for index in range(repeat):
+        cap = cv2.VideoCapture(video_path)
+        fps = cap.get(cv2.CAP_PROP_FPS) or VIDEO_FPS
+        seconds = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps)
+        capture = ThumbnailCapture([float(second) for second in range(seconds + 1)], fps, 320,
+                                   os.path.join(work_dir, f"original-{index}-thumbnail.jpg"))
+        frames = 0
+        started = last = time.perf_counter()
+        try:
+            for _ in read_frames(cap, on_frame=capture.capture_original):
+                now = time.perf_counter()
+                latencies.append(now - last)
+                last = now
+                frames += 1
+        finally:
+            cap.release()
+        runs.append(frames / (last - started))
+    return dict(fps=float(np.median(runs)), **percentiles(latencies))
+
+
+def bench_upload(video_path, repeat, work_dir, storage_latency):
+    # 服務在匯入時讀取設定並建立 uploads/ 等目錄；物件寫入工作目錄下的本機儲存，
+    # 關閉結果快取，重複上傳才會真的重新處理
+    os.environ["POSE_RESULT_CACHE"] = "0"
+    os.environ["POSE_STORAGE_BACKEND"] = "local"
+    os.environ["POSE_LOCAL_STORAGE_DIR"] = os.path.join(work_dir, "storage")
+    os.environ["POSE_LOCAL_STORAGE_LATENCY"] = str(storage_latency)
+    os.chdir(work_dir)
+    import app as service
+
+    service.start_services()
+    client = service.app.test_client()
+    while client.get("/ready").status_code != 200:
+        time.sleep(0.05)
+
+    runs = []
+    latencies = []
+    for index in range(repeat):
+        started = time.perf_counter()
+        with open(video_path, "rb") as video:
+            response = client.post("/upload", data={"file": (video, f"bench-{index}.mp4")},
+                                   content_type="multipart/form-data")
+        if response.status_code != 202:
+            raise SystemExit(f"Upload failed: {response.status_code} {response.get_json()}")
+        status_url = response.get_json()["status_url"]
+        while True:
+            job = client.get(status_url).get_json()
+            if job["status"] in ("done", "failed"):
+                break
+            time.sleep(0.01)
+        if job["status"] != "done":
+            raise SystemExit(f"Job failed: {job.get('error')}")
+        elapsed = time.perf_counter() - started
+        latencies.append(elapsed)
+        runs.append(job["result"]["stats"]["frames"] / elapsed)
+    return dict(fps=float(np.median(runs)), **percentiles(latencies))
+
+
+def run_one(scenario, config, repeat, storage_latency, video_path):
+    with tempfile.TemporaryDirectory() as work_dir:
+        if scenario == "process_video":
+            result = bench_process_video(video_path, repeat, work_dir)
+        elif scenario == "thumbnails":
+            result = bench_thumbnails(video_path, repeat, work_dir)
+        else:
+            result = bench_upload(video_path, repeat, work_dir, storage_latency)
+    # Linux 的 ru_maxrss 單位為 KB
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return result
+
+
+def run_isolated(args, scenario, name, video_path):
+    # 每個組態在獨立行程中執行，峰值記憶體才不會被前一個組態墊高
+    command = [sys.executable, os.path.abspath(__file__), "--run-one", scenario, name, video_path,
+               "--repeat", str(args.repeat), "--storage-latency", str(args.storage_latency)]
+    completed = subprocess.run(command, stdout=subprocess.PIPE, text=True)
+    if completed.returncode != 0:
+        raise SystemExit(f"{scenario} on {name} failed with exit code {completed.returncode}")
+    # 結果為最後一行輸出，其餘為 mediapipe 等函式庫的訊息
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def find_regressions(baseline, current, tolerance=0.15, rss_tolerance=0.10):
+    # 只比較兩邊都有的組態與情境；fps 下降或 p95、峰值記憶體上升超過容許比例即視為退步
+    previous = {(item["config"], item["scenario"]): item for item in baseline["results"]}
+    regressions = []
+    for item in current["results"]:
+        before = previous.get((item["config"], item["scenario"]))
+        if before is None:
+            continue
+        for metric in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+            old, new = before.get(metric), item.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            allowed = rss_tolerance if metric == "peak_rss_mb" else tolerance
+            if (metric in HIGHER_IS_BETTER and change < -allowed) or (metric in LOWER_IS_BETTER and change > allowed):
+                regressions.append({"config": item["config"], "scenario": item["scenario"], "metric": metric,
+                                    "baseline": old, "current": new, "change": change})
+    return regressions
+
+
+def print_table(results):
+    def number(value, digits=1):
+        return "-" if value is None else f"{value:.{digits}f}"
+
+    print("| config | frames | resolution | scenario | fps | p50 ms | p95 ms | peak RSS MB |")
+    print("|---|---|---|---|---|---|---|---|")
+    for item in results:
+        print(f"| {item['config']} | {item['frames']} | {item['resolution']} | {item['scenario']} "
+              f"| {number(item['fps'])} | {number(item['p50_ms'], 2)} | {number(item['p95_ms'], 2)} "
+              f"| {number(item['peak_rss_mb'])} |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pose pipeline on synthetic videos")
+    parser.add_argument("--configs", nargs="+", default=list(DEFAULT_CONFIGS), type=parse_config)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--storage-latency", type=float, default=0.005,
+                        help="Simulated round trip per storage request in seconds")
+    parser.add_argument("--video-dir", help="Keep generated videos here instead of a temporary directory")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baseline", help="Compare against a previous JSON result and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--rss-tolerance", type=float, default=0.10)
+    parser.add_argument("--run-one", nargs=3, metavar=("SCENARIO", "CONFIG", "VIDEO"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        scenario, name, video_path = args.run_one
+        print(json.dumps(run_one(scenario, name, args.repeat, args.storage_latency, video_path)))
+        return
+
+    from benchmarks.synthetic import write_video
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        video_dir = args.video_dir or temp_dir
+        os.makedirs(video_dir, exist_ok=True)
+        for name, (frames, width, height) in args.configs:
+            # 同樣的組態產生相同內容的影片，已存在則沿用
+            video_path = os.path.join(video_dir, f"synthetic-{frames}-{width}x{height}.mp4")
+            if not os.path.exists(video_path):
+                write_video(video_path, frames, width, height, VIDEO_FPS)
+            for scenario in args.scenarios:
+                result = run_isolated(args, scenario, name, video_path)
+                results.append(dict(config=name, frames=frames, resolution=f"{width}x{height}",
+                                    scenario=scenario, **result))
+                print(f"{name} {scenario}: {result['fps']:.1f} fps", file=sys.stderr)
+
+    report = {
+        "metadata": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "storage_latency": args.storage_latency,
+        },
+        "results": results,
+    }
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(report, out, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = find_regressions(json.load(baseline_file), report, args.tolerance, args.rss_tolerance)
+        for item in regressions:
+            print(f"Regression: {item['config']} {item['scenario']} {item['metric']} "
+                  f"{item['baseline']:.2f} -> {item['current']:.2f} ({item['change']:+.0%})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import math
+
+import cv2
+import numpy as np
+
+BACKGROUND = (168, 176, 184)
+FLOOR = (92, 110, 96)
+SKIN = (150, 180, 225)
+SHIRT = (60, 70, 170)
+PANTS = (70, 50, 40)
+
+
+def figure_joints(index, fps, width, height):
+    # 人物左右來回走動，四肢依步伐擺動；位置與比例都依畫面大小縮放
+    t = index / fps
+    scale = height / 720
+    cx = width * (0.5 + 0.3 * math.sin(t * 0.6))
+    hip_y = height * 0.62
+    swing = math.sin(t * 4.0) * 0.5
+    arm = math.sin(t * 4.0 + math.pi) * 0.6
+
+    def limb(origin, angle, length):
+        return (origin[0] + math.sin(angle) * length * scale, origin[1] + math.cos(angle) * length * scale)
+
+    hip = (cx, hip_y)
+    neck = (cx, hip_y - 190 * scale)
+    head = (cx, neck[1] - 55 * scale)
+    shoulder_l, shoulder_r = (cx - 45 * scale, neck[1] + 10 * scale), (cx + 45 * scale, neck[1] + 10 * scale)
+    hip_l, hip_r = (cx - 28 * scale, hip_y), (cx + 28 * scale, hip_y)
+    elbow_l, elbow_r = limb(shoulder_l, arm, 85), limb(shoulder_r, -arm, 85)
+    wrist_l, wrist_r = limb(elbow_l, arm * 1.3, 80), limb(elbow_r, -arm * 1.3, 80)
+    knee_l, knee_r = limb(hip_l, swing, 110), limb(hip_r, -swing, 110)
+    ankle_l, ankle_r = limb(knee_l, swing * 0.4, 110), limb(knee_r, -swing * 0.4, 110)
+    return {
+        "head": head, "neck": neck, "hip": hip,
+        "shoulder_l": shoulder_l, "shoulder_r": shoulder_r, "elbow_l": elbow_l, "elbow_r": elbow_r,
+        "wrist_l": wrist_l, "wrist_r": wrist_r, "hip_l": hip_l, "hip_r": hip_r,
+        "knee_l": knee_l, "knee_r": knee_r, "ankle_l": ankle_l, "ankle_r": ankle_r,
+    }
+
+
+def render_frame(index, fps, width, height):
+    img = np.empty((height, width, 3), dtype=np.uint8)
+    img[:] = BACKGROUND
+    img[int(height * 0.75):] = FLOOR
+    joints = {name: (int(x), int(y)) for name, (x, y) in figure_joints(index, fps, width, height).items()}
+    thickness = max(2, height // 40)
+    for start, end, color in (("hip_l", "knee_l", PANTS), ("knee_l", "ankle_l", PANTS),
+                              ("hip_r", "knee_r", PANTS), ("knee_r", "ankle_r", PANTS)):
+        cv2.line(img, joints[start], joints[end], color, thickness + thickness // 2, cv2.LINE_AA)
+    torso = np.array([joints["shoulder_l"], joints["shoulder_r"], joints["hip_r"], joints["hip_l"]], dtype=np.int32)
+    cv2.fillConvexPoly(img, torso, SHIRT, cv2.LINE_AA)
+    for start, end, color in (("shoulder_l", "elbow_l", SHIRT), ("elbow_l", "wrist_l", SKIN),
+                              ("shoulder_r", "elbow_r", SHIRT), ("elbow_r", "wrist_r", SKIN)):
+        cv2.line(img, joints[start], joints[end], color, thickness, cv2.LINE_AA)
+    cv2.line(img, joints["neck"], (joints["neck"][0], joints["shoulder_l"][1]), SKIN, thickness, cv2.LINE_AA)
+    radius = max(4, height // 18)
+    cv2.circle(img, joints["head"], radius, SKIN, -1, cv2.LINE_AA)
+    # 臉部特徵讓偵測器較容易判定為人
+    eye_y = joints["head"][1] - radius // 5
+    for dx in (-radius // 3, radius // 3):
+        cv2.circle(img, (joints["head"][0] + dx, eye_y), max(1, radius // 8), (40, 40, 40), -1, cv2.LINE_AA)
+    cv2.ellipse(img, (joints["head"][0], joints["head"][1] + radius // 3), (radius // 3, max(1, radius // 8)),
+                0, 0, 180, (60, 60, 140), max(1, radius // 12), cv2.LINE_AA)
+    return img
+
+
+def write_video(path, frames, width, height, fps=30.0, seed=0):
+    # 同樣的參數與 seed 產生逐位元相同的影片內容，加上輕微雜訊模擬感光元件
+    rng = np.random.default_rng(seed)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Cannot create video: {path}")
+    try:
+        for index in range(frames):
+            img = render_frame(index, fps, width, height)
+            noise = rng.integers(-3, 4, size=img.shape, dtype=np.int16)
+            writer.write(np.clip(img.astype(np.int16) + noise, 0, 255).astype(np.uint8))
+    finally:
+        writer.release()
+    return path
@@ -0,0 +1,87 @@
+import shutil
+import subprocess
+import tempfile
+
+import cv2
+import numpy as np
+
+# 輸出影片的編碼方式：mp4v 為 OpenCV 內建的 MPEG-4 Part 2；x264 將影格經管線交給 ffmpeg 以 libx264 編碼成
+# H.264，檔案小得多且瀏覽器可直接播放，需要 ffmpeg（找不到時改用 mp4v）
+ENCODERS = ("mp4v", "x264")
+# 由快到慢，越慢檔案越小
+X264_PRESETS = ("ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower", "veryslow")
+
+
+def fit_frame_size(box, source_size):
+    # 在 box（寬, 高）內保持來源影片的長寬比；直式影片將 box 轉向，讓長邊對應長邊。
+    # 寬高取偶數，H.264 的 yuv420p 需要
+    width, height = box
+    source_width, source_height = source_size
+    if source_width <= 0 or source_height <= 0:
+        return box
+    if (source_width < source_height) != (width < height):
+        width, height = height, width
+    scale = min(width / source_width, height / source_height)
+    return max(2, int(source_width * scale) // 2 * 2), max(2, int(source_height * scale) // 2 * 2)
+
+
+class OpenCvWriter:
+    def __init__(self, path, fps, frame_size):
+        self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, frame_size)
+
+    def write(self, img):
+        self.writer.write(img)
+
+    def release(self):
+        self.writer.release()
+        return True
+
+
+class FfmpegWriter:
+    # 不加 +faststart：檔頭在收尾時只改寫 mdat 長度，與 OpenCV 相同，邊編碼邊上傳（GrowingFileUpload）才成立
+    def __init__(self, path, fps, frame_size, preset="veryfast", crf=23, ffmpeg="ffmpeg"):
+        width, height = frame_size
+        command = [ffmpeg, "-y", "-loglevel", "error",
+                   "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", f"{fps:g}", "-i", "-",
+                   "-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-pix_fmt", "yuv420p", path]
+        # 錯誤訊息寫到暫存檔：以管線接收時沒有人邊編碼邊讀，ffmpeg 輸出過多會卡在寫入而讓 write() 一起卡住
+        self.errors = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=self.errors)
+
+    def write(self, img):
+        try:
+            self.process.stdin.write(np.ascontiguousarray(img).data)
+        except BrokenPipeError:
+            raise RuntimeError(f"ffmpeg exited while encoding: {self._errors()}") from None
+
+    def release(self):
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.process.wait()
+        try:
+            if self.process.returncode != 0:
+                print("ffmpeg encoding failed:", self._errors())
+                return False
+            return True
+        finally:
+            self.errors.close()
+
+    def _errors(self):
+        self.process.wait()
+        self.errors.seek(0)
+        return self.errors.read().decode(errors="ignore").strip()
+
+
+def create_writer(path, fps, frame_size, encoder="x264", preset="veryfast", crf=23):
+    if encoder not in ENCODERS:
+        raise ValueError(f"Unknown encoder: {encoder}")
+    if preset not in X264_PRESETS:
+        raise ValueError(f"Unknown encoder preset: {preset}")
+    if encoder == "x264":
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg:
+            return FfmpegWriter(path, fps, frame_size, preset, crf, ffmpeg)
+        print("ffmpeg not found, encoding with mp4v")
+    return OpenCvWriter(path, fps, frame_size)
@@ -5,4 +5,119 @@ def get_env_minio_host():
 def get_env_minio_user():
     return os.environ.get("MINIO_USER","DefaultUser")
 def get_env_minio_password():
-    return os.environ.get("MINIO_PASSWORD","DefaultPassword")
\ No newline at end of file
+    return os.environ.get("MINIO_PASSWORD","DefaultPassword")
+def get_env_job_workers():
+    return int(os.environ.get("POSE_JOB_WORKERS","2"))
+def get_env_job_queue_size():
+    return int(os.environ.get("POSE_JOB_QUEUE_SIZE","8"))
+def get_env_job_ttl():
+    return int(os.environ.get("POSE_JOB_TTL","3600"))
+def get_env_pose_segments():
+    return int(os.environ.get("POSE_SEGMENTS","1"))
+def get_env_pose_segment_min_frames():
+    return int(os.environ.get("POSE_SEGMENT_MIN_FRAMES","60"))
+def get_env_pose_pipeline():
+    return os.environ.get("POSE_PIPELINE","0") == "1"
+def get_env_model_pool_size():
+    return int(os.environ.get("POSE_MODEL_POOL_SIZE",str(get_env_running_jobs())))
+def get_env_pose_sample_every():
+    return int(os.environ.get("POSE_SAMPLE_EVERY","1"))
+def get_env_pose_motion_threshold():
+    return float(os.environ.get("POSE_MOTION_THRESHOLD","0"))
+def get_env_pose_interpolation_error_bound():
+    return float(os.environ.get("POSE_INTERPOLATION_ERROR_BOUND","0.02"))
+def get_env_pose_output_mode():
+    return os.environ.get("POSE_OUTPUT_MODE","both")
+def get_env_streaming_ingest():
+    return os.environ.get("POSE_STREAMING_INGEST","0") == "1"
+def get_env_ingest_part_size():
+    return int(os.environ.get("POSE_INGEST_PART_SIZE",str(8 * 1024 * 1024)))
+def get_env_thumbnail_times():
+    return tuple(float(value) for value in os.environ.get("POSE_THUMBNAIL_TIMES","0").split(",") if value.strip())
+def get_env_thumbnail_width():
+    return int(os.environ.get("POSE_THUMBNAIL_WIDTH","0"))
+def get_env_result_cache():
+    return os.environ.get("POSE_RESULT_CACHE","1") == "1"
+def get_env_upload_part_size():
+    return int(os.environ.get("POSE_UPLOAD_PART_SIZE",str(16 * 1024 * 1024)))
+def get_env_upload_parallelism():
+    return int(os.environ.get("POSE_UPLOAD_PARALLELISM","4"))
+def get_env_write_behind():
+    return os.environ.get("POSE_WRITE_BEHIND","0") == "1"
+def get_env_write_behind_dir():
+    return os.environ.get("POSE_WRITE_BEHIND_DIR","upload-journal")
+def get_env_write_behind_workers():
+    return int(os.environ.get("POSE_WRITE_BEHIND_WORKERS","4"))
+def get_env_frame_scheduler():
+    return os.environ.get("POSE_FRAME_SCHEDULER","0") == "1"
+def get_env_inference_workers():
+    return int(os.environ.get("POSE_INFERENCE_WORKERS",str(os.cpu_count() or 1)))
+def get_env_scheduler_max_in_flight():
+    return int(os.environ.get("POSE_SCHEDULER_MAX_IN_FLIGHT","0"))
+def get_env_scheduler_policy():
+    return os.environ.get("POSE_SCHEDULER_POLICY","round_robin")
+def get_env_scheduler_job_queue():
+    return int(os.environ.get("POSE_SCHEDULER_JOB_QUEUE","4"))
+def get_env_scheduler_max_jobs():
+    return int(os.environ.get("POSE_SCHEDULER_MAX_JOBS",str(2 * get_env_job_workers())))
+def get_env_running_jobs():
+    # 啟用影格排程時 CPU 由排程器分配，可同時執行較多工作
+    return get_env_scheduler_max_jobs() if get_env_frame_scheduler() else get_env_job_workers()
+def get_env_pose_detector():
+    return os.environ.get("POSE_DETECTOR","holistic")
+def get_env_pose_frame_size():
+    return tuple(int(value) for value in os.environ.get("POSE_FRAME_SIZE","520x300").lower().split("x"))
+def get_env_pose_roi():
+    return os.environ.get("POSE_ROI","0") == "1"
+def get_env_pose_roi_margin():
+    return float(os.environ.get("POSE_ROI_MARGIN","0.5"))
+def get_env_pose_motion_gate_area():
+    return float(os.environ.get("POSE_MOTION_GATE_AREA","0"))
+def get_env_pose_motion_gate_pixel():
+    return int(os.environ.get("POSE_MOTION_GATE_PIXEL","12"))
+def get_env_pose_motion_gate_max_skip():
+    return int(os.environ.get("POSE_MOTION_GATE_MAX_SKIP","30"))
+def get_env_pose_profile():
+    return os.environ.get("POSE_PROFILE","0") == "1"
+def get_env_pose_profile_sample_interval():
+    return float(os.environ.get("POSE_PROFILE_SAMPLE_INTERVAL","0.01"))
+def get_env_storage_backend():
+    return os.environ.get("POSE_STORAGE_BACKEND","minio")
+def get_env_local_storage_dir():
+    return os.environ.get("POSE_LOCAL_STORAGE_DIR","")
+def get_env_local_storage_latency():
+    return float(os.environ.get("POSE_LOCAL_STORAGE_LATENCY","0"))
+def get_env_local_storage_bandwidth():
+    return int(os.environ.get("POSE_LOCAL_STORAGE_BANDWIDTH","0"))
+def get_env_spool():
+    return os.environ.get("POSE_SPOOL","1") == "1"
+def get_env_spool_max_bytes():
+    return int(os.environ.get("POSE_SPOOL_MAX_BYTES",str(2 * 1024 * 1024 * 1024)))
+def get_env_spool_max_age():
+    return float(os.environ.get("POSE_SPOOL_MAX_AGE","86400"))
+def get_env_pose_encoder():
+    return os.environ.get("POSE_ENCODER","x264")
+def get_env_pose_encoder_preset():
+    return os.environ.get("POSE_ENCODER_PRESET","veryfast")
+def get_env_pose_encoder_crf():
+    return int(os.environ.get("POSE_ENCODER_CRF","23"))
+def get_env_pose_keep_aspect():
+    return os.environ.get("POSE_KEEP_ASPECT","1") == "1"
+def get_env_object_cache():
+    return os.environ.get("POSE_OBJECT_CACHE","1") == "1"
+def get_env_object_cache_max_bytes():
+    return int(os.environ.get("POSE_OBJECT_CACHE_MAX_BYTES",str(64 * 1024 * 1024)))
+def get_env_object_cache_max_object_bytes():
+    return int(os.environ.get("POSE_OBJECT_CACHE_MAX_OBJECT_BYTES",str(2 * 1024 * 1024)))
+def get_env_object_cache_dir():
+    return os.environ.get("POSE_OBJECT_CACHE_DIR","object-cache")
+def get_env_object_cache_disk_bytes():
+    return int(os.environ.get("POSE_OBJECT_CACHE_DISK_BYTES",str(512 * 1024 * 1024)))
+def get_env_object_cache_revalidate():
+    return float(os.environ.get("POSE_OBJECT_CACHE_REVALIDATE","300"))
+def get_env_thumbnail_sizes():
+    return tuple(int(value) for value in os.environ.get("POSE_THUMBNAIL_SIZES","160,320").split(",") if value.strip())
+def get_env_sprite_frames():
+    return int(os.environ.get("POSE_SPRITE_FRAMES","10"))
+def get_env_sprite_width():
+    return int(os.environ.get("POSE_SPRITE_WIDTH","160"))
@@ -0,0 +1,74 @@
+import mimetypes
+import os
+import uuid
+
+from minio.error import S3Error
+
+# S3 合併物件時，除最後一段外每段的最小大小
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class GrowingFileUpload:
+    # 編碼器仍在寫入時就把已寫完的區段上傳成暫存物件，結束後在 MinIO 端合併成最終物件。
+    # mp4 收尾時會回頭改寫檔頭的 mdat 長度，因此第一段留到檔案關閉後才上傳
+    def __init__(self, storage, bucket, path, part_size):
+        self.storage = storage
+        self.bucket = bucket
+        self.path = path
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.token = uuid.uuid4().hex[:8]
+        self.next_part = 1
+        self.futures = []
+
+    def _part_name(self, index):
+        return f"{self.path}.part-{self.token}-{index:05d}"
+
+    def _upload_part(self, index, offset, length):
+        return self.storage.batch_executor.submit(self.storage.save_file_part, self.bucket, self._part_name(index),
+                                                  self.path, offset, length)
+
+    @property
+    def streaming(self):
+        # 編碼途中已上傳分段；否則檔案不足以分段，可直接整份上傳
+        return self.next_part > 1
+
+    def poll(self):
+        # 由編碼階段在每寫入一格後呼叫；只上傳檔案大小已完整涵蓋的區段
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        while size >= (self.next_part + 1) * self.part_size:
+            self.futures.append(self._upload_part(self.next_part, self.next_part * self.part_size, self.part_size))
+            self.next_part += 1
+
+    def abort(self):
+        # 處理失敗時清除已上傳的暫存分段
+        for future in self.futures:
+            future.result()
+        self._remove_parts(range(1, self.next_part))
+
+    def _remove_parts(self, indices):
+        for index in indices:
+            name = self._part_name(index)
+            try:
+                self.storage.remove_resource(self.bucket, name)
+            except S3Error as exc:
+                print("Failed to remove upload part:", name, exc)
+
+    def finish(self):
+        if not self.streaming:
+            # 檔案不足以分段，直接整份上傳
+            return self.storage.save_resource(self.bucket, self.path)
+        size = os.path.getsize(self.path)
+        tail_offset = self.next_part * self.part_size
+        futures = [self._upload_part(0, 0, self.part_size)] + self.futures
+        if size > tail_offset:
+            futures.append(self._upload_part(self.next_part, tail_offset, size - tail_offset))
+        part_count = len(futures)
+        ok = all(future.result() for future in futures)
+        content_type = mimetypes.guess_type(self.path)[0] or "application/octet-stream"
+        part_names = [self._part_name(index) for index in range(part_count)]
+        ok = ok and self.storage.compose_resource(self.bucket, self.path, part_names, content_type)
+        self._remove_parts(range(part_count))
+        return ok
@@ -0,0 +1,116 @@
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import MultipartDecoder, File, Data, Epilogue, NeedData
+
+CHUNK_SIZE = 64 * 1024
+
+
+def save_file(file, path, tees=()):
+    # 取代 FileStorage.save：複製到本機的同時把每個資料區塊交給 tees（例如計算雜湊）
+    with open(path, "wb") as output:
+        while True:
+            chunk = file.stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            for tee in tees:
+                tee(chunk)
+            output.write(chunk)
+
+
+class MultipartFileStream:
+    # 直接從請求主體解析 multipart，將指定欄位的檔案內容以 read() 提供給下游（例如 MinIO 分段上傳），
+    # 不經過 werkzeug 的暫存檔；每個資料區塊也會交給 tees（例如計算雜湊）
+    def __init__(self, stream, content_type, field="file", tees=()):
+        mimetype, options = parse_options_header(content_type)
+        if mimetype != "multipart/form-data" or "boundary" not in options:
+            raise ValueError("Expected multipart/form-data")
+        self.stream = stream
+        self.field = field
+        self.tees = list(tees)
+        self.decoder = MultipartDecoder(options["boundary"].encode())
+        self.delimiter = b"\r\n--" + options["boundary"].encode()
+        self.pending = b""
+        self.buffer = bytearray()
+        self.in_file = False
+        self.finished = False
+        self.filename = None
+        self.size = 0
+
+    def _held_back(self, data):
+        # werkzeug 的解碼器在區塊剛好結束於結尾分隔字串中間（"--boundary-" 之後）時，會把分隔字串前的 \r
+        # 當成檔案內容；結尾可能是分隔字串（含其後的 "--" 或 "\r\n"）的前段時先保留，等下一個區塊一起送出
+        for start in range(max(0, len(data) - len(self.delimiter) - 3), len(data)):
+            tail = data[start:]
+            if self.delimiter.startswith(tail):
+                return len(tail)
+            rest = tail[len(self.delimiter):]
+            if tail.startswith(self.delimiter) and (b"--\r\n".startswith(rest) or b"\r\n".startswith(rest)):
+                return len(tail)
+        return 0
+
+    def _receive(self):
+        # 送出一個區塊給解碼器；回傳 False 表示主體已讀完
+        while True:
+            chunk = self.stream.read(CHUNK_SIZE)
+            if not chunk:
+                if self.pending:
+                    self.decoder.receive_data(self.pending)
+                    self.pending = b""
+                self.decoder.receive_data(None)
+                return False
+            data = self.pending + chunk
+            keep = self._held_back(data)
+            self.pending = data[len(data) - keep:] if keep else b""
+            if len(data) > keep:
+                self.decoder.receive_data(data[:len(data) - keep])
+                return True
+
+    def _events(self):
+        eof = False
+        while True:
+            event = self.decoder.next_event()
+            if isinstance(event, NeedData):
+                if eof:
+                    # 主體在 multipart 結束前就中斷
+                    return
+                eof = not self._receive()
+                continue
+            yield event
+            if isinstance(event, Epilogue):
+                return
+
+    def open(self):
+        self.events = self._events()
+        for event in self.events:
+            if isinstance(event, File) and event.name == self.field:
+                self.filename = event.filename
+                self.in_file = True
+                return self.filename
+        self.finished = True
+        return None
+
+    def _fill(self, size):
+        while not self.finished and (size < 0 or len(self.buffer) < size):
+            event = next(self.events, None)
+            if event is None or isinstance(event, Epilogue):
+                self.finished = True
+                break
+            if isinstance(event, Data) and self.in_file:
+                if event.data:
+                    for tee in self.tees:
+                        tee(event.data)
+                    self.size += len(event.data)
+                    self.buffer += event.data
+                if not event.more_data:
+                    self.in_file = False
+                    self.finished = True
+            elif not isinstance(event, Data):
+                # 檔案欄位之後的其他欄位不需要
+                self.in_file = False
+
+    def read(self, size=-1):
+        self._fill(size)
+        if size < 0:
+            size = len(self.buffer)
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
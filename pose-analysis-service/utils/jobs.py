@@ -0,0 +1,103 @@
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobFailed(Exception):
+    pass
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobManager:
+    def __init__(self, max_workers, max_pending, ttl=3600):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pose-job")
+        # 執行中 + 等待中的工作上限，超過時直接拒絕而不是無限排隊
+        self.capacity = max_workers + max_pending
+        self.slots = threading.BoundedSemaphore(self.capacity)
+        self.ttl = ttl
+        self.jobs = {}
+        self.lock = threading.Lock()
+        # 等待中的工作依 priority 由小到大開始（相同時先到先做），例如讓短片不必排在長片後面
+        self.queue = []
+        self.order = itertools.count()
+
+    def submit(self, fn, *args, priority=0, **kwargs):
+        if not self.slots.acquire(blocking=False):
+            raise JobQueueFull()
+        job = self._add("queued")
+        with self.lock:
+            heapq.heappush(self.queue, (priority, next(self.order), job, fn, args, kwargs))
+        self.executor.submit(self._run_next)
+        return job["id"]
+
+    def _run_next(self):
+        with self.lock:
+            _, _, job, fn, args, kwargs = heapq.heappop(self.queue)
+        self._run(job, fn, args, kwargs)
+
+    def add_completed(self, result):
+        # 不需執行的工作（例如結果快取命中）直接登錄為完成，呼叫端仍可用同樣方式查詢
+        job = self._add("done", result)
+        job["started_at"] = job["finished_at"] = job["created_at"]
+        return job["id"]
+
+    def _add(self, status, result=None):
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": status,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": result,
+            "error": None,
+        }
+        with self.lock:
+            self._prune()
+            self.jobs[job["id"]] = job
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def has_capacity(self):
+        return self.pending() < self.capacity
+
+    def pending(self):
+        with self.lock:
+            return sum(1 for job in self.jobs.values() if job["status"] in ("queued", "running"))
+
+    def count(self, status):
+        with self.lock:
+            return sum(1 for job in self.jobs.values() if job["status"] == status)
+
+    def _run(self, job, fn, args, kwargs):
+        job["status"] = "running"
+        job["started_at"] = time.time()
+        try:
+            job["result"] = fn(*args, **kwargs)
+            job["status"] = "done"
+        except JobFailed as exc:
+            job["error"] = str(exc)
+            job["status"] = "failed"
+        except Exception as exc:
+            print("Job", job["id"], "crashed:", exc)
+            job["error"] = "Internal error while processing video"
+            job["status"] = "failed"
+        finally:
+            job["finished_at"] = time.time()
+            self.slots.release()
+
+    def _prune(self):
+        deadline = time.time() - self.ttl
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job["finished_at"] is not None and job["finished_at"] < deadline]
+        for job_id in expired:
+            del self.jobs[job_id]
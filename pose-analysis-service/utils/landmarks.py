@@ -0,0 +1,160 @@
+import os
+
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+POSE_POINTS = 33
+FACE_POINTS = 468
+REFINED_FACE_POINTS = 478
+LANDMARK_FILE_EXTENSION = "-landmarks.npz"
+
+
+def landmarks_to_array(landmark_list, with_visibility=False):
+    if landmark_list is None:
+        return None
+    if with_visibility:
+        return np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in landmark_list.landmark], dtype=np.float32)
+    return np.array([(lm.x, lm.y, lm.z) for lm in landmark_list.landmark], dtype=np.float32)
+
+
+def array_to_landmarks(array):
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for row in array:
+        landmark = landmark_list.landmark.add(x=float(row[0]), y=float(row[1]), z=float(row[2]))
+        if len(row) > 3:
+            landmark.visibility = float(row[3])
+    return landmark_list
+
+
+class FrameLandmarks:
+    # 單一影格的偵測結果；pose 為 (33, 4) 含可見度，face 為 (N, 3)，未偵測到為 None
+    __slots__ = ("pose", "face", "inferred", "results")
+
+    def __init__(self, pose=None, face=None, inferred=True, results=None):
+        self.pose = pose
+        self.face = face
+        self.inferred = inferred
+        # 保留 mediapipe 原始結果，繪圖時可省去轉換
+        self.results = results
+
+    @classmethod
+    def from_results(cls, results):
+        return cls(
+            pose=landmarks_to_array(results.pose_landmarks, with_visibility=True),
+            face=landmarks_to_array(getattr(results, "face_landmarks", None)),
+            inferred=True,
+            results=results,
+        )
+
+    @property
+    def pose_landmarks(self):
+        if self.results is not None:
+            return self.results.pose_landmarks
+        return array_to_landmarks(self.pose) if self.pose is not None else None
+
+    @property
+    def face_landmarks(self):
+        if self.results is not None:
+            # 只偵測身體的 Pose 結果沒有臉部欄位
+            return getattr(self.results, "face_landmarks", None)
+        return array_to_landmarks(self.face) if self.face is not None else None
+
+
+def _lerp(a, b, t):
+    if a is None or b is None or a.shape != b.shape:
+        # 只有一端有偵測結果時取較近的一端，避免憑空產生或消失
+        return a if t < 0.5 else b
+    return a + (b - a) * t
+
+
+def interpolate(start, end, t):
+    return FrameLandmarks(
+        pose=_lerp(start.pose, end.pose, t),
+        face=_lerp(start.face, end.face, t),
+        inferred=False,
+    )
+
+
+def pose_error(expected, actual):
+    # 以正規化座標 (x, y) 的平均歐氏距離衡量兩組姿勢的差距
+    if expected.pose is None or actual.pose is None:
+        return None
+    return float(np.mean(np.linalg.norm(expected.pose[:, :2] - actual.pose[:, :2], axis=1)))
+
+
+class LandmarkWriter:
+    # 以欄位方式逐格寫入暫存檔，關閉時再組成壓縮的 npz，記憶體用量與影片長度無關
+    def __init__(self, path, fps, frame_size, source=None, face_points=FACE_POINTS):
+        self.path = path
+        self.fps = fps
+        self.frame_size = frame_size
+        self.source = source or ""
+        self.face_points = face_points
+        self.frames = 0
+        self.columns = {name: open(f"{path}.{name}.tmp", "wb")
+                        for name in ("pose", "face", "pose_present", "face_present", "inferred")}
+        self.empty_pose = np.zeros((POSE_POINTS, 4), dtype=np.float32)
+        self.empty_face = np.zeros((face_points, 3), dtype=np.float32)
+
+    def append(self, frame):
+        pose_present = frame.pose is not None
+        face_present = frame.face is not None and frame.face.shape[0] == self.face_points
+        self.columns["pose"].write((frame.pose if pose_present else self.empty_pose).astype(np.float32).tobytes())
+        self.columns["face"].write((frame.face if face_present else self.empty_face).astype(np.float32).tobytes())
+        self.columns["pose_present"].write(bytes((pose_present,)))
+        self.columns["face_present"].write(bytes((face_present,)))
+        self.columns["inferred"].write(bytes((bool(frame.inferred),)))
+        self.frames += 1
+
+    def close(self):
+        for column in self.columns.values():
+            column.close()
+        shapes = {
+            "pose": (np.float32, (self.frames, POSE_POINTS, 4)),
+            "face": (np.float32, (self.frames, self.face_points, 3)),
+            "pose_present": (np.bool_, (self.frames,)),
+            "face_present": (np.bool_, (self.frames,)),
+            "inferred": (np.bool_, (self.frames,)),
+        }
+        arrays = {}
+        for name, (dtype, shape) in shapes.items():
+            tmp_path = f"{self.path}.{name}.tmp"
+            if self.frames:
+                arrays[name] = np.memmap(tmp_path, dtype=dtype, mode="r", shape=shape)
+            else:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+        with open(self.path, "wb") as out:
+            np.savez_compressed(
+                out,
+                fps=np.float32(self.fps),
+                frame_size=np.array(self.frame_size, dtype=np.int32),
+                source=np.array(self.source),
+                **arrays)
+        for name in shapes:
+            arrays[name] = None
+            os.remove(f"{self.path}.{name}.tmp")
+        return True
+
+
+def load_landmarks(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def iter_landmarks(data):
+    for index in range(len(data["pose_present"])):
+        yield FrameLandmarks(
+            pose=data["pose"][index] if data["pose_present"][index] else None,
+            face=data["face"][index] if data["face_present"][index] else None,
+            inferred=bool(data["inferred"][index]),
+        )
+
+
+def concat_landmark_files(paths, output_path):
+    parts = [load_landmarks(path) for path in paths]
+    merged = {name: np.concatenate([part[name] for part in parts])
+              for name in ("pose", "face", "pose_present", "face_present", "inferred")}
+    with open(output_path, "wb") as out:
+        np.savez_compressed(out, fps=parts[0]["fps"], frame_size=parts[0]["frame_size"],
+                            source=parts[0]["source"], **merged)
+    return True
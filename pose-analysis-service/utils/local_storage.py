@@ -0,0 +1,282 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from minio.datatypes import Object
+from minio.error import S3Error
+from minio.helpers import MIN_PART_SIZE, get_part_info
+
+# 目錄模式下每個 bucket 內存放物件資訊（ETag、Content-Type、修改時間）的子目錄
+META_DIR = ".meta"
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def _error(code, message, bucket_name, object_name=None):
+    # 以關鍵字參數建立，各版 minio 的 S3Error 參數順序不同
+    return S3Error(code=code, message=message, resource=f"/{bucket_name}/{object_name or ''}", request_id=None,
+                   host_id=None, response=None, bucket_name=bucket_name, object_name=object_name)
+
+
+def _multipart_etag(part_digests):
+    # 與 S3 相同：各分段 MD5 串接後再取 MD5，加上分段數
+    return hashlib.md5(b"".join(part_digests)).hexdigest() + f"-{len(part_digests)}"
+
+
+def _read_part(data, size):
+    # 串流一次可能只回傳部分資料，與 SDK 相同讀滿一個分段（或到結尾）
+    chunks = []
+    while size > 0:
+        chunk = data.read(size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+    # 一次就讀滿時不必再複製一份
+    return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+
+class _Response:
+    # 與 minio get_object 回傳的 urllib3 回應相同的讀取方法；讀取量依頻寬限制延遲
+    def __init__(self, stream, length, store):
+        self.stream_data = stream
+        self.remaining = length
+        self.store = store
+
+    def read(self, amt=None):
+        size = self.remaining if amt is None else min(amt, self.remaining)
+        data = self.stream_data.read(size)
+        self.remaining -= len(data)
+        self.store._transfer(len(data))
+        return data
+
+    def stream(self, amt=64 * 1024):
+        while True:
+            data = self.read(amt)
+            if not data:
+                return
+            yield data
+
+    def close(self):
+        self.stream_data.close()
+
+    def release_conn(self):
+        pass
+
+
+class LocalObjectStore:
+    # 與 Minio 用戶端相同介面（MinioClientManager 用到的部分）的本機物件儲存，供離線測試與效能量測使用。
+    # root 為 None 時物件放在記憶體，否則以 <root>/<bucket>/<物件名稱> 存成檔案（重啟後仍保留）；
+    # 寫入一律先寫暫存再取代，讀取端不會看到寫到一半的物件。
+    # latency 模擬每次請求的往返時間（秒），bandwidth 模擬傳輸速度（bytes/s，0 表示不限）
+    def __init__(self, root=None, latency=0.0, bandwidth=0):
+        self.root = root
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.lock = threading.Lock()
+        self.buckets = {}
+        if root is not None:
+            os.makedirs(root, exist_ok=True)
+
+    def _request(self, size=0):
+        if self.latency:
+            time.sleep(self.latency)
+        self._transfer(size)
+
+    def _transfer(self, size):
+        if self.bandwidth and size:
+            time.sleep(size / self.bandwidth)
+
+    def _bucket_path(self, bucket_name):
+        return os.path.join(self.root, bucket_name)
+
+    def _object_path(self, bucket_name, object_name):
+        return os.path.join(self.root, bucket_name, object_name)
+
+    def _meta_path(self, bucket_name, object_name):
+        return os.path.join(self.root, bucket_name, META_DIR, object_name + ".json")
+
+    def _check_bucket(self, bucket_name):
+        if not self._has_bucket(bucket_name):
+            raise _error("NoSuchBucket", "The specified bucket does not exist", bucket_name)
+
+    def _has_bucket(self, bucket_name):
+        if self.root is None:
+            return bucket_name in self.buckets
+        return os.path.isdir(self._bucket_path(bucket_name))
+
+    def _entry(self, bucket_name, object_name):
+        # 回傳物件資訊，memory 模式另含 data
+        self._check_bucket(bucket_name)
+        if self.root is None:
+            entry = self.buckets[bucket_name].get(object_name)
+        else:
+            try:
+                with open(self._meta_path(bucket_name, object_name)) as meta:
+                    entry = SimpleNamespace(**json.load(meta))
+                entry.last_modified = datetime.fromisoformat(entry.last_modified)
+            except (OSError, ValueError):
+                entry = None
+        if entry is None:
+            raise _error("NoSuchKey", "The specified key does not exist", bucket_name, object_name)
+        return entry
+
+    def _store(self, bucket_name, object_name, chunks, etag, content_type):
+        # chunks 為依序寫入的資料區塊，目錄模式下邊讀邊寫入暫存檔，不會整份留在記憶體；
+        # etag() 在全部寫入後才呼叫。HTTP 日期只到秒，修改時間也只保留到秒
+        entry = SimpleNamespace(etag=None, content_type=content_type, size=0,
+                                last_modified=datetime.now(timezone.utc).replace(microsecond=0))
+        if self.root is None:
+            entry.data = b"".join(chunks)
+            entry.size = len(entry.data)
+            entry.etag = etag()
+            with self.lock:
+                self.buckets[bucket_name][object_name] = entry
+            return entry
+        path = self._object_path(bucket_name, object_name)
+        meta_path = self._meta_path(bucket_name, object_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+                    entry.size += len(chunk)
+        except BaseException:
+            # 讀取來源失敗（例如資料不足）時不留下寫到一半的暫存檔
+            os.remove(temp_path)
+            raise
+        entry.etag = etag()
+        with self.lock:
+            os.replace(temp_path, path)
+            with open(meta_path, "w") as meta:
+                json.dump(dict(vars(entry), last_modified=entry.last_modified.isoformat()), meta)
+        return entry
+
+    def _open(self, bucket_name, object_name, entry):
+        if self.root is None:
+            return io.BytesIO(entry.data)
+        return open(self._object_path(bucket_name, object_name), "rb")
+
+    def bucket_exists(self, bucket_name):
+        self._request()
+        return self._has_bucket(bucket_name)
+
+    def make_bucket(self, bucket_name):
+        self._request()
+        with self.lock:
+            if self._has_bucket(bucket_name):
+                raise _error("BucketAlreadyOwnedByYou", "Your previous request to create the named bucket succeeded",
+                             bucket_name)
+            if self.root is None:
+                self.buckets[bucket_name] = {}
+            else:
+                os.makedirs(self._bucket_path(bucket_name))
+
+    def put_object(self, bucket_name, object_name, data, length, content_type="application/octet-stream",
+                   metadata=None, part_size=0, num_parallel_uploads=3):
+        # 與 SDK 相同的分段規則：長度未知或超過分段大小時以分段上傳，ETag 為分段格式
+        part_size, part_count = get_part_info(length, part_size)
+        self._check_bucket(bucket_name)
+        self._request()
+        digests = []
+
+        def parts():
+            # 一次只讀一個分段並依頻寬延遲，與 SDK 相同不必把整個物件留在記憶體
+            remaining = length
+            while remaining != 0:
+                chunk = _read_part(data, part_size if remaining < 0 else min(part_size, remaining))
+                if not chunk:
+                    if remaining > 0:
+                        raise ValueError(f"stream having not enough data; expected: {length}, "
+                                         f"got: {length - remaining}")
+                    break
+                digests.append(hashlib.md5(chunk).digest())
+                self._transfer(len(chunk))
+                if remaining > 0:
+                    remaining -= len(chunk)
+                yield chunk
+
+        def etag():
+            if part_count == 1 or len(digests) <= 1:
+                return digests[0].hex() if digests else hashlib.md5(b"").hexdigest()
+            return _multipart_etag(digests)
+
+        entry = self._store(bucket_name, object_name, parts(), etag, content_type)
+        return SimpleNamespace(bucket_name=bucket_name, object_name=object_name, etag=entry.etag)
+
+    def compose_object(self, bucket_name, object_name, sources, metadata=None):
+        # 與 SDK 相同：除最後一段外每段至少 5MiB，合併在儲存端進行，只計一次請求往返
+        entries = [self._entry(source.bucket_name, source.object_name) for source in sources]
+        for source, entry in zip(sources[:-1], entries[:-1]):
+            if entry.size < MIN_PART_SIZE:
+                raise ValueError(f"source {source.bucket_name}/{source.object_name}: size {entry.size} "
+                                 f"must be greater than {MIN_PART_SIZE}")
+        self._check_bucket(bucket_name)
+        self._request()
+
+        def chunks():
+            for source, entry in zip(sources, entries):
+                with self._open(source.bucket_name, source.object_name, entry) as part:
+                    while True:
+                        chunk = part.read(READ_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        yield chunk
+
+        digests = [bytes.fromhex(entry.etag.split("-")[0]) for entry in entries]
+        content_type = (metadata or {}).get("Content-Type", "application/octet-stream")
+        entry = self._store(bucket_name, object_name, chunks(), lambda: _multipart_etag(digests), content_type)
+        return SimpleNamespace(bucket_name=bucket_name, object_name=object_name, etag=entry.etag)
+
+    def presigned_get_object(self, bucket_name, object_name, expires=None):
+        # 目錄模式回傳檔案路徑，OpenCV 等讀取端可直接開啟；記憶體中的物件沒有可供外部讀取的位址
+        if self.root is None:
+            raise ValueError("Presigned URLs need a directory-backed local store, set POSE_LOCAL_STORAGE_DIR")
+        return os.path.abspath(self._object_path(bucket_name, object_name))
+
+    def get_object(self, bucket_name, object_name, offset=0, length=0):
+        entry = self._entry(bucket_name, object_name)
+        if offset and offset >= entry.size:
+            raise _error("InvalidRange", "The requested range is not satisfiable", bucket_name, object_name)
+        self._request()
+        length = min(length, entry.size - offset) if length else entry.size - offset
+        stream = self._open(bucket_name, object_name, entry)
+        stream.seek(offset)
+        return _Response(stream, length, self)
+
+    def stat_object(self, bucket_name, object_name):
+        entry = self._entry(bucket_name, object_name)
+        self._request()
+        return Object(bucket_name, object_name, last_modified=entry.last_modified, etag=entry.etag,
+                      size=entry.size, content_type=entry.content_type)
+
+    def fget_object(self, bucket_name, object_name, file_path):
+        response = self.get_object(bucket_name, object_name)
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        try:
+            with open(file_path, "wb") as out:
+                for chunk in response.stream(READ_CHUNK_SIZE):
+                    out.write(chunk)
+        finally:
+            response.close()
+
+    def remove_object(self, bucket_name, object_name):
+        # 與 S3 相同，刪除不存在的物件不視為錯誤
+        self._check_bucket(bucket_name)
+        self._request()
+        with self.lock:
+            if self.root is None:
+                self.buckets[bucket_name].pop(object_name, None)
+                return
+            for path in (self._object_path(bucket_name, object_name), self._meta_path(bucket_name, object_name)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
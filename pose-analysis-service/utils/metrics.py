@@ -0,0 +1,55 @@
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# 每格耗時：1ms 到 1s
+FRAME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# 上傳接收與 MinIO 寫入：10ms 到 2 分鐘
+TRANSFER_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+FPS_BUCKETS = (1, 2, 5, 10, 15, 20, 25, 30, 45, 60, 90, 120)
+
+upload_receive_seconds = Histogram(
+    "pose_upload_receive_seconds", "Time to receive an upload and queue its job",
+    ["mode"], buckets=TRANSFER_BUCKETS)
+stage_frame_seconds = Histogram(
+    "pose_stage_frame_seconds", "Per-frame processing time by pipeline stage",
+    ["stage"], buckets=FRAME_BUCKETS)
+minio_put_seconds = Histogram(
+    "pose_minio_put_seconds", "Latency of successful MinIO writes",
+    ["operation"], buckets=TRANSFER_BUCKETS)
+# 每支影片結束時累加，含分段處理在子行程中的耗時；平均每格耗時為兩者 rate 的比值
+stage_busy_seconds = Counter("pose_stage_busy_seconds", "Time spent in each pipeline stage", ["stage"])
+stage_frames = Counter("pose_stage_frames", "Frames handled by each pipeline stage", ["stage"])
+processed_fps = Histogram(
+    "pose_processed_fps", "Processing throughput of finished videos in frames per second",
+    buckets=FPS_BUCKETS)
+jobs_in_flight = Gauge("pose_jobs_in_flight", "Jobs currently being processed")
+job_queue_depth = Gauge("pose_job_queue_depth", "Jobs waiting for a worker")
+inference_frames_in_flight = Gauge("pose_inference_frames_in_flight", "Frames queued or running in the frame scheduler")
+write_behind_pending = Gauge("pose_write_behind_pending", "Objects waiting in the write-behind journal")
+spool_bytes = Gauge("pose_spool_bytes", "Bytes of local upload and result files tracked by the spool")
+object_cache_bytes = Gauge("pose_object_cache_bytes", "Bytes held by the small-object cache", ["tier"])
+object_cache_requests = Counter("pose_object_cache_requests", "Small-object cache lookups by result", ["result"])
+
+# 每格都會呼叫，預先取出各階段的 child 省去標籤查找
+_stage_children = {}
+
+
+def observe_stage(stage, seconds):
+    child = _stage_children.get(stage)
+    if child is None:
+        child = _stage_children.setdefault(stage, stage_frame_seconds.labels(stage))
+    child.observe(seconds)
+
+
+def observe_stage_totals(timings):
+    # 分段處理的子行程沒有逐格耗時，只累加總耗時與格數，不在每格 Histogram 補記
+    for stage, timing in timings.items():
+        stage_busy_seconds.labels(stage).inc(timing["busy_seconds"])
+        stage_frames.labels(stage).inc(timing["frames"])
+
+
+def observe_minio_put(operation, bucket, object_name, seconds):
+    minio_put_seconds.labels(operation).observe(seconds)
+
+
+def render():
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,36 +1,186 @@
+import io
+import mimetypes
 import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from minio import Minio
+from minio.commonconfig import ComposeSource
 from minio.error import S3Error
 
 class MinioClientManager:
-    def __init__(self, url, access_key, secret_key, secure=True):
-        self.minio_client = Minio(
+    def __init__(self, url, access_key, secret_key, secure=True, part_size=0, parallel_uploads=3, observe=None,
+                 client=None):
+        # client 可換成介面相同的其他儲存後端（例如 utils.local_storage.LocalObjectStore），不需連線 MinIO
+        self.minio_client = client if client is not None else Minio(
             url,
             access_key=access_key,
             secret_key=secret_key,
             secure=secure
         )
+        # 大於 part_size 的物件以 parallel_uploads 個執行緒平行分段上傳；0 表示由 SDK 決定分段大小
+        self.part_size = part_size
+        self.parallel_uploads = parallel_uploads
+        self.batch_executor = ThreadPoolExecutor(max_workers=max(1, parallel_uploads), thread_name_prefix="minio-upload")
+        # 已確認存在的 bucket，避免每次上傳都多一次 bucket_exists 往返
+        self.known_buckets = set()
+        self.bucket_lock = threading.Lock()
+        # observe(操作, bucket, 物件名稱, 秒數, etag) 回報每次成功寫入的耗時與寫入後的版本，不必再查詢一次
+        self.observe = observe
+
+    def _written(self,operation,bucket_name,object_name,started,result=None):
+        if self.observe is not None:
+            self.observe(operation, bucket_name, object_name, time.perf_counter() - started,
+                         getattr(result, "etag", None))
+
+    def ensure_bucket(self,bucket_name):
+        if bucket_name in self.known_buckets:
+            return
+        with self.bucket_lock:
+            if bucket_name in self.known_buckets:
+                return
+            if not self.minio_client.bucket_exists(bucket_name):
+                try:
+                    self.minio_client.make_bucket(bucket_name)
+                except S3Error as exc:
+                    # 其他節點可能同時建立同一個 bucket
+                    if exc.code not in ("BucketAlreadyOwnedByYou", "BucketAlreadyExists"):
+                        raise
+            self.known_buckets.add(bucket_name)
+
+    def _upload_failed(self,bucket_name,exc):
+        print("Error occurred:", exc)
+        if getattr(exc, "code", None) == "NoSuchBucket":
+            # bucket 被外部刪除，下次上傳時重新建立
+            self.known_buckets.discard(bucket_name)
+        return False
+
     def save_resource(self,bucket_name,file_name):
-        if not self.minio_client.bucket_exists(bucket_name):
-            self.minio_client.make_bucket(bucket_name)
+        started = time.perf_counter()
         try:
+            self.ensure_bucket(bucket_name)
             with open(file_name, "rb") as file_data:
                 file_stat = os.stat(file_name)
-                self.minio_client.put_object(
+                result = self.minio_client.put_object(
                     bucket_name,
                     file_name,
                     file_data,
-                    file_stat.st_size
+                    file_stat.st_size,
+                    content_type=mimetypes.guess_type(file_name)[0] or "application/octet-stream",
+                    part_size=self.part_size,
+                    num_parallel_uploads=self.parallel_uploads
                 )
+            self._written("put", bucket_name, file_name, started, result)
+            print("Upload successful")
+            return True
+        except (S3Error, OSError) as exc:
+            return self._upload_failed(bucket_name, exc)
+
+    def save_resource_async(self,bucket_name,file_name):
+        return self.batch_executor.submit(self.save_resource, bucket_name, file_name)
+
+    def save_resources_async(self,items):
+        # 一次上傳多個檔案（原始影片、縮圖、結果影片等），items 為 (bucket, 檔名)；
+        # 各檔案平行上傳，回傳的 Future 在全部結束後完成，結果為失敗的項目
+        items = list(items)
+        batch = Future()
+        if not items:
+            batch.set_result([])
+            return batch
+        futures = [self.batch_executor.submit(self.save_resource, *item) for item in items]
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            batch.set_result([item for item, future in zip(items, futures)
+                              if future.exception() is not None or not future.result()])
+
+        for future in futures:
+            future.add_done_callback(done)
+        return batch
+
+    def save_resources(self,items):
+        return self.save_resources_async(items).result()
+
+    def save_file_part(self,bucket_name,object_name,file_name,offset,length):
+        started = time.perf_counter()
+        try:
+            self.ensure_bucket(bucket_name)
+            with open(file_name, "rb") as file_data:
+                file_data.seek(offset)
+                result = self.minio_client.put_object(bucket_name, object_name, file_data, length)
+            self._written("put_part", bucket_name, object_name, started, result)
+            return True
+        except (S3Error, OSError) as exc:
+            return self._upload_failed(bucket_name, exc)
+
+    def compose_resource(self,bucket_name,object_name,part_names,content_type="application/octet-stream"):
+        # 在 MinIO 端依序合併已上傳的分段（除最後一段外每段至少 5MiB）
+        started = time.perf_counter()
+        try:
+            sources = [ComposeSource(bucket_name, name) for name in part_names]
+            result = self.minio_client.compose_object(bucket_name, object_name, sources,
+                                                      metadata={"Content-Type": content_type})
+            self._written("compose", bucket_name, object_name, started, result)
             print("Upload successful")
+            return True
         except S3Error as exc:
-            print("Error occurred:", exc)
-            return False
-        finally:
+            return self._upload_failed(bucket_name, exc)
+
+    def save_stream(self,bucket_name,object_name,stream,part_size):
+        started = time.perf_counter()
+        try:
+            self.ensure_bucket(bucket_name)
+            # 長度未知時以 part_size 為單位分段上傳，記憶體只需保留一個分段
+            result = self.minio_client.put_object(bucket_name, object_name, stream, length=-1, part_size=part_size)
+            self._written("put_stream", bucket_name, object_name, started, result)
+            print("Upload successful")
             return True
+        except (S3Error, ValueError, OSError) as exc:
+            return self._upload_failed(bucket_name, exc)
+
+    def save_bytes(self,bucket_name,object_name,data,content_type="application/octet-stream"):
+        started = time.perf_counter()
+        try:
+            self.ensure_bucket(bucket_name)
+            result = self.minio_client.put_object(bucket_name, object_name, io.BytesIO(data), len(data),
+                                                  content_type=content_type)
+            self._written("put", bucket_name, object_name, started, result)
+            return True
+        except S3Error as exc:
+            return self._upload_failed(bucket_name, exc)
+
+    def get_resource_url(self,bucket,filename,expires):
+        return self.minio_client.presigned_get_object(bucket, filename, expires=expires)
 
-    def get_resource(self,bucket,filename):
-        return self.minio_client.get_object(bucket, filename)
+    def get_resource(self,bucket,filename,offset=0,length=0):
+        return self.minio_client.get_object(bucket, filename, offset=offset, length=length)
+
+    def stat_resource(self,bucket,filename):
+        return self.minio_client.stat_object(bucket, filename)
+
+    def download_resource(self,bucket,filename,file_path):
+        self.minio_client.fget_object(bucket, filename, file_path)
+
+    def get_etag(self,bucket,filename):
+        try:
+            return self.minio_client.stat_object(bucket, filename).etag
+        except S3Error:
+            return None
+
+    def remove_resource(self,bucket,filename):
+        self.minio_client.remove_object(bucket, filename)
+
+    def resource_exists(self,bucket,filename):
+        try:
+            self.minio_client.stat_object(bucket, filename)
+            return True
+        except S3Error:
+            return False
 
 
@@ -0,0 +1,111 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+WARMUP_FRAME = np.zeros((300, 520, 3), dtype=np.uint8)
+
+
+class ModelUnavailable(Exception):
+    pass
+
+
+class ModelPool:
+    def __init__(self, name, factory, size):
+        self.name = name
+        self.factory = factory
+        self.size = size
+        self.models = []
+        # 暖機或重設後重建失敗而缺少的實例數，由下一個取用的工作重新建立
+        self.missing = 0
+        self.cond = threading.Condition()
+        self.ready = threading.Event()
+        self.error = None
+        self.warmup_seconds = None
+
+    def start(self):
+        threading.Thread(target=self._warm_up, name=f"warmup-{self.name}", daemon=True).start()
+
+    def _create(self):
+        model = self.factory()
+        # 第一次推論才會真正載入模型與初始化計算圖；空白影格沒有偵測結果，不會留下追蹤狀態
+        model.process(WARMUP_FRAME)
+        return model
+
+    def _warm_up(self):
+        started = time.perf_counter()
+        for built in range(self.size):
+            try:
+                model = self._create()
+            except Exception as exc:
+                print(f"Failed to warm up {self.name} models:", exc)
+                self.error = str(exc)
+                self._put(None, self.size - built)
+                return
+            self._put(model)
+        self.warmup_seconds = time.perf_counter() - started
+        self.ready.set()
+        print(f"{self.name} model pool ready ({self.size} instances, {self.warmup_seconds:.1f}s)")
+
+    def _put(self, model, missing=1):
+        with self.cond:
+            if model is None:
+                self.missing += missing
+            else:
+                self.models.append(model)
+            self.cond.notify_all()
+
+    def _take(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            while not self.models and not self.missing:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise ModelUnavailable(f"No {self.name} model available within {timeout:g}s")
+                self.cond.wait(remaining)
+            if self.models:
+                return self.models.pop()
+            self.missing -= 1
+        # 缺少的實例在取用的工作中重新建立；失敗時這個工作以錯誤結束，名額留給下一個工作再試
+        try:
+            return self._create()
+        except Exception as exc:
+            self.error = str(exc)
+            self._put(None)
+            raise ModelUnavailable(f"Cannot create {self.name} model: {exc}") from exc
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        model = self._take(timeout)
+        try:
+            yield model
+        finally:
+            # 在背景重設追蹤狀態，不佔用本次工作的時間，下一支影片拿到乾淨且已暖機的實例
+            threading.Thread(target=self._recycle, args=(model,), daemon=True).start()
+
+    def _recycle(self, model):
+        try:
+            model.reset()
+            model.process(WARMUP_FRAME)
+        except Exception as exc:
+            print(f"Failed to reset {self.name} model, replacing it:", exc)
+            try:
+                model = self._create()
+            except Exception as exc:
+                print(f"Failed to replace {self.name} model:", exc)
+                self.error = str(exc)
+                model = None
+        self._put(model)
+
+    def status(self):
+        with self.cond:
+            available, missing = len(self.models), self.missing
+        return {
+            "ready": self.ready.is_set(),
+            "size": self.size,
+            "available": available,
+            "missing": missing,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error,
+        }
@@ -0,0 +1,74 @@
+import cv2
+import numpy as np
+
+from utils.landmarks import FrameLandmarks
+
+SIGNATURE_SIZE = (64, 36)
+
+
+def frame_signature(img):
+    # 縮小並轉灰階後比較，成本遠低於一次姿勢推論
+    small = cv2.resize(img, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+
+def motion_score(previous, current):
+    # 兩張縮圖的平均絕對差（0–255）
+    if previous is None:
+        return float("inf")
+    return float(np.mean(cv2.absdiff(previous, current)))
+
+
+GATE_SIZE = (128, 72)
+
+
+def gate_signature(img):
+    # 比 frame_signature 保留更多細節，並模糊掉感光雜訊
+    small = cv2.resize(img, GATE_SIZE, interpolation=cv2.INTER_AREA)
+    return cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (3, 3), 0)
+
+
+def changed_ratio(previous, current, pixel_threshold):
+    # 灰階差超過 pixel_threshold 的像素比例；人只佔畫面一小部分時比平均差更敏感
+    return float(np.count_nonzero(cv2.absdiff(previous, current) > pixel_threshold)) / previous.size
+
+
+class MotionGate:
+    # 畫面與上次推論時幾乎相同（變化像素比例不超過 area_threshold）時略過推論，沿用上次的關鍵點；
+    # 上次沒有偵測到人時即視為無人。與上次推論的影格比較，緩慢變化不會累積被忽略；
+    # 連續略過 max_skip 格後強制推論一次
+    def __init__(self, detect, area_threshold, pixel_threshold=12, max_skip=30):
+        self.detect = detect
+        self.area_threshold = area_threshold
+        self.pixel_threshold = pixel_threshold
+        self.max_skip = max_skip
+        self.last = None
+        self.last_signature = None
+        self.run = 0
+        self.frames = 0
+        self.skipped = 0
+        self.no_subject = 0
+
+    def process(self, img):
+        self.frames += 1
+        signature = gate_signature(img)
+        if (self.last is not None and self.run < self.max_skip
+                and changed_ratio(self.last_signature, signature, self.pixel_threshold) <= self.area_threshold):
+            self.run += 1
+            self.skipped += 1
+            if self.last.pose is None:
+                self.no_subject += 1
+            return FrameLandmarks(self.last.pose, self.last.face, inferred=False, results=self.last.results)
+        self.last = self.detect(img)
+        self.last_signature = signature
+        self.run = 0
+        return self.last
+
+    def summary(self):
+        return {
+            "frames": self.frames,
+            "inference_frames": self.frames - self.skipped,
+            "skipped_frames": self.skipped,
+            "skipped_no_subject": self.no_subject,
+            "skip_ratio": self.skipped / self.frames if self.frames else 0.0,
+        }
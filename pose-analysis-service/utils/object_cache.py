@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+class CachedObject:
+    # 與 MinIO stat 結果相同的欄位，下載流程可直接當作 stat 使用
+    __slots__ = ("etag", "size", "content_type", "last_modified", "data", "checked")
+
+    def __init__(self, etag, size, content_type, last_modified, data, checked):
+        self.etag = etag
+        self.size = size
+        self.content_type = content_type
+        self.last_modified = last_modified
+        self.data = data
+        self.checked = checked
+
+
+class ObjectCache:
+    # 縮圖、關鍵點檔等小型且寫入後不再變動的物件的 LRU 快取，命中時不必連線 MinIO：
+    # - 記憶體保留最近使用、總量不超過 max_bytes 的物件；超過 max_object_bytes 的物件不快取
+    # - 設定 disk_dir 時同時寫入磁碟（總量上限 disk_max_bytes），記憶體逐出或服務重啟後仍可由磁碟讀取
+    # - 服務寫入物件時由 invalidate 移除；距上次確認超過 revalidate_after 秒時以 stat 比對 ETag，
+    #   涵蓋其他程式直接寫入 MinIO 的情況
+    # stat(bucket, 物件) 與 read(bucket, 物件) 由呼叫端提供；observe(結果) 回報 memory、disk 或 miss
+    def __init__(self, stat, read, max_bytes, max_object_bytes, disk_dir=None, disk_max_bytes=0,
+                 revalidate_after=300.0, observe=None):
+        self.stat = stat
+        self.read = read
+        self.max_bytes = max_bytes
+        self.max_object_bytes = max_object_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.revalidate_after = revalidate_after
+        self.observe = observe
+        # 依最近存取排序，最前面最久未使用；disk 只記錄大小
+        self.entries = OrderedDict()
+        self.disk = OrderedDict()
+        self.total = 0
+        self.disk_total = 0
+        # 每次 invalidate 遞增，讀取途中物件被改寫時不存入讀到的舊版本
+        self.generation = 0
+        self.lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load_disk()
+
+    def fetch(self, bucket, name):
+        # 回傳 CachedObject；物件超過大小上限時回傳 None，由呼叫端直接向 MinIO 讀取。物件不存在時拋出 stat 的例外
+        key = (bucket, name)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            generation = self.generation
+        result = "memory"
+        if entry is None:
+            entry = self._read_disk(key)
+            result = "disk"
+        if entry is not None and now - entry.checked > self.revalidate_after:
+            stat = self.stat(bucket, name)
+            if stat.etag == entry.etag:
+                entry.checked = now
+            else:
+                entry = None
+        if entry is None:
+            result = "miss"
+            stat = self.stat(bucket, name)
+            if stat.size > self.max_object_bytes:
+                self._observe(result)
+                return None
+            entry = CachedObject(stat.etag, stat.size, stat.content_type, stat.last_modified,
+                                 self.read(bucket, name), now)
+        self._observe(result)
+        if result != "memory":
+            self._store(key, entry, generation, write_disk=result == "miss")
+        return entry
+
+    def invalidate(self, bucket, name):
+        key = (bucket, name)
+        with self.lock:
+            self.generation += 1
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.total -= entry.size
+            on_disk = self.disk.pop(key, None)
+            if on_disk is not None:
+                self.disk_total -= on_disk
+        if on_disk is not None:
+            self._remove_disk(key)
+
+    def _observe(self, result):
+        if self.observe is not None:
+            self.observe(result)
+
+    def _store(self, key, entry, generation, write_disk):
+        write_disk = write_disk and bool(self.disk_dir) and entry.size <= self.disk_max_bytes
+        if write_disk:
+            self._write_disk(key, entry)
+        removed = []
+        with self.lock:
+            if generation != self.generation:
+                # 讀取途中有物件被改寫，無法確定讀到的是哪個版本
+                if write_disk and key not in self.disk:
+                    removed.append(key)
+                write_disk = False
+                entry = None
+            if entry is not None:
+                previous = self.entries.pop(key, None)
+                if previous is not None:
+                    self.total -= previous.size
+                if entry.size <= self.max_bytes:
+                    self.entries[key] = entry
+                    self.total += entry.size
+                while self.total > self.max_bytes:
+                    _, evicted = self.entries.popitem(last=False)
+                    self.total -= evicted.size
+            if write_disk:
+                self.disk_total += entry.size - self.disk.pop(key, 0)
+                self.disk[key] = entry.size
+                while self.disk_total > self.disk_max_bytes:
+                    old_key, size = self.disk.popitem(last=False)
+                    self.disk_total -= size
+                    removed.append(old_key)
+        for old_key in removed:
+            self._remove_disk(old_key)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, hashlib.sha256("/".join(key).encode()).hexdigest())
+
+    def _read_disk(self, key):
+        with self.lock:
+            if key not in self.disk:
+                return None
+            self.disk.move_to_end(key)
+        path = self._disk_path(key)
+        try:
+            with open(path + ".json") as meta_file:
+                meta = json.load(meta_file)
+            with open(path, "rb") as data_file:
+                data = data_file.read()
+        except (OSError, ValueError):
+            meta, data = None, None
+        if meta is None or len(data) != meta["size"]:
+            with self.lock:
+                size = self.disk.pop(key, None)
+                if size is not None:
+                    self.disk_total -= size
+            return None
+        # 磁碟上的副本不知道期間是否被改寫，視為需要重新確認
+        return CachedObject(meta["etag"], meta["size"], meta["content_type"],
+                            datetime.fromisoformat(meta["last_modified"]), data, 0.0)
+
+    def _write_disk(self, key, entry):
+        path = self._disk_path(key)
+        meta = {"bucket": key[0], "name": key[1], "etag": entry.etag, "size": entry.size,
+                "content_type": entry.content_type, "last_modified": entry.last_modified.isoformat()}
+        try:
+            for target, content, mode in ((path, entry.data, "wb"), (path + ".json", json.dumps(meta), "w")):
+                fd, temp_path = tempfile.mkstemp(dir=self.disk_dir, prefix=".cache-")
+                with os.fdopen(fd, mode) as out:
+                    out.write(content)
+                os.replace(temp_path, target)
+        except OSError as exc:
+            print("Failed to write object cache:", key, exc)
+
+    def _remove_disk(self, key):
+        path = self._disk_path(key)
+        for target in (path + ".json", path):
+            try:
+                os.remove(target)
+            except FileNotFoundError:
+                pass
+
+    def _load_disk(self):
+        # 服務重啟後沿用磁碟上的快取，依修改時間排列最近使用順序
+        found = []
+        file_names = set(os.listdir(self.disk_dir))
+        for file_name in file_names:
+            # 寫到一半的暫存檔與缺少描述檔的內容檔
+            if file_name.startswith(".cache-") or (not file_name.endswith(".json")
+                                                   and file_name + ".json" not in file_names):
+                os.remove(os.path.join(self.disk_dir, file_name))
+                continue
+            if not file_name.endswith(".json"):
+                continue
+            path = os.path.join(self.disk_dir, file_name)
+            try:
+                with open(path) as meta_file:
+                    meta = json.load(meta_file)
+                found.append((os.path.getmtime(path), (meta["bucket"], meta["name"]), meta["size"]))
+            except (OSError, ValueError, KeyError):
+                continue
+        for _, key, size in sorted(found):
+            self.disk[key] = size
+            self.disk_total += size
@@ -0,0 +1,161 @@
+import queue
+import threading
+import time
+
+_END = object()
+
+
+class FlatStage:
+    # 一進多出的階段：process 回傳零或多個項目，flush 在資料結束時取出暫存的項目
+    def __init__(self, process, flush=None):
+        self.process = process
+        self.flush = flush
+
+
+def _stage_timing(timings, name):
+    return timings.setdefault(name, {"frames": 0, "busy_seconds": 0.0, "wait_seconds": 0.0})
+
+
+def _apply(fn, item, timing, name=None, observe=None):
+    started = time.perf_counter()
+    if isinstance(fn, FlatStage):
+        outputs = fn.process(item)
+    else:
+        outputs = (fn(item),)
+    elapsed = time.perf_counter() - started
+    timing["busy_seconds"] += elapsed
+    timing["frames"] += 1
+    if observe is not None:
+        observe(name, elapsed)
+    return outputs
+
+
+def _flush(fn, timing):
+    if not isinstance(fn, FlatStage) or fn.flush is None:
+        return ()
+    started = time.perf_counter()
+    outputs = fn.flush()
+    timing["busy_seconds"] += time.perf_counter() - started
+    return outputs
+
+
+def run_serial(source, stages, timings, observe=None):
+    # 與 run_pipelined 相同的計時方式，方便比較兩種模式；observe(階段名稱, 秒數) 逐格回報耗時
+    source_timing = _stage_timing(timings, "decode")
+    stage_timings = [_stage_timing(timings, name) for name, _ in stages]
+
+    def push(index, items):
+        if index == len(stages):
+            return
+        for item in items:
+            push(index + 1, _apply(stages[index][1], item, stage_timings[index], stages[index][0], observe))
+
+    items = iter(source)
+    while True:
+        started = time.perf_counter()
+        item = next(items, _END)
+        elapsed = time.perf_counter() - started
+        source_timing["busy_seconds"] += elapsed
+        if item is _END:
+            break
+        source_timing["frames"] += 1
+        if observe is not None:
+            observe("decode", elapsed)
+        push(0, (item,))
+    for index, (name, fn) in enumerate(stages):
+        push(index + 1, _flush(fn, stage_timings[index]))
+
+
+def run_pipelined(source, stages, timings, queue_size=8, observe=None):
+    # 每個階段一條執行緒，以有界佇列串接：下游變慢時上游會被阻塞（背壓），
+    # 單一執行緒 + FIFO 佇列保證影格順序不變
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    stop = threading.Event()
+    errors = []
+
+    def put(q, item, timing):
+        started = time.perf_counter()
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        timing["wait_seconds"] += time.perf_counter() - started
+
+    def run_source():
+        timing = _stage_timing(timings, "decode")
+        try:
+            items = iter(source)
+            while not stop.is_set():
+                started = time.perf_counter()
+                item = next(items, _END)
+                elapsed = time.perf_counter() - started
+                timing["busy_seconds"] += elapsed
+                if item is _END:
+                    break
+                timing["frames"] += 1
+                if observe is not None:
+                    observe("decode", elapsed)
+                put(queues[0], item, timing)
+        except Exception as exc:
+            errors.append(exc)
+            stop.set()
+        finally:
+            put(queues[0], _END, timing)
+
+    def run_stage(index, name, fn):
+        timing = _stage_timing(timings, name)
+        in_queue = queues[index]
+        out_queue = queues[index + 1] if index + 1 < len(queues) else None
+
+        def forward(outputs):
+            if out_queue is not None:
+                for output in outputs:
+                    put(out_queue, output, timing)
+
+        while True:
+            started = time.perf_counter()
+            try:
+                item = in_queue.get(timeout=0.1)
+            except queue.Empty:
+                if stop.is_set():
+                    break
+                continue
+            finally:
+                timing["wait_seconds"] += time.perf_counter() - started
+            if item is _END:
+                if not stop.is_set():
+                    try:
+                        forward(_flush(fn, timing))
+                    except Exception as exc:
+                        errors.append(exc)
+                        stop.set()
+                break
+            if stop.is_set():
+                continue
+            try:
+                outputs = _apply(fn, item, timing, name, observe)
+            except Exception as exc:
+                errors.append(exc)
+                stop.set()
+                continue
+            forward(outputs)
+        if out_queue is not None:
+            put(out_queue, _END, timing)
+
+    threads = [threading.Thread(target=run_source, name="pipeline-decode", daemon=True)]
+    threads += [threading.Thread(target=run_stage, args=(index, name, fn), name=f"pipeline-{name}", daemon=True)
+                for index, (name, fn) in enumerate(stages)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def bottleneck(timings):
+    if not timings:
+        return None
+    return max(timings, key=lambda name: timings[name]["busy_seconds"])
@@ -0,0 +1,327 @@
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
+
+import cv2
+import mediapipe as mp
+
+from utils.encode import create_writer, fit_frame_size
+from utils.env import *
+from utils.landmarks import FrameLandmarks, LandmarkWriter, FACE_POINTS, REFINED_FACE_POINTS
+from utils.pipeline import run_serial, run_pipelined, bottleneck
+from utils.roi import RoiTracker
+from utils.motion import MotionGate
+from utils.sampling import AdaptiveSampler
+from utils.thumbnails import ThumbnailCapture
+
+mp_drawing = mp.solutions.drawing_utils  # mediapipe 繪圖方法
+mp_drawing_styles = mp.solutions.drawing_styles  # mediapipe 繪圖樣式
+mp_holistic = mp.solutions.holistic  # mediapipe 全身偵測方法
+mp_pose = mp.solutions.pose  # mediapipe 身體姿勢偵測方法
+
+FRAME_SIZE = (520, 300)
+# 來源影片沒有標示（或標示不合理的）fps 時使用
+OUTPUT_FPS = 20.0
+# 偵測器等級，由快到慢：pose 只偵測身體；holistic-lite 為 model_complexity=0 的 Holistic；
+# holistic 為原本的設定；holistic-full 另外細化臉部（含虹膜，478 點）
+DETECTOR_TIERS = ("pose", "holistic-lite", "holistic", "holistic-full")
+
+
+def draw_results(img, results):
+    # results 可為 mediapipe 原始結果或 FrameLandmarks
+    # 面部偵測，繪製臉部網格
+    if results.face_landmarks:
+        mp_drawing.draw_landmarks(
+            img,
+            results.face_landmarks,
+            mp_holistic.FACEMESH_CONTOURS,
+            landmark_drawing_spec=None,
+            connection_drawing_spec=mp_drawing_styles
+            .get_default_face_mesh_contours_style())
+
+    # 身體偵測，繪製身體骨架
+    if results.pose_landmarks:
+        mp_drawing.draw_landmarks(
+            img,
+            results.pose_landmarks,
+            mp_holistic.POSE_CONNECTIONS,
+            landmark_drawing_spec=mp_drawing_styles
+            .get_default_pose_landmarks_style())
+
+
+def read_frames(cap, start_frame=0, end_frame=None, size=FRAME_SIZE, on_frame=None):
+    frame_index = start_frame
+    while cap.isOpened() and (end_frame is None or frame_index < end_frame):
+        ret, img = cap.read()
+        if not ret:
+            break
+        if on_frame is not None:
+            on_frame(frame_index, img)  # 縮放前的原始影格
+        frame_index += 1
+        # size 為 None 時保留原始解析度，由後續階段縮放
+        yield cv2.resize(img, size) if size is not None else img
+
+
+@dataclass
+class ProcessOptions:
+    pipelined: bool = False
+    # 關鍵影格間距上限，1 表示每一格都推論
+    sample_every: int = 1
+    # 縮圖平均差超過此值時提早推論，0 表示停用
+    motion_threshold: float = 0.0
+    # 內插誤差上限（正規化座標），超過時縮短關鍵影格間距
+    interpolation_error_bound: float = 0.02
+    validate_every: int = 4
+    # video：只輸出疊圖影片；landmarks：只輸出關鍵點檔，影片在被請求時才繪製；both：兩者皆輸出
+    output_mode: str = "both"
+    # 縮圖擷取的時間點（秒）與寬度（0 表示不縮小）
+    thumbnail_times: tuple = (0.0,)
+    thumbnail_width: int = 0
+    # 每張縮圖另存的 WebP 寬度，以及滑鼠移動預覽用縮圖列的格數（0 表示停用）與每格寬度
+    thumbnail_sizes: tuple = (160, 320)
+    sprite_frames: int = 10
+    sprite_width: int = 160
+    detector: str = "holistic"
+    # 推論與輸出影片的解析度（寬, 高）；keep_aspect 時為上限，實際尺寸依來源影片的長寬比縮放
+    frame_size: tuple = FRAME_SIZE
+    keep_aspect: bool = True
+    # 輸出影片的編碼方式（見 utils/encode.py）與 x264 的速度預設、品質（CRF，越小品質越好、檔案越大）
+    encoder: str = "x264"
+    encoder_preset: str = "veryfast"
+    encoder_crf: int = 23
+    # 依前一格姿勢範圍裁切原始解析度影格推論；margin 為範圍四周保留的比例
+    roi: bool = False
+    roi_margin: float = 0.5
+    # 畫面變化像素比例不超過 motion_gate_area 時沿用上次的關鍵點，0 表示停用；
+    # motion_gate_pixel 為判定像素有變化的灰階差，motion_gate_max_skip 為連續略過的上限
+    motion_gate_area: float = 0.0
+    motion_gate_pixel: int = 12
+    motion_gate_max_skip: int = 30
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            pipelined=get_env_pose_pipeline(),
+            output_mode=get_env_pose_output_mode(),
+            thumbnail_times=get_env_thumbnail_times(),
+            thumbnail_width=get_env_thumbnail_width(),
+            thumbnail_sizes=get_env_thumbnail_sizes(),
+            sprite_frames=get_env_sprite_frames(),
+            sprite_width=get_env_sprite_width(),
+            sample_every=get_env_pose_sample_every(),
+            motion_threshold=get_env_pose_motion_threshold(),
+            interpolation_error_bound=get_env_pose_interpolation_error_bound(),
+            detector=get_env_pose_detector(),
+            frame_size=get_env_pose_frame_size(),
+            keep_aspect=get_env_pose_keep_aspect(),
+            encoder=get_env_pose_encoder(),
+            encoder_preset=get_env_pose_encoder_preset(),
+            encoder_crf=get_env_pose_encoder_crf(),
+            roi=get_env_pose_roi(),
+            roi_margin=get_env_pose_roi_margin(),
+            motion_gate_area=get_env_pose_motion_gate_area(),
+            motion_gate_pixel=get_env_pose_motion_gate_pixel(),
+            motion_gate_max_skip=get_env_pose_motion_gate_max_skip(),
+        )
+
+    @property
+    def sampling(self):
+        return self.sample_every > 1 or self.motion_threshold > 0
+
+    @property
+    def writes_video(self):
+        return self.output_mode in ("video", "both")
+
+    @property
+    def writes_landmarks(self):
+        return self.output_mode in ("landmarks", "both")
+
+
+def create_detector(tier="holistic"):
+    if tier == "pose":
+        return mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    if tier == "holistic-lite":
+        return mp_holistic.Holistic(model_complexity=0, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    if tier == "holistic":
+        return mp_holistic.Holistic(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    if tier == "holistic-full":
+        return mp_holistic.Holistic(refine_face_landmarks=True, min_detection_confidence=0.5,
+                                    min_tracking_confidence=0.5)
+    raise ValueError(f"Unknown detector tier: {tier}")
+
+
+def face_points_for(tier):
+    return REFINED_FACE_POINTS if tier == "holistic-full" else FACE_POINTS
+
+
+def parse_frame_size(value):
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise ValueError(f"Unsupported frame size: {value}") from None
+    if not (16 <= width <= 3840 and 16 <= height <= 2160):
+        raise ValueError(f"Unsupported frame size: {value}")
+    return width, height
+
+
+def output_fps(cap):
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    return fps if 0 < fps <= 240 else OUTPUT_FPS
+
+
+def process_video(input_path, output_path, options=None, start_frame=0, end_frame=None, stats=None,
+                  holistic=None, landmark_sink=None, landmarks_path=None, source=None,
+                  original_thumbnail_path=None, output_thumbnail_path=None, on_thumbnail=None, on_encoded=None,
+                  scheduler=None, observe=None):
+    options = options or ProcessOptions()
+    cap = cv2.VideoCapture(input_path)
+
+    if not cap.isOpened():
+        print("Cannot open video")
+        return False
+
+    if start_frame:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    # 輸出影片沿用來源的 fps 與長寬比
+    fps = output_fps(cap)
+    if options.keep_aspect:
+        source_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        options = replace(options, frame_size=fit_frame_size(options.frame_size, source_size))
+    out = None
+    if options.writes_video:
+        out = create_writer(output_path, fps, options.frame_size, options.encoder, options.encoder_preset,
+                            options.encoder_crf)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    thumbnails = ThumbnailCapture(options.thumbnail_times, fps, options.thumbnail_width,
+                                  original_thumbnail_path, output_thumbnail_path, start_frame, end_frame,
+                                  on_written=on_thumbnail, sizes=options.thumbnail_sizes,
+                                  sprite_count=options.sprite_frames, sprite_width=options.sprite_width,
+                                  frame_count=total_frames)
+    output_index = start_frame
+    writer = None
+    if options.writes_landmarks and landmarks_path:
+        writer = LandmarkWriter(landmarks_path, fps, options.frame_size, source=source or input_path,
+                                face_points=face_points_for(options.detector))
+
+    scheduled = None
+    if scheduler is not None:
+        end = total_frames if end_frame is None else min(end_frame, total_frames)
+        scheduled = scheduler.register(frames=max(0, end - start_frame))
+
+    timings = {}
+    sampler = None
+    tracker = None
+    gate = None
+    encoded = True
+    started = time.perf_counter()
+    # 由呼叫端提供已暖機的實例時不負責關閉
+    with (nullcontext(holistic) if holistic is not None else create_detector(options.detector)) as holistic:
+        def detect(img):
+            img2 = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)  # 將 BGR 轉換成 RGB
+            return FrameLandmarks.from_results(holistic.process(img2))  # 開始偵測全身
+
+        # 交給共用的推論執行緒，與其他工作輪流使用 CPU；ROI、靜止畫面閘門與抽樣依前一格的結果決定下一格，
+        # 只能逐格送出並等待，其餘情況每個工作保留多格排隊
+        queued = scheduled is not None and not (options.roi or options.motion_gate_area > 0 or options.sampling)
+        if scheduled is not None and not queued:
+            unscheduled = detect
+
+            def detect(img):
+                return scheduled.run(unscheduled, img)
+
+        if options.roi:
+            # 影格以原始解析度進入推論，推論後才縮放到輸出尺寸
+            tracker = RoiTracker(detect, options.frame_size, options.roi_margin, reset=holistic.reset)
+            detect = tracker.process
+
+        if options.motion_gate_area > 0:
+            # 靜止畫面不推論，放在 ROI 追蹤之前，略過的影格也不會改變追蹤區域
+            gate = MotionGate(detect, options.motion_gate_area, options.motion_gate_pixel,
+                              options.motion_gate_max_skip)
+            detect = gate.process
+
+        def infer(img):
+            return img, detect(img)
+
+        def resize(item):
+            img, landmarks = item
+            return cv2.resize(img, options.frame_size), landmarks
+
+        def record(item):
+            nonlocal output_index
+            img, landmarks = item
+            if landmark_sink is not None:
+                landmark_sink.append(landmarks)
+            if writer is not None:
+                writer.append(landmarks)
+            if thumbnails.wants_output:
+                thumbnails.capture_output(output_index, img, lambda copy: draw_results(copy, landmarks))
+            output_index += 1
+            return item
+
+        def draw(item):
+            img, landmarks = item
+            draw_results(img, landmarks)
+            return img
+
+        if options.sampling:
+            sampler = AdaptiveSampler(detect, options.sample_every, options.motion_threshold,
+                                      options.interpolation_error_bound, options.validate_every)
+            infer = sampler.stage()
+
+        def encode(img):
+            out.write(img)
+            # 讓呼叫端在編碼途中就能處理已寫出的部分（例如邊編碼邊上傳）
+            if on_encoded is not None:
+                on_encoded()
+
+        stages = [("inference", scheduled.stage(infer) if queued else infer)]
+        if tracker is not None:
+            stages.append(("resize", resize))
+        stages.append(("landmarks", record))
+        if out is not None:
+            stages += [("draw", draw), ("encode", encode)]
+        frames = read_frames(cap, start_frame, end_frame, None if tracker is not None else options.frame_size,
+                             on_frame=thumbnails.capture_original)
+        try:
+            if options.pipelined:
+                run_pipelined(frames, stages, timings, observe=observe)
+            else:
+                run_serial(frames, stages, timings, observe=observe)
+        finally:
+            cap.release()
+            if out is not None:
+                encoded = out.release()
+            if writer is not None:
+                writer.close()
+            if scheduled is not None:
+                scheduled.close()
+
+    # 分段處理時縮圖列由 process_video_segmented 合併各段擷取的影格後寫出
+    whole_video = start_frame == 0 and end_frame is None
+    if whole_video:
+        thumbnails.write_sprites()
+
+    if stats is not None:
+        elapsed = time.perf_counter() - started
+        frame_total = timings[stages[-1][0]]["frames"]
+        stats["frames"] = frame_total
+        stats["seconds"] = elapsed
+        stats["fps"] = frame_total / elapsed if elapsed else 0.0
+        stats["stages"] = timings
+        stats["bottleneck"] = bottleneck(timings)
+        stats["thumbnails"] = thumbnails.written
+        if thumbnails.sprite is not None:
+            stats["sprite"] = thumbnails.sprite
+        if not whole_video and thumbnails.tiles:
+            stats["sprite_tiles"] = thumbnails.tiles
+        if sampler is not None:
+            stats["sampling"] = sampler.summary()
+        if tracker is not None:
+            stats["roi"] = tracker.summary()
+        if gate is not None:
+            stats["motion_gate"] = gate.summary()
+        if scheduled is not None:
+            stats["scheduler"] = scheduled.summary()
+    return encoded
@@ -0,0 +1,25 @@
+import cv2
+
+from utils.encode import create_writer
+from utils.landmarks import load_landmarks, iter_landmarks
+from utils.pose import draw_results, read_frames, ProcessOptions
+
+
+def render_overlay(video_path, landmarks_path, output_path, options=None):
+    options = options or ProcessOptions()
+    data = load_landmarks(landmarks_path)
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print("Cannot open video")
+        return False
+
+    size = tuple(int(value) for value in data["frame_size"])
+    out = create_writer(output_path, float(data["fps"]), size, options.encoder, options.encoder_preset,
+                        options.encoder_crf)
+    # 關鍵點已事先算好，這裡只需解碼、繪圖與編碼
+    for landmarks, img in zip(iter_landmarks(data), read_frames(cap, size=size)):
+        draw_results(img, landmarks)
+        out.write(img)
+    cap.release()
+    return out.release()
+
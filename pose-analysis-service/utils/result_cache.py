@@ -0,0 +1,62 @@
+import dataclasses
+import hashlib
+import json
+import threading
+
+# 處理流程改變而使舊結果不再適用時遞增，讓既有索引自動失效
+CACHE_VERSION = 2
+# 不影響輸出內容的參數不列入快取鍵
+IGNORED_OPTIONS = ("pipelined",)
+
+
+def new_content_hash():
+    return hashlib.sha256()
+
+
+def options_key(options):
+    params = {name: value for name, value in dataclasses.asdict(options).items() if name not in IGNORED_OPTIONS}
+    encoded = json.dumps({"version": CACHE_VERSION, "options": params}, sort_keys=True)
+    return hashlib.sha256(encoded.encode()).hexdigest()[:16]
+
+
+class ResultCache:
+    # 以「影片內容雜湊 + 處理參數」為鍵記錄已處理的結果物件，索引存放在獨立的 bucket；
+    # 命中時以 ETag 確認物件仍存在且未被同名上傳覆寫
+    def __init__(self, storage, bucket):
+        self.storage = storage
+        self.bucket = bucket
+        # 相同內容正在處理中時，重複上傳直接沿用同一個工作
+        self.inflight = {}
+        self.lock = threading.Lock()
+
+    def key(self, content_hash, options):
+        return f"{content_hash}/{options_key(options)}.json"
+
+    def lookup(self, key):
+        try:
+            data = self.storage.get_resource(self.bucket, key)
+            try:
+                entry = json.loads(data.read())
+            finally:
+                data.close()
+                data.release_conn()
+        except Exception as exc:
+            if getattr(exc, "code", None) not in ("NoSuchKey", "NoSuchBucket"):
+                print("Failed to read result index:", exc)
+            return None
+        for location, etag in entry["etags"].items():
+            bucket, name = location.split(":", 1)
+            if self.storage.get_etag(bucket, name) != etag:
+                return None
+        return {"output_file": entry["output_file"], "objects": entry["objects"]}
+
+    def store(self, key, result):
+        etags = {}
+        for bucket, names in result["objects"].items():
+            for name in names:
+                etag = self.storage.get_etag(bucket, name)
+                if etag is None:
+                    return False
+                etags[f"{bucket}:{name}"] = etag
+        entry = {"output_file": result["output_file"], "objects": result["objects"], "etags": etags}
+        return self.storage.save_bytes(self.bucket, key, json.dumps(entry).encode(), "application/json")
@@ -0,0 +1,127 @@
+import cv2
+import numpy as np
+
+from utils.landmarks import FrameLandmarks
+
+# 裁切範圍佔整張影格超過此比例時直接使用整張影格，省下的成本有限
+FULL_FRAME_RATIO = 0.8
+MIN_CROP_SIZE = 64
+
+
+def pose_bounds(landmarks):
+    # 以正規化座標回傳 (x0, y0, x1, y1)；被遮住的關鍵點也有估計位置，一併納入才能涵蓋整個人
+    if landmarks.pose is None:
+        return None
+    points = landmarks.pose[:, :2]
+    if landmarks.face is not None:
+        points = np.concatenate([points, landmarks.face[:, :2]])
+    x0, y0 = np.clip(points.min(axis=0), 0.0, 1.0)
+    x1, y1 = np.clip(points.max(axis=0), 0.0, 1.0)
+    return float(x0), float(y0), float(x1), float(y1)
+
+
+def map_to_frame(landmarks, region, frame_shape):
+    # 裁切區域內的正規化座標換算回整張影格；z 與 x 同樣以寬度為尺度
+    x0, y0, x1, y1 = region
+    height, width = frame_shape[:2]
+    scale = np.array([(x1 - x0) / width, (y1 - y0) / height, (x1 - x0) / width], dtype=np.float32)
+    offset = np.array([x0 / width, y0 / height, 0.0], dtype=np.float32)
+
+    def convert(points):
+        if points is None:
+            return None
+        mapped = points.copy()
+        mapped[:, :3] = points[:, :3] * scale + offset
+        return mapped
+
+    return FrameLandmarks(pose=convert(landmarks.pose), face=convert(landmarks.face), inferred=landmarks.inferred)
+
+
+class RoiTracker:
+    # 以前一格的姿勢範圍加上 margin，從原始解析度影格裁切較小的區域推論，關鍵點再換算回整張影格；
+    # 裁切區域內找不到人時同一格改用整張（縮放到 frame_size 的）影格重新偵測。
+    # 姿勢仍在目前區域內時沿用同一個區域，避免區域頻繁移動干擾 MediaPipe 的追蹤
+    def __init__(self, detect, frame_size, margin=0.5, reset=None):
+        self.detect = detect
+        # 輸入區域改變時清除偵測器的追蹤狀態，前一格的正規化座標在新區域中已不適用
+        self.reset = reset
+        self.input_region = None
+        self.frame_size = frame_size
+        self.max_side = max(frame_size)
+        self.margin = margin
+        self.region = None
+        self.frames = 0
+        self.tracked = 0
+        self.lost = 0
+        self.crop_ratio = 0.0
+        self.resets = 0
+
+    def process(self, img):
+        self.frames += 1
+        if self.region is not None:
+            landmarks = self._detect_region(img, self.region)
+            if landmarks.pose is not None:
+                self.tracked += 1
+                self._update(img, landmarks)
+                return landmarks
+            self.lost += 1
+            self.region = None
+        landmarks = self._run(cv2.resize(img, self.frame_size), None)
+        self._update(img, landmarks)
+        return landmarks
+
+    def _detect_region(self, img, region):
+        x0, y0, x1, y1 = region
+        crop = img[y0:y1, x0:x1]
+        longest = max(x1 - x0, y1 - y0)
+        if longest > self.max_side:
+            # 推論模型的輸入本來就很小，過大的裁切先縮小以節省色彩轉換與縮放成本
+            scale = self.max_side / longest
+            crop = cv2.resize(crop, (max(1, round((x1 - x0) * scale)), max(1, round((y1 - y0) * scale))),
+                              interpolation=cv2.INTER_AREA)
+        self.crop_ratio += (x1 - x0) * (y1 - y0) / (img.shape[0] * img.shape[1])
+        return map_to_frame(self._run(crop, region), region, img.shape)
+
+    def _run(self, img, region):
+        if region != self.input_region:
+            if self.reset is not None:
+                self.reset()
+                self.resets += 1
+            self.input_region = region
+        return self.detect(img)
+
+    def _update(self, img, landmarks):
+        bounds = pose_bounds(landmarks)
+        if bounds is None:
+            self.region = None
+            return
+        height, width = img.shape[:2]
+        bx0, by0, bx1, by1 = bounds[0] * width, bounds[1] * height, bounds[2] * width, bounds[3] * height
+        pad = self.margin * max(bx1 - bx0, by1 - by0, MIN_CROP_SIZE)
+        if self.region is not None:
+            x0, y0, x1, y1 = self.region
+            # 碰到影格邊緣的一側不需要保留 margin
+            inside = (max(0, bx0 - pad / 2) >= x0 and max(0, by0 - pad / 2) >= y0
+                      and min(width, bx1 + pad / 2) <= x1 and min(height, by1 + pad / 2) <= y1)
+            wanted = (bx1 - bx0 + 2 * pad) * (by1 - by0 + 2 * pad)
+            # 人仍在區域內且區域沒有比需要的大太多時不移動
+            if inside and (x1 - x0) * (y1 - y0) <= 4 * wanted:
+                return
+        x0 = int(max(0, bx0 - pad))
+        y0 = int(max(0, by0 - pad))
+        x1 = int(min(width, max(bx1 + pad, x0 + MIN_CROP_SIZE)))
+        y1 = int(min(height, max(by1 + pad, y0 + MIN_CROP_SIZE)))
+        if (x1 - x0) * (y1 - y0) > FULL_FRAME_RATIO * width * height:
+            self.region = None
+            return
+        self.region = (x0, y0, x1, y1)
+
+    def summary(self):
+        return {
+            "frames": self.frames,
+            "tracked_frames": self.tracked,
+            "full_frames": self.frames - self.tracked,
+            "lost": self.lost,
+            "resets": self.resets,
+            "mean_crop_ratio": self.crop_ratio / (self.tracked + self.lost) if self.tracked + self.lost else None,
+        }
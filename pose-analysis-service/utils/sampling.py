@@ -0,0 +1,104 @@
+from utils.landmarks import interpolate, pose_error
+from utils.motion import frame_signature, motion_score
+from utils.pipeline import FlatStage
+
+
+class AdaptiveSampler:
+    # 只對關鍵影格做推論，中間影格以前後兩個關鍵影格的關鍵點線性內插。
+    # 關鍵影格間距上限為 max_stride；畫面變化超過 motion_threshold 時提早推論。
+    # 每 validate_every 個區間在中點多做一次推論，量測內插誤差並據此調整間距。
+    def __init__(self, infer, max_stride, motion_threshold=0.0, error_bound=0.02, validate_every=4):
+        self.infer = infer
+        self.max_stride = max(1, max_stride)
+        self.stride = self.max_stride
+        self.motion_threshold = motion_threshold
+        self.error_bound = error_bound
+        self.validate_every = validate_every
+        self.last_key = None
+        self.last_signature = None
+        self.pending = []
+        self.intervals = 0
+        self.frames = 0
+        self.inferred = 0
+        self.errors = []
+
+    def stage(self):
+        return FlatStage(self.process, self.flush)
+
+    def _infer(self, img):
+        self.inferred += 1
+        return self.infer(img)
+
+    def _should_probe(self):
+        if not self.validate_every or self.intervals % self.validate_every:
+            return False
+        return len(self.pending) + 1 == max(1, self.stride // 2)
+
+    def process(self, img):
+        self.frames += 1
+        signature = frame_signature(img) if self.motion_threshold > 0 else None
+        is_key = (self.last_key is None
+                  or len(self.pending) + 1 >= self.stride
+                  or (signature is not None
+                      and motion_score(self.last_signature, signature) > self.motion_threshold))
+        if not is_key:
+            probe = self._infer(img) if self._should_probe() else None
+            self.pending.append((img, probe))
+            return []
+
+        key = self._infer(img)
+        outputs = self._release(key)
+        outputs.append((img, key))
+        self.last_key = key
+        self.last_signature = signature
+        return outputs
+
+    def flush(self):
+        if not self.pending:
+            return []
+        # 影片結尾的影格以最後一格當作關鍵影格，確保每一格都有資料
+        img, probe = self.pending.pop()
+        key = probe if probe is not None else self._infer(img)
+        outputs = self._release(key)
+        outputs.append((img, key))
+        return outputs
+
+    def _release(self, key):
+        outputs = []
+        count = len(self.pending)
+        for index, (img, probe) in enumerate(self.pending):
+            if probe is not None:
+                error = pose_error(probe, interpolate(self.last_key, key, (index + 1) / (count + 1)))
+                if error is not None:
+                    self._adapt(error)
+                outputs.append((img, probe))
+            else:
+                outputs.append((img, interpolate(self.last_key, key, (index + 1) / (count + 1))))
+        self.pending = []
+        self.intervals += 1
+        if self.stride == 1 and self.max_stride > 1 and self.validate_every \
+                and self.intervals % (self.validate_every * 4) == 0:
+            # 間距為 1 時沒有中間影格可驗證，定期放寬一次重新量測誤差
+            self.stride = 2
+        return outputs
+
+    def _adapt(self, error):
+        self.errors.append(error)
+        if error > self.error_bound:
+            self.stride = max(1, self.stride // 2)
+        elif error < self.error_bound / 2:
+            self.stride = min(self.max_stride, self.stride + 1)
+
+    def summary(self):
+        return {
+            "frames": self.frames,
+            "inference_frames": self.inferred,
+            "inference_ratio": self.inferred / self.frames if self.frames else 1.0,
+            "stride": self.stride,
+            "interpolation_error": {
+                "bound": self.error_bound,
+                "samples": len(self.errors),
+                "mean": sum(self.errors) / len(self.errors) if self.errors else None,
+                "max": max(self.errors) if self.errors else None,
+            },
+        }
@@ -0,0 +1,159 @@
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from utils.pipeline import FlatStage
+
+POLICIES = ("round_robin", "weighted")
+# weighted 模式下短片最多可獲得的權重倍數
+MAX_WEIGHT = 8.0
+
+
+class ScheduledJob:
+    def __init__(self, scheduler, order, weight, max_concurrency, start_pass):
+        self.scheduler = scheduler
+        self.order = order
+        self.weight = weight
+        self.max_concurrency = max_concurrency
+        # stride scheduling 的虛擬時間：每派送一格增加 1/weight，值最小者優先
+        self.pass_value = start_pass
+        self.queue = deque()
+        self.running = 0
+        self.pending = 0
+        self.frames = 0
+        self.wait_seconds = 0.0
+
+    def submit(self, fn, *args):
+        return self.scheduler._submit(self, fn, args)
+
+    def run(self, fn, *args):
+        return self.submit(fn, *args).result()
+
+    def stage(self, fn):
+        # 逐格送出 fn(item)，保留最多 job_queue 格排隊，結果依送出順序交給下一階段；
+        # 每個工作都有影格排隊時，排程器才能在工作之間輪流並以 max_in_flight 限制總數
+        pending = deque()
+
+        def process(item):
+            pending.append(self.submit(fn, item))
+            if len(pending) < self.scheduler.job_queue:
+                return ()
+            return (pending.popleft().result(),)
+
+        def flush():
+            results = [future.result() for future in pending]
+            pending.clear()
+            return results
+
+        return FlatStage(process, flush)
+
+    def close(self):
+        self.scheduler._unregister(self)
+
+    def summary(self):
+        return {
+            "weight": self.weight,
+            "frames": self.frames,
+            "queue_wait_seconds": self.wait_seconds,
+        }
+
+
+class FrameScheduler:
+    # 集中排程所有進行中工作的推論：固定數量的推論執行緒輪流從各工作取出影格，
+    # 同一工作同時最多 max_concurrency 格（Holistic 有追蹤狀態，預設 1），每個工作最多 job_queue 格排隊，
+    # 全部工作排隊與執行中的影格總數不超過 max_in_flight
+    def __init__(self, workers, max_in_flight=0, policy="round_robin", reference_frames=900, job_queue=4):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown scheduling policy: {policy}")
+        self.policy = policy
+        self.reference_frames = reference_frames
+        self.max_in_flight = max(1, max_in_flight or workers * 4)
+        self.job_queue = max(1, job_queue)
+        self.in_flight = 0
+        # 還沒有影格排隊、正等待名額的工作數；這些工作優先取得名額，新加入的短片不會被長片的排隊擋住
+        self.starved = 0
+        self.jobs = []
+        self.order = itertools.count()
+        self.cond = threading.Condition()
+        self.threads = [threading.Thread(target=self._worker, name=f"inference-{index}", daemon=True)
+                        for index in range(max(1, workers))]
+        for thread in self.threads:
+            thread.start()
+
+    def weight_for(self, frames):
+        # weighted：越短的影片權重越高，短片不會被長片拖住
+        if self.policy != "weighted" or not frames:
+            return 1.0
+        return min(MAX_WEIGHT, max(1.0, self.reference_frames / frames))
+
+    def register(self, frames=0, max_concurrency=1, weight=None):
+        with self.cond:
+            # 新工作從目前最小的虛擬時間開始，不會因為較晚加入而累積大量額度
+            start_pass = min((job.pass_value for job in self.jobs), default=0.0)
+            job = ScheduledJob(self, next(self.order), weight or self.weight_for(frames), max_concurrency, start_pass)
+            self.jobs.append(job)
+            return job
+
+    def _unregister(self, job):
+        with self.cond:
+            if job in self.jobs:
+                self.jobs.remove(job)
+            # 工作中止時尚未派送的影格不再執行
+            while job.queue:
+                job.queue.popleft()[2].cancel()
+                job.pending -= 1
+                self.in_flight -= 1
+            self.cond.notify_all()
+            # 等執行中的影格結束，呼叫端之後才能重設或歸還模型
+            while job.running:
+                self.cond.wait()
+
+    def _submit(self, job, fn, args):
+        future = Future()
+        with self.cond:
+            if job.pending == 0:
+                self.starved += 1
+                while self.in_flight >= self.max_in_flight:
+                    self.cond.wait()
+                self.starved -= 1
+            else:
+                while self.in_flight + self.starved >= self.max_in_flight:
+                    self.cond.wait()
+            job.queue.append((fn, args, future, time.perf_counter()))
+            job.pending += 1
+            self.in_flight += 1
+            self.cond.notify_all()
+        return future
+
+    def _pick(self):
+        candidates = [job for job in self.jobs if job.queue and job.running < job.max_concurrency]
+        if not candidates:
+            return None
+        job = min(candidates, key=lambda item: (item.pass_value, item.order))
+        job.pass_value += 1.0 / job.weight
+        job.running += 1
+        fn, args, future, queued_at = job.queue.popleft()
+        job.wait_seconds += time.perf_counter() - queued_at
+        return job, fn, args, future
+
+    def _worker(self):
+        while True:
+            with self.cond:
+                picked = self._pick()
+                while picked is None:
+                    self.cond.wait()
+                    picked = self._pick()
+            job, fn, args, future = picked
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                except BaseException as exc:
+                    future.set_exception(exc)
+            with self.cond:
+                job.running -= 1
+                job.pending -= 1
+                job.frames += 1
+                self.in_flight -= 1
+                self.cond.notify_all()
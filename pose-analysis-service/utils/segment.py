@@ -0,0 +1,347 @@
+import argparse
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import cv2
+import numpy as np
+
+from utils.pipeline import bottleneck
+from utils.model_pool import WARMUP_FRAME
+from utils.landmarks import LANDMARK_FILE_EXTENSION, concat_landmark_files
+from utils.env import get_env_pose_detector
+from utils.encode import create_writer
+from utils.thumbnails import write_sprite
+from utils.pose import process_video, create_detector, output_fps, ProcessOptions
+
+_pool = None
+_pool_lock = threading.Lock()
+# 每個工作行程各自保留一個服務預設等級、已暖機的偵測器，段落之間重設追蹤狀態
+_worker_holistic = None
+_worker_tier = None
+
+
+def _init_worker():
+    global _worker_holistic, _worker_tier
+    _worker_tier = get_env_pose_detector()
+    _worker_holistic = create_detector(_worker_tier)
+    _worker_holistic.process(WARMUP_FRAME)
+
+
+def _get_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # 使用 spawn 避免在已有執行緒的 Flask 行程中 fork
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=_init_worker)
+        return _pool
+
+
+def _ping():
+    return _worker_holistic is not None
+
+
+def warm_pool(workers):
+    pool = _get_pool(workers)
+    return all(future.result() for future in [pool.submit(_ping) for _ in range(workers)])
+
+
+def count_frames(input_path):
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        return 0
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return frame_count
+
+
+def split_segments(frame_count, segments, min_frames):
+    segments = max(1, min(segments, frame_count // max(min_frames, 1)))
+    bounds = [frame_count * i // segments for i in range(segments + 1)]
+    # 最後一段讀到檔尾，避免容器回報的影格數不準時漏掉結尾
+    ranges = [(bounds[i], bounds[i + 1]) for i in range(segments)]
+    ranges[-1] = (ranges[-1][0], None)
+    return ranges
+
+
+def join_segments(segment_paths, output_path, options=None):
+    # 回傳合併方式："copy" 為 ffmpeg 直接串接（不重新編碼），"reencode" 為解碼後重新編碼；失敗時回傳 None
+    if shutil.which("ffmpeg"):
+        list_path = output_path + ".segments.txt"
+        with open(list_path, "w") as list_file:
+            for path in segment_paths:
+                list_file.write(f"file '{os.path.abspath(path)}'\n")
+        try:
+            result = subprocess.run(
+                ["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                 "-i", list_path, "-c", "copy", output_path],
+                capture_output=True)
+            if result.returncode == 0:
+                return "copy"
+            print("ffmpeg concat failed, re-encoding segments:", result.stderr.decode(errors="ignore"))
+        finally:
+            os.remove(list_path)
+    return "reencode" if reencode_segments(segment_paths, output_path, options) else None
+
+
+def reencode_segments(segment_paths, output_path, options=None):
+    # 各段的 fps 與尺寸相同（皆由同一來源影片決定），以第一段為準重新編碼
+    options = options or ProcessOptions()
+    cap = cv2.VideoCapture(segment_paths[0])
+    fps = output_fps(cap)
+    frame_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    cap.release()
+    out = create_writer(output_path, fps, frame_size, options.encoder, options.encoder_preset, options.encoder_crf)
+    for path in segment_paths:
+        cap = cv2.VideoCapture(path)
+        while True:
+            ret, img = cap.read()
+            if not ret:
+                break
+            out.write(img)
+        cap.release()
+    return out.release()
+
+
+def _process_segment(input_path, output_path, options, start_frame, end_frame, source, thumbnail_paths):
+    stats = {}
+    # 要求的等級與預先暖機的不同時，由 process_video 另行建立
+    holistic = _worker_holistic if options.detector == _worker_tier else None
+    try:
+        if not process_video(input_path, output_path, options, start_frame, end_frame, stats=stats,
+                             holistic=holistic, landmarks_path=output_path + LANDMARK_FILE_EXTENSION,
+                             source=source, original_thumbnail_path=thumbnail_paths[0],
+                             output_thumbnail_path=thumbnail_paths[1]):
+            return None
+    finally:
+        if holistic is not None:
+            holistic.reset()
+            holistic.process(WARMUP_FRAME)
+    return stats
+
+
+def _report_thumbnails(future, on_thumbnail):
+    # 每段完成時就回報該段的縮圖，不必等所有段落結束
+    if future.cancelled() or future.exception() is not None or not future.result():
+        return
+    for path in future.result()["thumbnails"]:
+        on_thumbnail(path)
+
+
+def _write_sprites(segment_stats, on_thumbnail):
+    # 各段擷取自己範圍內的縮圖列影格，合併後寫出整支影片的縮圖列
+    tiles = {}
+    for item in segment_stats:
+        for path, frames in item.get("sprite_tiles", {}).items():
+            tiles.setdefault(path, {}).update(frames)
+    written = {}
+    for path, frames in tiles.items():
+        layout = write_sprite(path, frames)
+        if layout is not None:
+            written[path] = layout
+            if on_thumbnail is not None:
+                on_thumbnail(path)
+    return written
+
+
+def _merge_stage_timings(segment_stats):
+    timings = {}
+    for stats in segment_stats:
+        for name, timing in stats["stages"].items():
+            merged = timings.setdefault(name, {"frames": 0, "busy_seconds": 0.0, "wait_seconds": 0.0})
+            for key in merged:
+                merged[key] += timing[key]
+    return timings
+
+
+def _merge_sampling(segment_stats):
+    summaries = [stats["sampling"] for stats in segment_stats if "sampling" in stats]
+    if not summaries:
+        return None
+    frames = sum(item["frames"] for item in summaries)
+    inferred = sum(item["inference_frames"] for item in summaries)
+    samples = sum(item["interpolation_error"]["samples"] for item in summaries)
+    means = [item["interpolation_error"]["mean"] * item["interpolation_error"]["samples"]
+             for item in summaries if item["interpolation_error"]["samples"]]
+    maxima = [item["interpolation_error"]["max"] for item in summaries if item["interpolation_error"]["samples"]]
+    return {
+        "frames": frames,
+        "inference_frames": inferred,
+        "inference_ratio": inferred / frames if frames else 1.0,
+        "stride": min(item["stride"] for item in summaries),
+        "interpolation_error": {
+            "bound": summaries[0]["interpolation_error"]["bound"],
+            "samples": samples,
+            "mean": sum(means) / samples if samples else None,
+            "max": max(maxima) if maxima else None,
+        },
+    }
+
+
+def _merge_roi(segment_stats):
+    summaries = [stats["roi"] for stats in segment_stats if "roi" in stats]
+    if not summaries:
+        return None
+    attempts = sum(item["tracked_frames"] + item["lost"] for item in summaries)
+    ratios = sum(item["mean_crop_ratio"] * (item["tracked_frames"] + item["lost"])
+                 for item in summaries if item["mean_crop_ratio"] is not None)
+    return {
+        "frames": sum(item["frames"] for item in summaries),
+        "tracked_frames": sum(item["tracked_frames"] for item in summaries),
+        "full_frames": sum(item["full_frames"] for item in summaries),
+        "lost": sum(item["lost"] for item in summaries),
+        "mean_crop_ratio": ratios / attempts if attempts else None,
+    }
+
+
+def _merge_motion_gate(segment_stats):
+    summaries = [stats["motion_gate"] for stats in segment_stats if "motion_gate" in stats]
+    if not summaries:
+        return None
+    merged = {name: sum(item[name] for item in summaries)
+              for name in ("frames", "inference_frames", "skipped_frames", "skipped_no_subject")}
+    merged["skip_ratio"] = merged["skipped_frames"] / merged["frames"] if merged["frames"] else 0.0
+    return merged
+
+
+def process_video_segmented(input_path, output_path, segments, min_frames=60, options=None, stats=None,
+                            acquire_holistic=None, landmarks_path=None, source=None,
+                            original_thumbnail_path=None, output_thumbnail_path=None, on_thumbnail=None,
+                            on_encoded=None, scheduler=None, observe=None):
+    # 多段時結果影片在最後才合併、推論在子行程中進行，on_encoded、scheduler 與 observe 只在單段時有作用；
+    # acquire_holistic（例如模型池的 acquire）也只在單段時呼叫，多段時不佔用本行程的模型
+    options = options or ProcessOptions()
+    frame_count = count_frames(input_path)
+    if frame_count <= 0:
+        print("Cannot open video")
+        return False
+    ranges = split_segments(frame_count, segments, min_frames)
+    if len(ranges) == 1:
+        with acquire_holistic() if acquire_holistic is not None else nullcontext() as holistic:
+            return process_video(input_path, output_path, options, stats=stats, holistic=holistic,
+                                 landmarks_path=landmarks_path, source=source,
+                                 original_thumbnail_path=original_thumbnail_path,
+                                 output_thumbnail_path=output_thumbnail_path, on_thumbnail=on_thumbnail,
+                                 on_encoded=on_encoded, scheduler=scheduler, observe=observe)
+
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path or landmarks_path or "") or None) as work_dir:
+        segment_paths = [os.path.join(work_dir, f"segment_{i:03d}.mp4") for i in range(len(ranges))]
+        pool = _get_pool(segments)
+        thumbnail_paths = (original_thumbnail_path, output_thumbnail_path)
+        futures = [pool.submit(_process_segment, input_path, path, options, start, end, source, thumbnail_paths)
+                   for path, (start, end) in zip(segment_paths, ranges)]
+        if on_thumbnail is not None:
+            for future in futures:
+                future.add_done_callback(lambda done: _report_thumbnails(done, on_thumbnail))
+        segment_stats = [future.result() for future in futures]
+        if not all(segment_stats):
+            return False
+        joined = join_segments(segment_paths, output_path, options) if options.writes_video else None
+        if options.writes_video and joined is None:
+            return False
+        if options.writes_landmarks and landmarks_path:
+            concat_landmark_files([path + LANDMARK_FILE_EXTENSION for path in segment_paths], landmarks_path)
+    sprites = _write_sprites(segment_stats, on_thumbnail)
+
+    if stats is not None:
+        elapsed = time.perf_counter() - started
+        timings = _merge_stage_timings(segment_stats)
+        stats["frames"] = sum(item["frames"] for item in segment_stats)
+        stats["seconds"] = elapsed
+        stats["fps"] = stats["frames"] / elapsed if elapsed else 0.0
+        stats["stages"] = timings
+        stats["bottleneck"] = bottleneck(timings)
+        stats["segments"] = len(ranges)
+        if joined is not None:
+            stats["join"] = joined
+        stats["thumbnails"] = [path for item in segment_stats for path in item["thumbnails"]] + list(sprites)
+        if sprites:
+            stats["sprite"] = next(iter(sprites.values()))
+        sampling = _merge_sampling(segment_stats)
+        if sampling is not None:
+            stats["sampling"] = sampling
+        roi = _merge_roi(segment_stats)
+        if roi is not None:
+            stats["roi"] = roi
+        motion_gate = _merge_motion_gate(segment_stats)
+        if motion_gate is not None:
+            stats["motion_gate"] = motion_gate
+    return True
+
+
+# 每段都以新的 Holistic 開始，追蹤狀態與連續處理不同，之後各格的關鍵點（尤其畫面外、低可見度的點）
+# 也不會完全收斂，繪製結果的平均像素差約 2～3；影格錯位一格時約 9 以上。因此以每格平均像素差的容許值判斷，而非逐位元相同
+VERIFY_TOLERANCE = 5.0
+
+
+def compare_videos(expected_path, actual_path):
+    expected = cv2.VideoCapture(expected_path)
+    actual = cv2.VideoCapture(actual_path)
+    frames = 0
+    diffs = []
+    while True:
+        ret_expected, img_expected = expected.read()
+        ret_actual, img_actual = actual.read()
+        if ret_expected != ret_actual:
+            expected.release()
+            actual.release()
+            return {"frames_match": False, "frames": frames, "mean_diff": None, "max_diff": None}
+        if not ret_expected:
+            break
+        frames += 1
+        diffs.append(float(np.mean(cv2.absdiff(img_expected, img_actual))))
+    expected.release()
+    actual.release()
+    return {
+        "frames_match": True,
+        "frames": frames,
+        "mean_diff": float(np.mean(diffs)) if diffs else 0.0,
+        "max_diff": max(diffs) if diffs else 0.0,
+    }
+
+
+def verify_segmented(input_path, segments, tolerance=VERIFY_TOLERANCE, min_frames=60):
+    with tempfile.TemporaryDirectory() as work_dir:
+        serial_path = os.path.join(work_dir, "serial.mp4")
+        parallel_path = os.path.join(work_dir, "parallel.mp4")
+
+        started = time.perf_counter()
+        process_video(input_path, serial_path)
+        serial_time = time.perf_counter() - started
+
+        stats = {}
+        started = time.perf_counter()
+        process_video_segmented(input_path, parallel_path, segments, min_frames, stats=stats)
+        parallel_time = time.perf_counter() - started
+
+        if stats.get("join") == "reencode":
+            # 沒有 ffmpeg 時合併會再編碼一次，序列處理的結果也經過同樣的重新編碼，只比較分段本身造成的差異
+            reencoded_path = os.path.join(work_dir, "serial-reencoded.mp4")
+            reencode_segments([serial_path], reencoded_path)
+            serial_path = reencoded_path
+        report = compare_videos(serial_path, parallel_path)
+    report["join"] = stats.get("join")
+    report["serial_seconds"] = serial_time
+    report["parallel_seconds"] = parallel_time
+    report["speedup"] = serial_time / parallel_time if parallel_time else None
+    report["ok"] = report["frames_match"] and report["max_diff"] <= tolerance
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare segmented and serial process_video output")
+    parser.add_argument("input")
+    parser.add_argument("--segments", type=int, default=os.cpu_count())
+    parser.add_argument("--tolerance", type=float, default=VERIFY_TOLERANCE)
+    parser.add_argument("--min-frames", type=int, default=60)
+    args = parser.parse_args()
+    print(verify_segmented(args.input, args.segments, args.tolerance, args.min_frames))
@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Entry:
+    __slots__ = ("refs", "stored", "etag", "size", "accessed")
+
+    def __init__(self, accessed):
+        self.refs = 0
+        self.stored = False
+        self.etag = None
+        self.size = 0
+        self.accessed = accessed
+
+
+class LocalSpool:
+    # 管理 uploads/、results/ 下的本機檔案，讓磁碟用量有上限：
+    # - 使用中（refs > 0）的檔案不會被刪除
+    # - 已寫入 MinIO 且記有 ETag 的檔案保留為下載的讀取快取，依最近存取順序（LRU）在總量超過 max_bytes
+    #   或超過 max_age 秒未存取時刪除；沒有 ETag 的已保存檔案在無人使用後直接刪除
+    # - 未寫入 MinIO 且無人使用的檔案（處理失敗、佇列已滿）超過 max_age 秒後刪除，in_use(path) 為真者除外
+    def __init__(self, max_bytes, max_age, in_use=None, interval=60.0):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.in_use = in_use
+        self.interval = interval
+        # 依最近存取排序，最前面最久未使用
+        self.entries = OrderedDict()
+        self.total = 0
+        self.hits = 0
+        self.evicted = 0
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="spool-evict", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+
+    def tracks(self, path):
+        with self.lock:
+            return os.path.normpath(path) in self.entries
+
+    def track(self, path, replace=True):
+        # 即將寫入（replace）或正在讀取的檔案；每次 track 需對應一次 release
+        path = os.path.normpath(path)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None:
+                entry = self.entries[path] = _Entry(time.time())
+            entry.refs += 1
+            if replace:
+                # 同名檔案會被改寫，先前寫入 MinIO 的版本不再代表本機內容
+                entry.stored = False
+                entry.etag = None
+            self.entries.move_to_end(path)
+
+    def release(self, path):
+        path = os.path.normpath(path)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None:
+                return
+            entry.refs = max(0, entry.refs - 1)
+            entry.accessed = time.time()
+            self.entries.move_to_end(path)
+            if self._measure(path, entry):
+                self._evict()
+
+    def stored(self, path, etag=None):
+        # 檔案內容已安全寫入 MinIO；etag 為 MinIO 上的版本，之後下載時用來確認本機副本仍然相同
+        path = os.path.normpath(path)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None:
+                return
+            entry.stored = True
+            entry.etag = etag
+            if self._measure(path, entry):
+                self._evict()
+
+    def adopt(self, path, stored, etag=None, accessed=None):
+        # 登記既有的檔案（例如前次執行留下的），已在追蹤中的不變
+        path = os.path.normpath(path)
+        with self.lock:
+            if path in self.entries:
+                return
+            entry = self.entries[path] = _Entry(time.time() if accessed is None else accessed)
+            entry.stored = stored
+            entry.etag = etag
+            if self._measure(path, entry):
+                self._evict()
+
+    def discard(self, path):
+        path = os.path.normpath(path)
+        with self.lock:
+            entry = self.entries.pop(path, None)
+            if entry is not None:
+                self.total -= entry.size
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def open(self, path, etag):
+        # 本機副本與 MinIO 目前的版本相同時開啟供下載；在鎖內開啟，之後被逐出也不影響已開啟的檔案
+        path = os.path.normpath(path)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None or not entry.stored or entry.etag is None or entry.etag != etag:
+                return None
+            try:
+                data = open(path, "rb")
+            except OSError:
+                self._drop(path, entry)
+                return None
+            entry.accessed = time.time()
+            self.entries.move_to_end(path)
+            self.hits += 1
+            return data
+
+    def evict(self):
+        with self.lock:
+            self._evict()
+
+    def _measure(self, path, entry):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            # 檔案從未產生或已被移除
+            self._drop(path, entry)
+            return False
+        self.total += size - entry.size
+        entry.size = size
+        return True
+
+    def _drop(self, path, entry):
+        if self.entries.pop(path, None) is not None:
+            self.total -= entry.size
+
+    def _evict(self):
+        now = time.time()
+        for path, entry in list(self.entries.items()):
+            if entry.refs:
+                continue
+            if entry.stored:
+                expired = entry.etag is None or self.total > self.max_bytes or now - entry.accessed > self.max_age
+            else:
+                expired = now - entry.accessed > self.max_age and not (self.in_use and self.in_use(path))
+            if expired:
+                self._drop(path, entry)
+                self.evicted += 1
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as exc:
+                    print("Failed to remove spooled file:", path, exc)
+
+    def _run(self):
+        # 依存取時間逾時的檔案不會觸發其他事件，定期檢查
+        while not self.stop_event.wait(self.interval):
+            self.evict()
@@ -0,0 +1,135 @@
+import cv2
+import numpy as np
+
+WEBP_QUALITY = 80
+# WebP 單邊的像素上限，限制縮圖列的格數
+MAX_WEBP_SIZE = 16383
+
+
+def thumbnail_paths(base_path, times, sizes=()):
+    # 第一個時間點沿用 "<影片>-thumbnail.jpg"（前端以此辨識），其餘加上秒數；
+    # sizes 的每個寬度另存一張 WebP，例如 "<影片>-thumbnail-320w.webp"
+    paths = []
+    for index, seconds in enumerate(times):
+        path = base_path if index == 0 else base_path[:-len(".jpg")] + f"-{seconds:g}s.jpg"
+        paths.append(path)
+        paths += [sized_path(path, width) for width in sizes]
+    return paths
+
+
+def sized_path(path, width):
+    return path[:-len(".jpg")] + f"-{width}w.webp"
+
+
+def sprite_path(base_path):
+    return base_path[:-len(".jpg")] + "-sprite.webp"
+
+
+def sprite_frames(frame_count, count):
+    # 在整支影片中平均取 count 格（各區間的中點），作為滑鼠移動時預覽用的縮圖列
+    count = min(count, frame_count)
+    if count <= 0:
+        return []
+    return [int((index + 0.5) * frame_count / count) for index in range(count)]
+
+
+def resize_to_width(img, width):
+    if not width or img.shape[1] <= width:
+        return img
+    height = max(1, round(img.shape[0] * width / img.shape[1]))
+    return cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def write_image(path, img):
+    params = [cv2.IMWRITE_WEBP_QUALITY, WEBP_QUALITY] if path.endswith(".webp") else []
+    return cv2.imwrite(path, img, params)
+
+
+def write_sprite(path, tiles):
+    # tiles 為 影格索引 -> 縮圖，依時間順序水平排成一列；回傳格數與每格尺寸，寫入失敗時回傳 None
+    row = np.hstack([tiles[index] for index in sorted(tiles)])
+    if not write_image(path, row):
+        print("Failed to write sprite:", path)
+        return None
+    height, width = next(iter(tiles.values())).shape[:2]
+    return {"frames": len(tiles), "tile_width": width, "tile_height": height}
+
+
+class ThumbnailCapture:
+    # 在主要處理流程中擷取縮圖與縮圖列，避免為了縮圖再開一次影片解碼
+    def __init__(self, times, fps, width=0, original_path=None, output_path=None, start_frame=0, end_frame=None,
+                 on_written=None, sizes=(), sprite_count=0, sprite_width=160, frame_count=0):
+        self.width = width
+        self.on_written = on_written
+        self.original = {}
+        self.output = {}
+
+        def in_range(frame_index):
+            return frame_index >= start_frame and (end_frame is None or frame_index < end_frame)
+
+        for base_path, targets in ((original_path, self.original), (output_path, self.output)):
+            if not base_path:
+                continue
+            for seconds, path in zip(times, thumbnail_paths(base_path, times)):
+                frame_index = int(round(seconds * fps))
+                if in_range(frame_index):
+                    items = targets.setdefault(frame_index, [])
+                    items.append((path, width))
+                    items += [(sized_path(path, size), size) for size in sizes]
+
+        # 分段處理時每段只擷取自己範圍內的縮圖列影格，由呼叫端合併 tiles 後寫出
+        count = min(sprite_count, MAX_WEBP_SIZE // max(sprite_width, 1))
+        self.sprite_frames = {index for index in sprite_frames(frame_count, count) if in_range(index)}
+        self.sprite_width = sprite_width
+        self.original_sprite = sprite_path(original_path) if original_path and self.sprite_frames else None
+        self.output_sprite = sprite_path(output_path) if output_path and self.sprite_frames else None
+        self.tiles = {}
+        self.sprite = None
+        self.written = []
+
+    @property
+    def wants_output(self):
+        return bool(self.output) or self.output_sprite is not None
+
+    def _write(self, items, img):
+        for path, width in items:
+            if write_image(path, resize_to_width(img, width)):
+                self._written(path)
+            else:
+                print("Failed to write thumbnail:", path)
+
+    def _written(self, path):
+        self.written.append(path)
+        if self.on_written is not None:
+            self.on_written(path)
+
+    def _add_tile(self, path, frame_index, img):
+        tile = resize_to_width(img, self.sprite_width)
+        # 影格之後會被繪圖階段改寫，縮圖列需要自己的副本
+        self.tiles.setdefault(path, {})[frame_index] = tile.copy() if tile is img else tile
+
+    def capture_original(self, frame_index, img):
+        items = self.original.get(frame_index)
+        if items:
+            self._write(items, img)
+        if self.original_sprite is not None and frame_index in self.sprite_frames:
+            self._add_tile(self.original_sprite, frame_index, img)
+
+    def capture_output(self, frame_index, img, draw):
+        items = self.output.get(frame_index)
+        sprite = self.output_sprite is not None and frame_index in self.sprite_frames
+        if items or sprite:
+            img = img.copy()
+            draw(img)
+            if items:
+                self._write(items, img)
+            if sprite:
+                self._add_tile(self.output_sprite, frame_index, img)
+
+    def write_sprites(self):
+        # 處理整支影片時，所有縮圖列影格都已擷取
+        for path, tiles in self.tiles.items():
+            layout = write_sprite(path, tiles)
+            if layout is not None:
+                self.sprite = layout
+                self._written(path)
@@ -0,0 +1,126 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+TRACE_FILE_EXTENSION = "-trace.json"
+PROFILE_FILE_EXTENSION = "-profile.folded"
+# 長片每格每階段一個事件，設上限避免單一工作的時間軸佔用過多記憶體
+MAX_EVENTS = 200000
+# 取樣剖析只記錄這些執行緒（工作執行緒另外指定）
+PROFILED_THREAD_PREFIXES = ("pipeline-", "inference-")
+
+
+class JobTrace:
+    # 記錄單一工作的時間軸（Chrome trace 格式，可用 chrome://tracing 或 Perfetto 開啟）：
+    # 工作各階段、每格各處理階段與 MinIO 寫入的耗時，時間以建立時為 0
+    def __init__(self, name, origin=None, max_events=MAX_EVENTS):
+        self.name = name
+        self.max_events = max_events
+        self.origin = time.perf_counter() if origin is None else origin
+        self.events = []
+        self.dropped = 0
+        self.threads = {}
+        self.lock = threading.Lock()
+
+    def add(self, name, category, started, seconds, args=None):
+        thread = threading.current_thread()
+        with self.lock:
+            # 結束的執行緒 ident 會被重複使用，改以執行緒物件對應遞增編號
+            tid = self.threads.setdefault(thread, len(self.threads) + 1)
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((started - self.origin) * 1e6, 1),
+            "dur": round(seconds * 1e6, 1),
+            "pid": 1,
+            "tid": tid,
+        }
+        if args:
+            event["args"] = args
+        with self.lock:
+            if len(self.events) >= self.max_events:
+                self.dropped += 1
+                return
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name, category="job", **args):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, category, started, time.perf_counter() - started, args)
+
+    def observe_stage(self, stage, seconds):
+        # 由處理管線在每格完成時回報，開始時間由結束時間回推
+        self.add(stage, "frame", time.perf_counter() - seconds, seconds)
+
+    def observe_write(self, operation, bucket, object_name, seconds):
+        self.add(f"minio {operation}", "minio", time.perf_counter() - seconds, seconds,
+                 {"bucket": bucket, "object": object_name})
+
+    def to_json(self, metadata=None):
+        with self.lock:
+            events = list(self.events)
+            names = [{"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": thread.name}}
+                     for thread, tid in self.threads.items()]
+        other = {"job": self.name, "dropped_events": self.dropped}
+        other.update(metadata or {})
+        return json.dumps({"traceEvents": names + events, "displayTimeUnit": "ms", "otherData": other})
+
+    def save(self, path, metadata=None):
+        with open(path, "w") as out:
+            out.write(self.to_json(metadata))
+        return path
+
+
+class StackSampler:
+    # 每 interval 秒擷取工作相關執行緒的 Python 呼叫堆疊，輸出 folded 格式
+    # （speedscope、flamegraph.pl 可直接讀取）。同時有多個工作時，管線執行緒的樣本可能包含其他工作
+    def __init__(self, interval, thread_ident):
+        self.interval = interval
+        self.thread_ident = thread_ident
+        self.stacks = Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+
+    def _profiled(self):
+        idents = {self.thread_ident}
+        for thread in threading.enumerate():
+            if thread.name.startswith(PROFILED_THREAD_PREFIXES):
+                idents.add(thread.ident)
+        return idents
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            idents = self._profiled()
+            for ident, frame in sys._current_frames().items():
+                if ident not in idents:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def save(self, path):
+        with open(path, "w") as out:
+            for stack, count in self.stacks.most_common():
+                out.write(f"{stack} {count}\n")
+        return path
@@ -0,0 +1,169 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+
+JOURNAL_EXTENSION = ".json"
+
+
+class WriteBehindUploader:
+    # 產出物先記錄到本機日誌（每個物件一個 JSON 檔）即返回，背景執行緒再送往物件儲存；
+    # 失敗時以指數退避無限重試，服務重啟後會從日誌接續上傳
+    def __init__(self, storage, journal_dir, workers=4, base_delay=1.0, max_delay=60.0):
+        self.storage = storage
+        self.journal_dir = journal_dir
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        os.makedirs(journal_dir, exist_ok=True)
+        self.entries = {}
+        self.queue = []
+        self.order = itertools.count()
+        self.pending = {}
+        self.cond = threading.Condition()
+        self.stopped = False
+        self._recover()
+        self.threads = [threading.Thread(target=self._worker, name=f"write-behind-{index}", daemon=True)
+                        for index in range(max(1, workers))]
+        for thread in self.threads:
+            thread.start()
+
+    def enqueue(self, items, on_complete=None):
+        # items 為 (bucket, 本機檔名)；全部寫入 MinIO（或確定無法寫入）後以 on_complete(是否全部成功) 通知
+        entries = []
+        for bucket, path in items:
+            entry = {"id": uuid.uuid4().hex, "bucket": bucket, "path": path}
+            self._write_journal(entry)
+            entries.append(entry)
+        self._sync_journal_dir()
+        group = {"remaining": len(entries), "ok": True, "on_complete": on_complete}
+        with self.cond:
+            for entry in entries:
+                entry["group"] = group
+                self._schedule(entry, 0)
+            self.cond.notify_all()
+        if not entries and on_complete is not None:
+            on_complete(True)
+
+    def pending_file(self, bucket, path):
+        with self.cond:
+            return path if self.pending.get((bucket, path)) else None
+
+    def flush(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            while self.entries:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+        return True
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        for thread in self.threads:
+            thread.join()
+
+    def _journal_path(self, entry):
+        return os.path.join(self.journal_dir, entry["id"] + JOURNAL_EXTENSION)
+
+    def _write_journal(self, entry):
+        path = self._journal_path(entry)
+        with open(path + ".tmp", "w") as journal:
+            json.dump({"bucket": entry["bucket"], "path": entry["path"]}, journal)
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(path + ".tmp", path)
+
+    def _sync_journal_dir(self):
+        fd = os.open(self.journal_dir, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _recover(self):
+        for name in sorted(os.listdir(self.journal_dir)):
+            path = os.path.join(self.journal_dir, name)
+            if name.endswith(".tmp"):
+                # 寫到一半的日誌代表 enqueue 尚未返回，呼叫端不會認為已保存
+                os.remove(path)
+                continue
+            if not name.endswith(JOURNAL_EXTENSION):
+                continue
+            try:
+                with open(path) as journal:
+                    entry = json.load(journal)
+            except (OSError, ValueError) as exc:
+                print("Skipping unreadable upload journal entry:", path, exc)
+                continue
+            entry.update(id=name[:-len(JOURNAL_EXTENSION)], group=None)
+            self._schedule(entry, 0)
+        if self.entries:
+            print("Resuming", len(self.entries), "pending uploads from journal")
+
+    def _schedule(self, entry, attempts):
+        entry["attempts"] = attempts
+        if entry["id"] not in self.entries:
+            self.entries[entry["id"]] = entry
+            key = (entry["bucket"], entry["path"])
+            self.pending[key] = self.pending.get(key, 0) + 1
+        delay = 0 if attempts == 0 else min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        heapq.heappush(self.queue, (time.monotonic() + delay, next(self.order), entry["id"]))
+
+    def _next_entry(self):
+        with self.cond:
+            while not self.stopped:
+                if self.queue:
+                    due = self.queue[0][0]
+                    now = time.monotonic()
+                    if due <= now:
+                        return self.entries[heapq.heappop(self.queue)[2]]
+                    self.cond.wait(due - now)
+                else:
+                    self.cond.wait()
+            return None
+
+    def _worker(self):
+        while True:
+            entry = self._next_entry()
+            if entry is None:
+                return
+            if self.storage.save_resource(entry["bucket"], entry["path"]):
+                self._finish(entry, True)
+            elif not os.path.exists(entry["path"]):
+                # 本機檔案已不存在，重試也無法成功
+                print("Dropping upload of missing file:", entry["path"])
+                self._finish(entry, False)
+            else:
+                with self.cond:
+                    self._schedule(entry, entry["attempts"] + 1)
+                    self.cond.notify_all()
+
+    def _finish(self, entry, ok):
+        try:
+            os.remove(self._journal_path(entry))
+        except FileNotFoundError:
+            pass
+        group = entry["group"]
+        done = False
+        with self.cond:
+            del self.entries[entry["id"]]
+            key = (entry["bucket"], entry["path"])
+            self.pending[key] -= 1
+            if not self.pending[key]:
+                del self.pending[key]
+            if group is not None:
+                group["ok"] = group["ok"] and ok
+                group["remaining"] -= 1
+                done = group["remaining"] == 0
+            self.cond.notify_all()
+        if done and group["on_complete"] is not None:
+            try:
+                group["on_complete"](group["ok"])
+            except Exception as exc:
+                print("Upload completion callback failed:", exc)
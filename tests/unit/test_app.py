@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+服務端點測試 - 以 Flask 測試用戶端與記憶體中的本機物件儲存測試上傳流程、查詢參數與範圍下載，不需要 MinIO 與模型
+"""
+
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+
+from prometheus_client import REGISTRY
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+# 服務在匯入時讀取設定：物件存放在記憶體中的本機儲存
+os.environ["POSE_STORAGE_BACKEND"] = "local"
+os.environ["POSE_LOCAL_STORAGE_DIR"] = ""
+os.environ["POSE_RESULT_CACHE"] = "1"
+os.environ["POSE_STREAMING_INGEST"] = "0"
+
+import app as service
+from utils.object_cache import ObjectCache
+from utils.pose import parse_frame_size
+
+MEDIA = bytes(range(256)) * 4
+
+
+@contextmanager
+def work_dir():
+    # uploads/ 等目錄相對於目前目錄
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as path:
+        os.chdir(path)
+        try:
+            yield Path(path)
+        finally:
+            os.chdir(previous)
+
+
+def upload(client, name, data, url="/upload"):
+    return client.post(url, data={"file": (io.BytesIO(data), name)}, content_type="multipart/form-data")
+
+
+def wait_done(client, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/jobs/{job_id}").get_json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"工作逾時: {job_id}")
+
+
+def test_duplicate_upload_keeps_running_file():
+    """測試處理中的影片再次以同名或不同名上傳時，不會覆寫工作正在讀取的檔案"""
+    started = threading.Event()
+    release = threading.Event()
+    seen = []
+
+    def fake_job(filename, upload_path, options, streamed=False, on_stored=None, trace=None):
+        # 代替實際處理：記錄讀到的內容與修改時間，等測試上傳完重複的影片後再檢查一次
+        for _ in range(2):
+            with open(upload_path, "rb") as video:
+                seen.append((video.read(), os.stat(upload_path).st_mtime_ns))
+            started.set()
+            release.wait(5)
+        return {"output_file": f"output_{filename}", "objects": {}}
+
+    original = service.run_upload_job
+    service.run_upload_job = fake_job
+    try:
+        with work_dir() as path:
+            client = service.app.test_client()
+            first = upload(client, "walk.mp4", b"first video")
+            assert first.status_code == 202, f"應接受上傳: {first.status_code}"
+            assert started.wait(5), "工作應開始執行"
+
+            same_name = upload(client, "walk.mp4", b"first video")
+            other_name = upload(client, "copy.mp4", b"first video")
+            for response in (same_name, other_name):
+                assert response.status_code == 202 and response.get_json()["duplicate"], "重複內容應沿用處理中的工作"
+                assert response.get_json()["job_id"] == first.get_json()["job_id"], "應回傳同一個工作"
+            release.set()
+            assert wait_done(client, first.get_json()["job_id"])["status"] == "done", "工作應完成"
+
+            assert seen[0] == seen[1] and seen[0][0] == b"first video", f"處理中的檔案不應被改寫: {seen}"
+            assert sorted(os.listdir(path / "uploads")) == ["walk.mp4"], \
+                f"重複上傳不應留下檔案或暫存檔: {os.listdir(path / 'uploads')}"
+    finally:
+        release.set()
+        service.run_upload_job = original
+
+    print("✅ 重複上傳測試通過")
+    return True
+
+
+def record_write(method, written, bucket_name, object_name, *args, **kwargs):
+    written.append(object_name)
+    return method(bucket_name, object_name, *args, **kwargs)
+
+
+def test_streaming_duplicate_upload():
+    """測試串流上傳時重複的影片不會覆寫工作正在讀取的物件，也不留下暫存物件"""
+    started = threading.Event()
+    release = threading.Event()
+    seen = []
+    store = service.minioClient.minio_client
+
+    def fake_job(filename, upload_path, options, streamed=False, on_stored=None, trace=None):
+        # 串流上傳的原始影片只在 MinIO 中，記錄讀到的內容與 ETag
+        for _ in range(2):
+            stat = service.minioClient.stat_resource("uploads", upload_path)
+            seen.append((service.minioClient.get_resource("uploads", upload_path).read(), stat.etag))
+            started.set()
+            release.wait(5)
+        return {"output_file": f"output_{filename}", "objects": {}}
+
+    original = service.run_upload_job
+    service.run_upload_job = fake_job
+    os.environ["POSE_STREAMING_INGEST"] = "1"
+    try:
+        with work_dir():
+            client = service.app.test_client()
+            first = upload(client, "run.mp4", b"streamed video")
+            assert first.status_code == 202, f"應接受上傳: {first.status_code}"
+            assert started.wait(5), "工作應開始執行"
+
+            written = []
+            for method in ("put_object", "compose_object"):
+                # 記錄重複上傳期間寫入的物件名稱（實例屬性蓋過類別方法，測試結束後刪除）
+                setattr(store, method, partial(record_write, getattr(store, method), written))
+            try:
+                for name in ("run.mp4", "copy.mp4"):
+                    response = upload(client, name, b"streamed video")
+                    assert response.status_code == 202 and response.get_json()["duplicate"], \
+                        "重複內容應沿用處理中的工作"
+                    assert response.get_json()["job_id"] == first.get_json()["job_id"], "應回傳同一個工作"
+            finally:
+                del store.put_object, store.compose_object
+            assert len(written) == 2 and all("/.upload-" in name for name in written), \
+                f"重複上傳只應寫入暫存物件: {written}"
+            release.set()
+            assert wait_done(client, first.get_json()["job_id"])["status"] == "done", "工作應完成"
+
+            assert seen[0] == seen[1] and seen[0][0] == b"streamed video", f"處理中的物件不應被改寫: {seen}"
+            names = sorted(name for name in store.buckets["uploads"] if name.startswith("uploads/"))
+            assert "uploads/copy.mp4" not in names and not any("/.upload-" in name for name in names), \
+                f"重複上傳不應留下物件或暫存物件: {names}"
+            assert store.stat_object("uploads", "uploads/run.mp4").content_type == "video/mp4", "原始影片類型錯誤"
+    finally:
+        release.set()
+        os.environ["POSE_STREAMING_INGEST"] = "0"
+        service.run_upload_job = original
+
+    print("✅ 串流重複上傳測試通過")
+    return True
+
+
+def test_request_options():
+    """測試上傳網址的查詢參數覆寫偵測模型、解析度與 ROI，不合法的值回應 400"""
+    assert parse_frame_size("640x360") == (640, 360) and parse_frame_size("320X184") == (320, 184), "解析度格式錯誤"
+    for value in ("640", "640x", "axb", "640x360x2", "8x8", "4000x2000", "-640x360"):
+        try:
+            parse_frame_size(value)
+            raise AssertionError(f"不合法的解析度應拋出 ValueError: {value}")
+        except ValueError:
+            pass
+
+    with service.app.test_request_context("/upload?detector=pose&resolution=320x184&roi=1"):
+        options = service.request_options()
+    assert (options.detector, options.frame_size, options.roi) == ("pose", (320, 184), True), f"參數錯誤: {options}"
+    with service.app.test_request_context("/upload"):
+        defaults = service.request_options()
+    assert defaults == service.ProcessOptions.from_env(), "沒有查詢參數時應沿用服務預設值"
+
+    with work_dir():
+        client = service.app.test_client()
+        for query in ("detector=yolo", "resolution=huge", "resolution=10x10", "resolution=4000x2000"):
+            response = upload(client, "walk.mp4", b"video", f"/upload?{query}")
+            assert response.status_code == 400 and response.get_json()["error"], f"{query} 應回應 400"
+        assert client.get("/jobs/missing").status_code == 404, "不存在的工作應回應 404"
+
+    print("✅ 查詢參數測試通過")
+    return True
+
+
+def check_ranges(client, url):
+    # 依序檢查完整下載、各種 Range 與條件式請求
+    full = client.get(url)
+    assert full.status_code == 200 and full.data == MEDIA, f"完整下載錯誤: {full.status_code}"
+    assert full.headers["Accept-Ranges"] == "bytes" and full.headers["Content-Length"] == str(len(MEDIA)), \
+        f"標頭錯誤: {full.headers}"
+    assert full.headers["Cache-Control"] == "no-cache", "同名物件可能被改寫，瀏覽器應每次重新確認"
+    etag = full.headers["ETag"]
+
+    for value, start, end in (("bytes=100-199", 100, 200), ("bytes=-24", len(MEDIA) - 24, len(MEDIA)),
+                              ("bytes=1000-", 1000, len(MEDIA)), ("bytes=1000-5000", 1000, len(MEDIA))):
+        response = client.get(url, headers={"Range": value})
+        assert response.status_code == 206, f"{value} 應回應 206: {response.status_code}"
+        assert response.data == MEDIA[start:end], f"{value} 內容錯誤"
+        assert response.headers["Content-Range"] == f"bytes {start}-{end - 1}/{len(MEDIA)}", \
+            f"{value} Content-Range 錯誤: {response.headers.get('Content-Range')}"
+        assert response.headers["Content-Length"] == str(end - start), f"{value} Content-Length 錯誤"
+
+    current = client.get(url, headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert current.status_code == 206 and current.data == MEDIA[:10], "If-Range 與目前版本相同時應回傳範圍"
+    for if_range in ('"stale"', "Mon, 01 Jan 2001 00:00:00 GMT"):
+        stale = client.get(url, headers={"Range": "bytes=0-9", "If-Range": if_range})
+        assert stale.status_code == 200 and stale.data == MEDIA, f"If-Range 過期 ({if_range}) 時應回傳完整內容"
+        assert "Content-Range" not in stale.headers, "完整內容不應有 Content-Range"
+    multiple = client.get(url, headers={"Range": "bytes=0-9,20-29"})
+    assert multiple.status_code == 200 and multiple.data == MEDIA, "多段範圍應回傳完整內容"
+
+    not_modified = client.get(url, headers={"If-None-Match": etag, "Range": "bytes=0-9"})
+    assert not_modified.status_code == 304 and not_modified.data == b"", "ETag 相同時應回應 304"
+    assert not_modified.headers["ETag"] == etag, "304 應帶 ETag"
+    assert client.get(url, headers={"If-None-Match": '"stale"'}).status_code == 200, "ETag 不同時應回傳內容"
+
+    for value in (f"bytes={len(MEDIA)}-", f"bytes={len(MEDIA) + 10}-{len(MEDIA) + 20}"):
+        response = client.get(url, headers={"Range": value})
+        assert response.status_code == 416, f"{value} 應回應 416: {response.status_code}"
+        assert response.headers["Content-Range"] == f"bytes */{len(MEDIA)}", "416 應帶完整長度"
+
+
+def test_download_ranges():
+    """測試下載影片與快取物件時的 Range、If-Range、If-None-Match（304）與無法滿足的範圍（416）"""
+    assert service.minioClient.save_bytes("results", "clip.mp4", MEDIA, "video/mp4"), "寫入影片應成功"
+    assert service.minioClient.save_bytes("results", "thumb.jpg", MEDIA, "image/jpeg"), "寫入縮圖應成功"
+    client = service.app.test_client()
+    # 影片由 MinIO 分段讀取
+    check_ranges(client, "/media/results/file/clip.mp4")
+
+    # 縮圖由記憶體中的物件快取提供
+    original = service.object_cache
+    service.object_cache = ObjectCache(service.minioClient.stat_resource, service.read_object, 1 << 20, 1 << 20)
+    try:
+        check_ranges(client, "/media/results/file/thumb.jpg")
+        assert service.object_cache.total == len(MEDIA), "縮圖應已放入快取"
+
+        # 重新上傳同名影片改寫縮圖：瀏覽器帶舊 ETag 重新確認時應拿到新內容
+        old_etag = client.get("/media/results/file/thumb.jpg").headers["ETag"]
+        assert service.minioClient.save_bytes("results", "thumb.jpg", b"new thumbnail", "image/jpeg"), "改寫應成功"
+        response = client.get("/media/results/file/thumb.jpg", headers={"If-None-Match": old_etag})
+        assert response.status_code == 200 and response.data == b"new thumbnail", "改寫後應回傳新內容"
+        assert response.headers["ETag"] != old_etag, "改寫後 ETag 應不同"
+    finally:
+        service.object_cache = original
+
+    assert client.get("/media/results/file/missing.mp4").status_code == 404, "不存在的檔案應回應 404"
+
+    print("✅ 範圍下載測試通過")
+    return True
+
+
+def test_render_on_demand():
+    """測試只有關鍵點的結果影片在背景繪製：請求立即回應 202，重複請求沿用同一個工作，完成後可下載"""
+    gate = threading.Event()
+    calls = []
+
+    def fake_render(source, landmarks_path, output_path, options):
+        # 代替實際繪製：等測試確認請求沒有被卡住後才寫出影片
+        calls.append(source)
+        gate.wait(5)
+        Path(output_path).write_bytes(MEDIA)
+        return True
+
+    originals = service.render_overlay, service.load_landmarks
+    service.render_overlay = fake_render
+    service.load_landmarks = lambda path: {"source": "uploads/render.mp4"}
+    try:
+        with work_dir():
+            assert service.minioClient.save_bytes("uploads", "uploads/render.mp4", b"source video"), "寫入原始影片應成功"
+            assert service.minioClient.save_bytes("results", "results/output_render.mp4-landmarks.npz", b"npz"), \
+                "寫入關鍵點檔應成功"
+            client = service.app.test_client()
+            url = "/media/results/file/results/output_render.mp4"
+            first = client.get(url)
+            assert first.status_code == 202 and first.headers["Retry-After"], f"繪製中應回應 202: {first.status_code}"
+            again = client.get(url, headers={"Range": "bytes=0-0"})
+            assert again.status_code == 202 and again.get_json()["job_id"] == first.get_json()["job_id"], \
+                "繪製中再次請求應沿用同一個工作"
+            gate.set()
+            assert wait_done(client, first.get_json()["job_id"])["status"] == "done", "繪製工作應完成"
+
+            done = client.get(url)
+            assert done.status_code == 200 and done.data == MEDIA, f"繪製後應可下載: {done.status_code}"
+            assert calls == ["uploads/render.mp4"], f"應只繪製一次: {calls}"
+            assert client.get("/media/results/file/results/missing.mp4").status_code == 404, \
+                "沒有關鍵點檔的結果影片應回應 404"
+    finally:
+        gate.set()
+        service.render_overlay, service.load_landmarks = originals
+
+    print("✅ 背景繪製測試通過")
+    return True
+
+
+def test_segmented_jobs_skip_pool():
+    """測試分段處理時不向模型池取用模型，只把取用方式交給分段處理在不分段時使用"""
+    calls = []
+
+    def fake_segmented(input_path, output_path, segments, min_frames, **kwargs):
+        calls.append(kwargs["acquire_holistic"])
+        return True
+
+    originals = service.process_video_segmented, service.get_env_pose_segments, service.holistic_pool.acquire
+    service.process_video_segmented = fake_segmented
+    service.get_env_pose_segments = lambda: 2
+    service.holistic_pool.acquire = lambda: calls.append("pool")
+    try:
+        options = service.ProcessOptions.from_env()
+        assert service.run_process_video("walk.mp4", "output_walk.mp4", options), "處理應成功"
+    finally:
+        service.process_video_segmented, service.get_env_pose_segments = originals[:2]
+        del service.holistic_pool.acquire
+    assert len(calls) == 1 and calls[0] != "pool", f"分段處理不應佔用模型池: {calls}"
+
+    print("✅ 分段處理模型池測試通過")
+    return True
+
+
+def test_segmented_stage_totals():
+    """測試分段處理只累加各階段總耗時與格數，不在每格耗時 Histogram 補記"""
+    def fake_segmented(input_path, output_path, segments, min_frames, stats=None, **kwargs):
+        stats.update(frames=100, fps=50.0, segments=2,
+                     stages={"inference": {"frames": 100, "busy_seconds": 2.0, "wait_seconds": 0.0}})
+        return True
+
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    before = (sample("pose_stage_frame_seconds_count", stage="inference"),
+              sample("pose_stage_busy_seconds_total", stage="inference"),
+              sample("pose_stage_frames_total", stage="inference"))
+    originals = service.process_video_segmented, service.get_env_pose_segments
+    service.process_video_segmented = fake_segmented
+    service.get_env_pose_segments = lambda: 2
+    try:
+        assert service.run_process_video("walk.mp4", "output_walk.mp4", service.ProcessOptions.from_env()), \
+            "處理應成功"
+    finally:
+        service.process_video_segmented, service.get_env_pose_segments = originals
+
+    assert sample("pose_stage_frame_seconds_count", stage="inference") == before[0], "不應補記每格耗時"
+    assert sample("pose_stage_busy_seconds_total", stage="inference") - before[1] == 2.0, "累計耗時錯誤"
+    assert sample("pose_stage_frames_total", stage="inference") - before[2] == 100, "累計格數錯誤"
+
+    print("✅ 分段處理指標測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行服務端點單元測試...")
+
+    tests = [
+        test_duplicate_upload_keeps_running_file,
+        test_streaming_duplicate_upload,
+        test_request_options,
+        test_download_ranges,
+        test_render_on_demand,
+        test_segmented_jobs_skip_pool,
+        test_segmented_stage_totals
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有服務端點測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+效能量測工具測試 - 測試合成影片、每格處理時間與效能退步判斷
+"""
+
+import hashlib
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from benchmarks.suite import find_regressions, frame_latencies, parse_config
+from benchmarks.synthetic import write_video
+
+
+def test_synthetic_video():
+    """測試合成影片的格數、解析度與相同參數產生相同內容"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        paths = [write_video(str(Path(work_dir) / f"video-{index}.mp4"), 12, 160, 96) for index in range(2)]
+        cap = cv2.VideoCapture(paths[0])
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        cap.release()
+        digests = {hashlib.md5(Path(path).read_bytes()).hexdigest() for path in paths}
+
+    assert frames == 12 and size == (160, 96), f"影片格式錯誤: {frames} 格 {size}"
+    assert len(digests) == 1, "相同參數應產生相同影片"
+
+    print("✅ 合成影片測試通過")
+    return True
+
+
+def test_find_regressions():
+    """測試只在超出容許比例時回報退步，且依指標方向判斷"""
+    def report(**metrics):
+        return {"results": [dict(config="short-360p", scenario="process_video", **metrics)]}
+
+    baseline = report(fps=20.0, p95_ms=80.0, peak_rss_mb=300.0)
+    assert find_regressions(baseline, report(fps=18.0, p95_ms=88.0, peak_rss_mb=320.0)) == [], \
+        "容許範圍內的變動不應視為退步"
+    assert find_regressions(baseline, report(fps=30.0, p95_ms=40.0, peak_rss_mb=200.0)) == [], \
+        "變快或記憶體減少不應視為退步"
+
+    regressions = find_regressions(baseline, report(fps=15.0, p95_ms=100.0, peak_rss_mb=340.0))
+    assert [item["metric"] for item in regressions] == ["fps", "p95_ms", "peak_rss_mb"], f"退步判斷錯誤: {regressions}"
+    other = {"results": [dict(config="short-720p", scenario="process_video", fps=1.0, p95_ms=999.0,
+                              peak_rss_mb=999.0)]}
+    assert find_regressions(baseline, other) == [], "基準中沒有的組態不應比較"
+
+    print("✅ 效能退步判斷測試通過")
+    return True
+
+
+def test_frame_latencies_and_configs():
+    """測試每格處理時間由各階段加總，以及組態名稱解析"""
+    observed = {"decode": [0.01, 0.01], "inference": [0.05, 0.06], "encode": [0.002, 0.003]}
+    latencies = frame_latencies(observed)
+    assert [round(value, 3) for value in latencies] == [0.062, 0.073], f"每格處理時間錯誤: {latencies}"
+    assert parse_config("short-720p") == ("short-720p", (90, 1280, 720)), "預設組態解析錯誤"
+    assert parse_config("300@854x480") == ("300@854x480", (300, 854, 480)), "自訂組態解析錯誤"
+
+    print("✅ 每格處理時間與組態測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行效能量測工具單元測試...")
+
+    tests = [
+        test_synthetic_video,
+        test_find_regressions,
+        test_frame_latencies_and_configs
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有效能量測工具測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+輸出影片編碼測試 - 測試依來源長寬比決定輸出尺寸、沿用來源 fps、編碼方式的選擇與 ffmpeg 錯誤輸出的處理
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.encode import create_writer, fit_frame_size, FfmpegWriter, OpenCvWriter
+
+
+def encode(path, encoder, fps=25.0, size=(64, 48), frames=10):
+    out = create_writer(path, fps, size, encoder)
+    for index in range(frames):
+        out.write(np.full((size[1], size[0], 3), index * 20, dtype=np.uint8))
+    assert out.release(), f"{encoder} 編碼應成功"
+    cap = cv2.VideoCapture(path)
+    result = (int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), cap.get(cv2.CAP_PROP_FPS),
+              (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))))
+    cap.release()
+    return out, result
+
+
+def test_fit_frame_size():
+    """測試在上限內保持長寬比、直式影片轉向且寬高為偶數"""
+    assert fit_frame_size((520, 300), (640, 360)) == (520, 292), "16:9 影片應以寬為準"
+    assert fit_frame_size((520, 300), (640, 480)) == (400, 300), "4:3 影片應以高為準"
+    assert fit_frame_size((520, 300), (1080, 1920)) == (292, 520), "直式影片應將上限轉向，長邊對應長邊"
+    assert fit_frame_size((520, 300), (0, 0)) == (520, 300), "無法取得來源尺寸時沿用上限"
+    assert all(value % 2 == 0 for value in fit_frame_size((521, 301), (333, 199))), "寬高應為偶數"
+
+    print("✅ 輸出尺寸測試通過")
+    return True
+
+
+def test_mp4v_writer():
+    """測試 mp4v 編碼沿用指定的 fps 與尺寸"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        out, (frames, fps, size) = encode(str(Path(work_dir) / "output.mp4"), "mp4v")
+    assert isinstance(out, OpenCvWriter), "mp4v 應使用 OpenCV 編碼"
+    assert frames == 10 and fps == 25.0 and size == (64, 48), f"輸出影片錯誤: {frames} 格 {fps} fps {size}"
+
+    try:
+        create_writer("unused.mp4", 25.0, (64, 48), "h265")
+        raise AssertionError("不支援的編碼方式應拋出 ValueError")
+    except ValueError:
+        pass
+
+    print("✅ mp4v 編碼測試通過")
+    return True
+
+
+def test_x264_writer():
+    """測試 x264 經 ffmpeg 編碼成 H.264，沒有 ffmpeg 時改用 mp4v"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = str(Path(work_dir) / "output.mp4")
+        out, (frames, fps, size) = encode(path, "x264")
+        codec = cv2.VideoCapture(path).get(cv2.CAP_PROP_FOURCC)
+    if shutil.which("ffmpeg"):
+        assert isinstance(out, FfmpegWriter), "有 ffmpeg 時應以 ffmpeg 編碼"
+        assert int(codec).to_bytes(4, "little").lower() in (b"h264", b"avc1"), "輸出應為 H.264"
+    else:
+        assert isinstance(out, OpenCvWriter), "沒有 ffmpeg 時應改用 mp4v"
+    assert frames == 10 and fps == 25.0 and size == (64, 48), f"輸出影片錯誤: {frames} 格 {fps} fps {size}"
+
+    print("✅ x264 編碼測試通過")
+    return True
+
+
+def fake_ffmpeg(work_dir, name, stderr, code):
+    # 代替 ffmpeg：先寫出 stderr，讀完所有影格後以 code 結束
+    path = Path(work_dir) / name
+    path.write_text(f"#!{sys.executable}\n"
+                    "import sys\n"
+                    f"sys.stderr.write({stderr!r})\n"
+                    "sys.stderr.flush()\n"
+                    "sys.stdin.buffer.read()\n"
+                    f"sys.exit({code})\n")
+    os.chmod(path, 0o755)
+    return str(path)
+
+
+def test_ffmpeg_stderr():
+    """測試 ffmpeg 輸出大量訊息時編碼不會卡住，失敗時仍回報錯誤訊息"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        # 訊息超過管線緩衝，影格也超過管線緩衝：沒有人讀 stderr 時兩邊會互相等待
+        ffmpeg = fake_ffmpeg(work_dir, "noisy", "warning\n" * 100000, 0)
+        out = FfmpegWriter(str(Path(work_dir) / "output.mp4"), 25.0, (64, 48), ffmpeg=ffmpeg)
+        results = []
+
+        def encode_frames():
+            for index in range(50):
+                out.write(np.full((48, 64, 3), index, dtype=np.uint8))
+            results.append(out.release())
+
+        thread = threading.Thread(target=encode_frames, daemon=True)
+        thread.start()
+        thread.join(10)
+        assert not thread.is_alive(), "ffmpeg 輸出大量訊息時編碼不應卡住"
+        assert results == [True], "編碼應成功"
+
+        ffmpeg = fake_ffmpeg(work_dir, "failing", "encoder failed", 1)
+        out = FfmpegWriter(str(Path(work_dir) / "output.mp4"), 25.0, (64, 48), ffmpeg=ffmpeg)
+        out.write(np.zeros((48, 64, 3), dtype=np.uint8))
+        printed = io.StringIO()
+        with redirect_stdout(printed):
+            assert not out.release(), "ffmpeg 失敗時 release 應回傳 False"
+        assert "encoder failed" in printed.getvalue(), f"應印出 ffmpeg 的錯誤訊息: {printed.getvalue()!r}"
+
+    print("✅ ffmpeg 錯誤輸出測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行輸出影片編碼單元測試...")
+
+    tests = [
+        test_fit_frame_size,
+        test_mp4v_writer,
+        test_x264_writer,
+        test_ffmpeg_stderr
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有輸出影片編碼測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+邊寫邊上傳測試 - 測試檔案仍在寫入時分段上傳並於結束後合併
+"""
+
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.growing_upload import GrowingFileUpload, MIN_PART_SIZE
+
+
+class MemoryStorage:
+    """以字典模擬 MinIO 的分段上傳與伺服器端合併"""
+
+    def __init__(self):
+        self.objects = {}
+        self.batch_executor = ThreadPoolExecutor(max_workers=2)
+
+    def save_resource(self, bucket, path):
+        with open(path, "rb") as source:
+            self.objects[(bucket, path)] = source.read()
+        return True
+
+    def save_file_part(self, bucket, name, path, offset, length):
+        with open(path, "rb") as source:
+            source.seek(offset)
+            self.objects[(bucket, name)] = source.read(length)
+        return True
+
+    def compose_resource(self, bucket, name, part_names, content_type="application/octet-stream"):
+        parts = [self.objects[(bucket, part)] for part in part_names]
+        if any(len(part) < MIN_PART_SIZE for part in parts[:-1]):
+            return False
+        self.objects[(bucket, name)] = b"".join(parts)
+        return True
+
+    def remove_resource(self, bucket, name):
+        del self.objects[(bucket, name)]
+
+
+def write_growing_file(path, upload, chunks, chunk_size):
+    with open(path, "wb") as output:
+        output.write(b"HEADER--")
+        for index in range(chunks):
+            output.write(bytes([index % 251]) * chunk_size)
+            output.flush()
+            upload.poll()
+        output.write(b"TRAILER")
+        # 模擬 mp4 收尾時回頭改寫檔頭
+        output.seek(0)
+        output.write(b"PATCHED!")
+
+
+def test_streamed_parts_match_file():
+    """測試邊寫邊上傳的結果與最終檔案完全相同，且不留下暫存分段"""
+    storage = MemoryStorage()
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "output.mp4")
+        upload = GrowingFileUpload(storage, "results", path, MIN_PART_SIZE)
+        write_growing_file(path, upload, 24, 1024 * 1024)
+        assert upload.next_part > 2, "寫入途中應已上傳分段"
+        assert upload.finish(), "合併失敗"
+
+        with open(path, "rb") as source:
+            assert storage.objects[("results", path)] == source.read(), "上傳內容與檔案不符"
+        assert list(storage.objects) == [("results", path)], f"暫存分段未清除: {list(storage.objects)}"
+
+    print("✅ 邊寫邊上傳測試通過")
+    return True
+
+
+def test_small_file_uploaded_whole():
+    """測試小於兩個分段的檔案直接整份上傳"""
+    storage = MemoryStorage()
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "output.mp4")
+        upload = GrowingFileUpload(storage, "results", path, MIN_PART_SIZE)
+        write_growing_file(path, upload, 3, 1024 * 1024)
+        assert upload.finish(), "上傳失敗"
+        with open(path, "rb") as source:
+            assert storage.objects[("results", path)] == source.read(), "上傳內容與檔案不符"
+
+    print("✅ 小檔案整份上傳測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行邊寫邊上傳單元測試...")
+
+    tests = [
+        test_streamed_parts_match_file,
+        test_small_file_uploaded_whole
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有邊寫邊上傳測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
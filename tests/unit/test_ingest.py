@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+上傳接收測試 - 測試直接從請求主體解析 multipart 的串流讀取與邊界情況
+"""
+
+import hashlib
+import io
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.ingest import MultipartFileStream, save_file
+
+BOUNDARY = "----pose-boundary"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+VIDEO = bytes(range(256)) * 40 + b"\r\n--" + BOUNDARY[:-3].encode()
+
+
+def part(name, data, filename=None):
+    disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+    headers = f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n"
+    if filename:
+        headers += "Content-Type: video/mp4\r\n"
+    return headers.encode() + b"\r\n" + data + b"\r\n"
+
+
+def body(*parts):
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode()
+
+
+class ChunkedStream(io.BytesIO):
+    # 每次最多回傳 chunk 個位元組，模擬網路分批到達，讓 boundary 被切在不同位置
+    def __init__(self, data, chunk):
+        super().__init__(data)
+        self.chunk = chunk
+
+    def read(self, size=-1):
+        return super().read(self.chunk if size < 0 else min(size, self.chunk))
+
+
+def read_all(stream, size=-1):
+    chunks = []
+    while True:
+        chunk = stream.read(size)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def test_split_boundaries():
+    """測試 boundary 被切在任意位置時，讀到的內容、大小與 tees 都與原始檔案相同"""
+    data = body(part("file", VIDEO, "walk.mp4"))
+    for chunk in (1, 2, 3, 7, 64, 1000, len(data)):
+        digest = hashlib.sha256()
+        stream = MultipartFileStream(ChunkedStream(data, chunk), CONTENT_TYPE, tees=[digest.update])
+        assert stream.open() == "walk.mp4", "檔名錯誤"
+        content = read_all(stream, 100)
+        assert content == VIDEO, f"每次 {chunk} 位元組時內容錯誤"
+        assert stream.size == len(VIDEO) and digest.digest() == hashlib.sha256(VIDEO).digest(), "tees 內容錯誤"
+        assert stream.read() == b"", "讀完後應回傳空字串"
+
+    print("✅ boundary 切分測試通過")
+    return True
+
+
+def test_other_fields():
+    """測試檔案前後有其他欄位時只讀取指定欄位的檔案內容"""
+    data = body(part("note", b"left knee"), part("camera", b"front"), part("file", VIDEO, "walk.mp4"),
+                part("after", b"ignored"))
+    stream = MultipartFileStream(ChunkedStream(data, 5), CONTENT_TYPE)
+    assert stream.open() == "walk.mp4", "應跳過前面的欄位"
+    assert read_all(stream) == VIDEO, "不應讀到其他欄位的內容"
+
+    stream = MultipartFileStream(io.BytesIO(body(part("video", VIDEO, "walk.mp4"))), CONTENT_TYPE, field="video")
+    assert stream.open() == "walk.mp4" and read_all(stream) == VIDEO, "應可指定欄位名稱"
+
+    print("✅ 其他欄位測試通過")
+    return True
+
+
+def test_missing_file_part():
+    """測試沒有檔案欄位、空的主體與非 multipart 請求"""
+    stream = MultipartFileStream(io.BytesIO(body(part("note", b"hello"))), CONTENT_TYPE)
+    assert stream.open() is None, "沒有檔案欄位時應回傳 None"
+    assert stream.read() == b"", "沒有檔案時不應讀到內容"
+
+    stream = MultipartFileStream(io.BytesIO(body(part("file", b"", ""))), CONTENT_TYPE)
+    assert stream.open() is None, "沒有選擇檔案的欄位不視為檔案"
+
+    for content_type in ("application/json", "multipart/form-data", ""):
+        try:
+            MultipartFileStream(io.BytesIO(b""), content_type)
+            raise AssertionError(f"{content_type!r} 應拋出 ValueError")
+        except ValueError:
+            pass
+
+    print("✅ 缺少檔案欄位測試通過")
+    return True
+
+
+def test_truncated_body():
+    """測試主體在檔案結束前中斷時拋出 ValueError，而不是當成較短的完整檔案"""
+    data = body(part("note", b"hello"), part("file", VIDEO, "walk.mp4"))
+    file_end = data.index(b"\r\n--" + BOUNDARY.encode() + b"--")
+    for cut in list(range(0, file_end, 97)) + [file_end - 1, file_end, file_end + 3]:
+        stream = MultipartFileStream(ChunkedStream(data[:cut], 64), CONTENT_TYPE)
+        try:
+            filename = stream.open()
+            content = read_all(stream) if filename else None
+        except ValueError:
+            continue
+        raise AssertionError(f"在第 {cut} 個位元組中斷時應拋出 ValueError: {filename} {len(content or b'')}")
+
+    print("✅ 主體中斷測試通過")
+    return True
+
+
+def test_save_file():
+    """測試存檔時內容與 tees 相同"""
+    digest = hashlib.sha256()
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = Path(work_dir) / "walk.mp4"
+        save_file(SimpleNamespace(stream=ChunkedStream(VIDEO, 333)), str(path), tees=[digest.update])
+        assert path.read_bytes() == VIDEO and digest.digest() == hashlib.sha256(VIDEO).digest(), "存檔內容錯誤"
+
+    print("✅ 存檔測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行上傳接收單元測試...")
+
+    tests = [
+        test_split_boundaries,
+        test_other_fields,
+        test_missing_file_part,
+        test_truncated_body,
+        test_save_file
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有上傳接收測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
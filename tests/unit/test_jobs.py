@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+工作佇列測試 - 測試姿勢分析服務的背景工作管理
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.jobs import JobManager, JobFailed, JobQueueFull
+
+
+def wait_for(manager, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"工作逾時: {job_id}")
+
+
+def test_job_result():
+    """測試工作完成後可取得結果"""
+    manager = JobManager(max_workers=1, max_pending=1)
+    job_id = manager.submit(lambda a, b: {"sum": a + b}, 1, 2)
+
+    job = wait_for(manager, job_id)
+    assert job["status"] == "done", f"工作狀態錯誤: {job}"
+    assert job["result"] == {"sum": 3}, f"工作結果錯誤: {job['result']}"
+
+    print("✅ 工作結果測試通過")
+    return True
+
+
+def test_job_failure():
+    """測試工作失敗時回報錯誤訊息"""
+    manager = JobManager(max_workers=1, max_pending=1)
+
+    def fail():
+        raise JobFailed("Failed to process video")
+
+    job = wait_for(manager, manager.submit(fail))
+    assert job["status"] == "failed", f"工作狀態錯誤: {job}"
+    assert job["error"] == "Failed to process video", f"錯誤訊息不正確: {job['error']}"
+
+    print("✅ 工作失敗測試通過")
+    return True
+
+
+def test_queue_full():
+    """測試佇列滿時拒絕新工作"""
+    manager = JobManager(max_workers=1, max_pending=1)
+    release = threading.Event()
+    job_ids = [manager.submit(release.wait), manager.submit(release.wait)]
+
+    try:
+        manager.submit(release.wait)
+        assert False, "佇列已滿卻仍接受工作"
+    except JobQueueFull:
+        pass
+    finally:
+        release.set()
+
+    for job_id in job_ids:
+        assert wait_for(manager, job_id)["status"] == "done"
+    # 完成後應釋放名額
+    wait_for(manager, manager.submit(lambda: None))
+
+    print("✅ 佇列上限測試通過")
+    return True
+
+
+def test_add_completed():
+    """測試直接登錄完成的工作不佔用佇列名額"""
+    manager = JobManager(max_workers=1, max_pending=0)
+    job = manager.get(manager.add_completed({"cached": True}))
+    assert job["status"] == "done", f"工作狀態錯誤: {job}"
+    assert job["result"] == {"cached": True}, f"工作結果錯誤: {job['result']}"
+    assert manager.has_capacity(), "已完成的工作不應佔用名額"
+
+    print("✅ 完成工作登錄測試通過")
+    return True
+
+
+def test_priority():
+    """測試等待中的工作依 priority 由小到大開始，相同時先到先做"""
+    manager = JobManager(max_workers=1, max_pending=4)
+    release = threading.Event()
+    order = []
+    blocker = manager.submit(release.wait)
+    job_ids = [manager.submit(order.append, name, priority=priority)
+               for name, priority in (("long", 900), ("short", 20), ("medium", 300), ("short-2", 20))]
+    release.set()
+    for job_id in [blocker] + job_ids:
+        assert wait_for(manager, job_id)["status"] == "done"
+    assert order == ["short", "short-2", "medium", "long"], f"開始順序錯誤: {order}"
+
+    print("✅ 工作優先順序測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行工作佇列單元測試...")
+
+    tests = [
+        test_job_result,
+        test_job_failure,
+        test_queue_full,
+        test_add_completed,
+        test_priority
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有工作佇列測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+關鍵點檔案測試 - 測試關鍵點的欄位式儲存與讀取
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.landmarks import (FrameLandmarks, LandmarkWriter, load_landmarks, iter_landmarks,
+                             concat_landmark_files, FACE_POINTS)
+
+
+def make_frames(count, offset=0):
+    frames = []
+    for index in range(count):
+        value = (index + offset) / 100
+        pose = np.full((33, 4), value, dtype=np.float32) if index % 3 else None
+        face = np.full((FACE_POINTS, 3), value, dtype=np.float32) if index % 2 else None
+        frames.append(FrameLandmarks(pose=pose, face=face, inferred=index % 4 == 0))
+    return frames
+
+
+def write_file(path, frames):
+    writer = LandmarkWriter(str(path), 20.0, (520, 300), source="uploads/test.mp4")
+    for frame in frames:
+        writer.append(frame)
+    writer.close()
+
+
+def assert_same(expected, actual):
+    assert len(expected) == len(actual), f"影格數不符: {len(expected)} != {len(actual)}"
+    for index, (a, b) in enumerate(zip(expected, actual)):
+        for name in ("pose", "face"):
+            left, right = getattr(a, name), getattr(b, name)
+            assert (left is None) == (right is None), f"第 {index} 格 {name} 存在狀態不符"
+            if left is not None:
+                assert np.array_equal(left, right), f"第 {index} 格 {name} 數值不符"
+        assert a.inferred == b.inferred, f"第 {index} 格推論標記不符"
+
+
+def test_landmark_roundtrip():
+    """測試關鍵點寫入後可完整讀回"""
+    frames = make_frames(10)
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = Path(work_dir) / "out.npz"
+        write_file(path, frames)
+        data = load_landmarks(path)
+        assert_same(frames, list(iter_landmarks(data)))
+        assert str(data["source"]) == "uploads/test.mp4", f"來源錯誤: {data['source']}"
+        assert tuple(data["frame_size"]) == (520, 300), f"尺寸錯誤: {data['frame_size']}"
+        assert not list(Path(work_dir).glob("*.tmp")), "暫存檔未清除"
+
+    print("✅ 關鍵點讀寫測試通過")
+    return True
+
+
+def test_landmark_concat():
+    """測試分段產生的關鍵點檔可依序合併"""
+    first, second = make_frames(5), make_frames(7, offset=5)
+    with tempfile.TemporaryDirectory() as work_dir:
+        paths = [Path(work_dir) / "a.npz", Path(work_dir) / "b.npz"]
+        write_file(paths[0], first)
+        write_file(paths[1], second)
+        merged = Path(work_dir) / "merged.npz"
+        concat_landmark_files(paths, merged)
+        assert_same(first + second, list(iter_landmarks(load_landmarks(merged))))
+
+    print("✅ 關鍵點合併測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行關鍵點檔案單元測試...")
+
+    tests = [
+        test_landmark_roundtrip,
+        test_landmark_concat
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有關鍵點檔案測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
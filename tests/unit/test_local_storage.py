@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+本機物件儲存測試 - 透過 MinioClientManager 測試 bucket、ETag、範圍讀取與分段合併
+"""
+
+import hashlib
+import io
+import sys
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from minio.error import S3Error
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.growing_upload import MIN_PART_SIZE
+from utils.local_storage import LocalObjectStore
+from utils.minio import MinioClientManager
+
+
+def make_manager(root=None, **kwargs):
+    return MinioClientManager(None, None, None, client=LocalObjectStore(root, **kwargs))
+
+
+def check_objects(manager, work_dir):
+    path = Path(work_dir) / "uploads" / "video.mp4"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"0123456789")
+    assert manager.save_resource("uploads", str(path)), "上傳應成功（bucket 自動建立）"
+
+    stat = manager.stat_resource("uploads", str(path))
+    assert stat.size == 10 and stat.etag == hashlib.md5(b"0123456789").hexdigest(), f"物件資訊錯誤: {stat.etag}"
+    assert stat.content_type == "video/mp4", f"Content-Type 錯誤: {stat.content_type}"
+    assert stat.last_modified.microsecond == 0 and stat.last_modified.tzinfo is not None, "修改時間應為秒精度的 UTC"
+
+    data = manager.get_resource("uploads", str(path), offset=2, length=3)
+    assert b"".join(data.stream(2)) == b"234", "範圍讀取內容錯誤"
+    data.close()
+    data.release_conn()
+    assert manager.get_resource("uploads", str(path), offset=7).read() == b"789", "讀到結尾內容錯誤"
+
+    download = Path(work_dir) / "download" / "copy.mp4"
+    manager.download_resource("uploads", str(path), str(download))
+    assert download.read_bytes() == b"0123456789", "下載內容錯誤"
+
+    for bucket, name, code in (("uploads", "missing.mp4", "NoSuchKey"), ("nothing", "video.mp4", "NoSuchBucket")):
+        try:
+            manager.get_resource(bucket, name)
+            raise AssertionError(f"不存在的物件應回報 {code}")
+        except S3Error as exc:
+            assert exc.code == code, f"錯誤代碼錯誤: {exc.code}"
+    assert manager.get_etag("uploads", "missing.mp4") is None, "不存在的物件沒有 ETag"
+
+    manager.remove_resource("uploads", str(path))
+    manager.remove_resource("uploads", str(path))
+    assert not manager.resource_exists("uploads", str(path)), "刪除後物件不應存在"
+
+
+def test_memory_objects():
+    """測試記憶體模式的上傳、stat、範圍讀取、下載與錯誤代碼"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        check_objects(make_manager(), work_dir)
+
+    print("✅ 記憶體物件儲存測試通過")
+    return True
+
+
+def test_directory_objects():
+    """測試目錄模式與記憶體模式行為相同，且重新開啟後物件仍在"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        root = str(Path(work_dir) / "storage")
+        check_objects(make_manager(root), work_dir)
+        manager = make_manager(root)
+        assert manager.save_bytes("results", "index/key.json", b"{}", "application/json"), "寫入應成功"
+        reopened = make_manager(root)
+        stat = reopened.stat_resource("results", "index/key.json")
+        data = reopened.get_resource("results", "index/key.json").read()
+        assert stat.content_type == "application/json" and data == b"{}", "重新開啟後物件應保留"
+        assert Path(reopened.get_resource_url("results", "index/key.json", None)).read_bytes() == b"{}", \
+            "預簽網址應可直接讀取"
+
+    print("✅ 目錄物件儲存測試通過")
+    return True
+
+
+def test_multipart_and_compose():
+    """測試分段上傳的 ETag 格式、分段合併與合併時的最小分段限制"""
+    manager = make_manager()
+    part = b"a" * MIN_PART_SIZE
+    assert manager.save_stream("results", "stream.bin", io.BytesIO(part + b"tail"), MIN_PART_SIZE), "串流上傳應成功"
+    assert manager.stat_resource("results", "stream.bin").etag.endswith("-2"), "分段上傳的 ETag 應標示分段數"
+
+    assert manager.save_bytes("results", "part-1", part), "分段寫入應成功"
+    assert manager.save_bytes("results", "part-2", b"tail"), "分段寫入應成功"
+    assert manager.compose_resource("results", "video.mp4", ["part-1", "part-2"], "video/mp4"), "合併應成功"
+    stat = manager.stat_resource("results", "video.mp4")
+    assert stat.size == len(part) + 4 and stat.content_type == "video/mp4", f"合併結果錯誤: {stat.size}"
+    assert manager.get_resource("results", "video.mp4", offset=len(part) - 1).read() == b"atail", "合併內容錯誤"
+    try:
+        manager.compose_resource("results", "bad.mp4", ["part-2", "part-1"], "video/mp4")
+        raise AssertionError("非最後一段小於 5MiB 時合併應失敗")
+    except ValueError:
+        pass
+
+    print("✅ 分段上傳與合併測試通過")
+    return True
+
+
+def test_directory_streaming():
+    """測試目錄模式分段寫入時不把整個物件留在記憶體、資料不足時不留下暫存檔，以及記憶體模式沒有預簽網址"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        root = Path(work_dir) / "storage"
+        store = LocalObjectStore(str(root))
+        store.make_bucket("results")
+        part = bytearray(range(256)) * (MIN_PART_SIZE // 256)
+        size = 4 * MIN_PART_SIZE + 10
+
+        class Source(io.RawIOBase):
+            # 每次讀取都從同一個分段複製一份，來源本身不另外佔記憶體
+            def __init__(self):
+                self.offset = 0
+
+            def read(self, amount=-1):
+                data = part[:min(amount, size - self.offset)]
+                self.offset += len(data)
+                return data
+
+        tracemalloc.start()
+        try:
+            store.put_object("results", "large.bin", Source(), -1, part_size=MIN_PART_SIZE)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert os.path.getsize(root / "results" / "large.bin") == size, "寫入大小錯誤"
+        assert store.stat_object("results", "large.bin").etag.endswith("-5"), "應以五個分段寫入"
+        assert peak < 3 * MIN_PART_SIZE, f"寫入時不應整份留在記憶體: {peak / MIN_PART_SIZE:.1f} 個分段"
+
+        try:
+            store.put_object("results", "short.bin", io.BytesIO(b"abc"), 10)
+            raise AssertionError("資料不足時應拋出 ValueError")
+        except ValueError:
+            pass
+        assert sorted(os.listdir(root / "results")) == [".meta", "large.bin"], \
+            f"不應留下暫存檔或物件: {os.listdir(root / 'results')}"
+
+    try:
+        make_manager().get_resource_url("results", "large.bin", None)
+        raise AssertionError("記憶體模式的預簽網址應拋出 ValueError")
+    except ValueError as exc:
+        assert "directory" in str(exc), f"錯誤訊息應說明需要目錄模式: {exc}"
+
+    print("✅ 目錄串流寫入測試通過")
+    return True
+
+
+def test_latency_and_bandwidth():
+    """測試每次請求的延遲與傳輸頻寬限制"""
+    manager = make_manager(latency=0.02, bandwidth=1000000)
+    manager.ensure_bucket("results")
+    started = time.perf_counter()
+    manager.save_bytes("results", "blob", b"x" * 100000)
+    elapsed = time.perf_counter() - started
+    assert elapsed >= 0.12, f"延遲與頻寬限制未生效: {elapsed:.3f}s"
+
+    print("✅ 延遲與頻寬模擬測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行本機物件儲存單元測試...")
+
+    tests = [
+        test_memory_objects,
+        test_directory_objects,
+        test_multipart_and_compose,
+        test_directory_streaming,
+        test_latency_and_bandwidth
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有本機物件儲存測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
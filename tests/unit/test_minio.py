@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+MinIO 用戶端測試 - 測試 bucket 存在狀態的快取、依分段大小平行上傳，以及多個檔案的批次上傳
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.growing_upload import MIN_PART_SIZE
+from utils.local_storage import LocalObjectStore
+from utils.minio import MinioClientManager
+
+
+class CountingStore(LocalObjectStore):
+    # 記錄 bucket 查詢、建立與每次 put_object 的分段參數
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = []
+        self.puts = []
+
+    def bucket_exists(self, bucket_name):
+        self.calls.append(("bucket_exists", bucket_name))
+        return super().bucket_exists(bucket_name)
+
+    def make_bucket(self, bucket_name):
+        self.calls.append(("make_bucket", bucket_name))
+        return super().make_bucket(bucket_name)
+
+    def stat_object(self, bucket_name, object_name):
+        self.calls.append(("stat_object", object_name))
+        return super().stat_object(bucket_name, object_name)
+
+    def put_object(self, bucket_name, object_name, data, length, content_type="application/octet-stream",
+                   metadata=None, part_size=0, num_parallel_uploads=3):
+        self.puts.append((object_name, part_size, num_parallel_uploads))
+        return super().put_object(bucket_name, object_name, data, length, content_type, metadata, part_size,
+                                  num_parallel_uploads)
+
+
+def write_file(work_dir, name, size):
+    path = Path(work_dir) / name
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+
+def test_bucket_cache():
+    """測試 bucket 只確認一次（並行時也一樣），bucket 被外部刪除後會重新建立"""
+    store = CountingStore(latency=0.01)
+    manager = MinioClientManager(None, None, None, client=store)
+    with tempfile.TemporaryDirectory() as work_dir:
+        paths = [write_file(work_dir, f"thumb-{index}.jpg", 10) for index in range(8)]
+        threads = [threading.Thread(target=manager.save_resource, args=("results", path)) for path in paths]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert store.calls == [("bucket_exists", "results"), ("make_bucket", "results")], \
+            f"並行上傳時 bucket 應只確認與建立一次: {store.calls}"
+        assert manager.save_bytes("results", "index.json", b"{}"), "寫入應成功"
+        assert len(store.calls) == 2, "已知存在的 bucket 不應再查詢"
+
+        # bucket 被外部刪除：上傳失敗並忘記狀態，下次上傳重新建立
+        with store.lock:
+            del store.buckets["results"]
+        assert not manager.save_resource("results", paths[0]), "bucket 不存在時上傳應失敗"
+        assert manager.save_resource("results", paths[0]), "重新建立 bucket 後上傳應成功"
+        assert store.calls[2:] == [("bucket_exists", "results"), ("make_bucket", "results")], \
+            f"應重新確認並建立 bucket: {store.calls}"
+
+        # 其他節點已建立同名 bucket
+        store.make_bucket("uploads")
+        other = MinioClientManager(None, None, None, client=store)
+        store.bucket_exists = lambda bucket_name: False
+        assert other.save_resource("uploads", paths[1]), "bucket 已由其他節點建立時上傳應成功"
+
+    print("✅ bucket 快取測試通過")
+    return True
+
+
+def test_parallel_part_upload():
+    """測試大檔案以設定的分段大小與執行緒數上傳，多個檔案由背景執行緒同時上傳"""
+    store = CountingStore(latency=0.2)
+    manager = MinioClientManager(None, None, None, part_size=MIN_PART_SIZE, parallel_uploads=3, client=store)
+    manager.ensure_bucket("results")
+    with tempfile.TemporaryDirectory() as work_dir:
+        large = write_file(work_dir, "output.mp4", 2 * MIN_PART_SIZE + 4)
+        assert manager.save_resource("results", large), "上傳應成功"
+        assert store.puts == [(large, MIN_PART_SIZE, 3)], f"分段參數錯誤: {store.puts}"
+        assert manager.stat_resource("results", large).etag.endswith("-3"), "應以三個分段上傳"
+
+        paths = [write_file(work_dir, f"thumb-{index}.jpg", 10) for index in range(3)]
+        started = time.perf_counter()
+        futures = [manager.save_resource_async("results", path) for path in paths]
+        assert all(future.result() for future in futures), "背景上傳應成功"
+        elapsed = time.perf_counter() - started
+        assert elapsed < 0.5, f"三個檔案應同時上傳: {elapsed:.2f}s"
+
+    print("✅ 平行分段上傳測試通過")
+    return True
+
+
+def test_save_resources():
+    """測試批次上傳平行進行、全部結束後才回傳，並回報失敗的項目"""
+    store = CountingStore(latency=0.2)
+    manager = MinioClientManager(None, None, None, parallel_uploads=4, client=store)
+    manager.ensure_bucket("uploads")
+    manager.ensure_bucket("results")
+    with tempfile.TemporaryDirectory() as work_dir:
+        items = [("uploads", write_file(work_dir, "walk.mp4", 100)),
+                 ("uploads", write_file(work_dir, "walk.mp4-thumbnail.jpg", 10)),
+                 ("results", write_file(work_dir, "output_walk.mp4", 100)),
+                 ("results", str(Path(work_dir) / "missing.jpg"))]
+        started = time.perf_counter()
+        failed = manager.save_resources(items)
+        elapsed = time.perf_counter() - started
+        assert failed == [items[3]], f"應只回報不存在的檔案: {failed}"
+        assert elapsed < 0.5, f"批次中的檔案應同時上傳: {elapsed:.2f}s"
+        assert sorted(name for name, _, _ in store.puts) == sorted(path for _, path in items[:3]), \
+            f"回傳前應已全部上傳: {store.puts}"
+        assert manager.save_resources([]) == [], "空的批次應直接回傳"
+
+        batch = manager.save_resources_async(items[:2])
+        assert not batch.done(), "非同步批次應在背景上傳"
+        assert batch.result() == [], "非同步批次應成功"
+
+    print("✅ 批次上傳測試通過")
+    return True
+
+
+def test_written_etag():
+    """測試寫入回報直接帶上寫入後的 etag，與查詢結果相同，且不會多查詢一次"""
+    store = CountingStore()
+    written = []
+    manager = MinioClientManager(None, None, None, client=store,
+                                 observe=lambda operation, bucket, name, seconds, etag: written.append((name, etag)))
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = write_file(work_dir, "output.mp4", MIN_PART_SIZE + 40)
+        assert manager.save_resource("results", path) and manager.save_bytes("results", "index.json", b"{}")
+        assert manager.save_file_part("results", "part-0", path, 0, MIN_PART_SIZE)
+        assert manager.save_file_part("results", "part-1", path, MIN_PART_SIZE, 40)
+        assert manager.compose_resource("results", "joined.mp4", ["part-0", "part-1"], "video/mp4")
+        assert not any(call[0] == "stat_object" for call in store.calls), f"寫入時不應查詢物件: {store.calls}"
+        for name, etag in written:
+            assert etag and etag == store.stat_object("results", name).etag, f"{name} 的 etag 錯誤: {etag}"
+        assert [name for name, _ in written] == [path, "index.json", "part-0", "part-1", "joined.mp4"], \
+            f"寫入回報錯誤: {written}"
+
+    print("✅ 寫入版本回報測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行 MinIO 用戶端單元測試...")
+
+    tests = [
+        test_bucket_cache,
+        test_parallel_part_upload,
+        test_save_resources,
+        test_written_etag
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有 MinIO 用戶端測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
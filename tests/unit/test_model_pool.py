@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+模型池測試 - 測試預先暖機的模型取用、歸還重設，以及建立或重設失敗時不會讓工作無限等待
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.model_pool import ModelPool, ModelUnavailable
+
+
+class FakeModel:
+    # 記錄推論與重設次數，fail_reset 時重設拋出例外
+    def __init__(self, index, fail_reset=False):
+        self.index = index
+        self.fail_reset = fail_reset
+        self.processed = 0
+        self.resets = 0
+
+    def process(self, frame):
+        self.processed += 1
+
+    def reset(self):
+        if self.fail_reset:
+            raise RuntimeError("reset failed")
+        self.resets += 1
+
+
+class FakeFactory:
+    # 依序建立 FakeModel；failures 次數內拋出例外，模擬模型下載失敗
+    def __init__(self, failures=0, fail_reset=False):
+        self.failures = failures
+        self.fail_reset = fail_reset
+        self.created = []
+
+    def __call__(self):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("download failed")
+        model = FakeModel(len(self.created), self.fail_reset)
+        self.created.append(model)
+        return model
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return
+        time.sleep(0.01)
+    raise AssertionError("等待逾時")
+
+
+def test_acquire_and_recycle():
+    """測試暖機後取用、歸還時在背景重設，以及池空時等待逾時"""
+    factory = FakeFactory()
+    pool = ModelPool("fake", factory, 2)
+    pool.start()
+    assert pool.ready.wait(5), "暖機應完成"
+    assert all(model.processed == 1 for model in factory.created), "每個實例都應先以空白影格暖機"
+
+    with pool.acquire() as first, pool.acquire() as second:
+        assert first is not second, "同時取用應拿到不同實例"
+        assert pool.status()["available"] == 0, f"可用數量錯誤: {pool.status()}"
+        try:
+            with pool.acquire(timeout=0.05):
+                pass
+            raise AssertionError("池空時應在逾時後拋出 ModelUnavailable")
+        except ModelUnavailable:
+            pass
+    wait_until(lambda: pool.status()["available"] == 2)
+    assert [model.resets for model in factory.created] == [1, 1], "歸還後應重設追蹤狀態"
+    assert len(factory.created) == 2, "重設成功時不應建立新實例"
+
+    print("✅ 取用與歸還測試通過")
+    return True
+
+
+def test_warm_up_failure():
+    """測試暖機失敗時取用的工作立即失敗，模型可建立後由取用的工作補回"""
+    factory = FakeFactory(failures=2)
+    pool = ModelPool("fake", factory, 2)
+    pool.start()
+    wait_until(lambda: pool.status()["missing"] == 2)
+    assert not pool.ready.is_set() and pool.error == "download failed", f"應記錄暖機錯誤: {pool.status()}"
+
+    try:
+        with pool.acquire(timeout=5):
+            pass
+        raise AssertionError("模型無法建立時應拋出 ModelUnavailable")
+    except ModelUnavailable:
+        pass
+    assert pool.status()["missing"] == 2, "建立失敗時名額應保留給下一個工作"
+
+    with pool.acquire(timeout=5) as model:
+        assert model is factory.created[0] and model.processed == 1, "應重新建立並暖機"
+    wait_until(lambda: pool.status()["available"] == 1)
+    assert pool.status()["missing"] == 1, f"缺少數量錯誤: {pool.status()}"
+
+    print("✅ 暖機失敗測試通過")
+    return True
+
+
+def test_recycle_failure():
+    """測試重設與替換都失敗時名額不會遺失，之後由取用的工作重新建立"""
+    factory = FakeFactory(fail_reset=True)
+    pool = ModelPool("fake", factory, 1)
+    pool.start()
+    assert pool.ready.wait(5), "暖機應完成"
+
+    with pool.acquire():
+        factory.failures = 1
+    wait_until(lambda: pool.status()["missing"] == 1)
+
+    results = []
+
+    def use():
+        with pool.acquire(timeout=5) as model:
+            results.append(model)
+
+    thread = threading.Thread(target=use)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive(), "取用不應無限等待"
+    assert results == [factory.created[1]], f"應以新建立的實例取代: {results}"
+
+    print("✅ 重設失敗測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行模型池單元測試...")
+
+    tests = [
+        test_acquire_and_recycle,
+        test_warm_up_failure,
+        test_recycle_failure
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有模型池測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+畫面變化閘門測試 - 測試靜止畫面略過推論並沿用上次關鍵點
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.landmarks import FrameLandmarks
+from utils.motion import MotionGate
+
+
+def make_frame(x=None, seed=0):
+    # 灰色背景加上輕微雜訊；x 不為 None 時在該位置畫一個人形方塊
+    rng = np.random.default_rng(seed)
+    img = np.clip(128 + rng.normal(0, 2, (300, 520, 3)), 0, 255).astype(np.uint8)
+    if x is not None:
+        img[100:260, x:x + 40] = 30
+    return img
+
+
+def counting_detect(calls):
+    def detect(img):
+        calls.append(True)
+        person = img[100:260].mean(axis=(0, 2)) < 60
+        if not person.any():
+            return FrameLandmarks()
+        return FrameLandmarks(pose=np.full((33, 4), np.argmax(person) / 520, dtype=np.float32))
+    return detect
+
+
+def test_gate_skips_static_frames():
+    """測試無人與靜止畫面略過推論，畫面變化時立即推論"""
+    calls = []
+    gate = MotionGate(counting_detect(calls), area_threshold=0.001, max_skip=100)
+
+    empty = [gate.process(make_frame(None, seed)) for seed in range(10)]
+    assert all(item.pose is None for item in empty), "無人畫面不應產生關鍵點"
+    still = [gate.process(make_frame(200, seed)) for seed in range(10, 20)]
+    moved = gate.process(make_frame(260, 99))
+
+    assert len(calls) == 3, f"推論次數錯誤: {len(calls)}"
+    assert all(item.pose is not None for item in still), "人出現時應立即推論"
+    assert not still[-1].inferred and still[0].inferred, "略過的影格應標記為非推論"
+    assert np.allclose(moved.pose, 260 / 520), f"移動後應重新推論: {moved.pose[0]}"
+
+    summary = gate.summary()
+    assert summary["skipped_frames"] == 18, f"略過格數錯誤: {summary}"
+    assert summary["skipped_no_subject"] == 9, f"無人略過格數錯誤: {summary}"
+
+    print("✅ 畫面變化閘門測試通過")
+    return True
+
+
+def test_gate_max_skip():
+    """測試連續略過達上限時強制推論"""
+    calls = []
+    gate = MotionGate(counting_detect(calls), area_threshold=0.001, max_skip=4)
+    for seed in range(15):
+        gate.process(make_frame(200, seed))
+
+    assert len(calls) == 3, f"應每 5 格推論一次: {len(calls)}"
+
+    print("✅ 連續略過上限測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行畫面變化閘門單元測試...")
+
+    tests = [
+        test_gate_skips_static_frames,
+        test_gate_max_skip
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有畫面變化閘門測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
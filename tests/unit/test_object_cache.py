@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+小型物件快取測試 - 測試記憶體/磁碟 LRU、容量上限、ETag 重新確認與寫入時失效
+"""
+
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.object_cache import ObjectCache
+
+
+class FakeStorage:
+    # 記錄 stat 與讀取次數，代替 MinIO
+    def __init__(self):
+        self.objects = {}
+        self.stats = 0
+        self.reads = 0
+
+    def put(self, name, data, etag):
+        self.objects[name] = (data, etag)
+
+    def stat(self, bucket, name):
+        self.stats += 1
+        if name not in self.objects:
+            raise KeyError(name)
+        data, etag = self.objects[name]
+        return SimpleNamespace(etag=etag, size=len(data), content_type="image/jpeg",
+                               last_modified=datetime(2024, 1, 1, tzinfo=timezone.utc))
+
+    def read(self, bucket, name):
+        self.reads += 1
+        return self.objects[name][0]
+
+
+def make_cache(storage, **kwargs):
+    results = []
+    options = dict(max_bytes=250, max_object_bytes=100, revalidate_after=3600, observe=results.append)
+    options.update(kwargs)
+    return ObjectCache(storage.stat, storage.read, **options), results
+
+
+def test_memory_lru():
+    """測試命中時不連線、依最近使用順序逐出，以及過大的物件不快取"""
+    storage = FakeStorage()
+    for index in range(3):
+        storage.put(f"thumb-{index}.jpg", bytes([index]) * 100, f"etag-{index}")
+    storage.put("large.jpg", b"x" * 101, "etag-large")
+    cache, results = make_cache(storage)
+
+    assert cache.fetch("results", "thumb-0.jpg").data == b"\x00" * 100, "內容錯誤"
+    assert cache.fetch("results", "thumb-0.jpg").etag == "etag-0", "ETag 錯誤"
+    assert storage.stats == 1 and storage.reads == 1, f"命中時不應連線: {storage.stats} {storage.reads}"
+    cache.fetch("results", "thumb-1.jpg")
+    cache.fetch("results", "thumb-0.jpg")
+    cache.fetch("results", "thumb-2.jpg")
+    assert list(cache.entries) == [("results", "thumb-0.jpg"), ("results", "thumb-2.jpg")], \
+        f"應逐出最久未使用的物件: {list(cache.entries)}"
+    assert cache.total == 200, f"總量錯誤: {cache.total}"
+    assert cache.fetch("results", "large.jpg") is None, "超過大小上限的物件不應快取"
+    assert results == ["miss", "memory", "miss", "memory", "miss", "miss"], f"查詢結果錯誤: {results}"
+
+    print("✅ 記憶體 LRU 測試通過")
+    return True
+
+
+def test_revalidate_and_invalidate():
+    """測試逾時後以 ETag 重新確認，以及服務寫入物件時移除快取"""
+    storage = FakeStorage()
+    storage.put("thumb.jpg", b"old", "etag-1")
+    cache, results = make_cache(storage, revalidate_after=-1)
+
+    cache.fetch("results", "thumb.jpg")
+    assert cache.fetch("results", "thumb.jpg").data == b"old", "ETag 相同時應沿用快取"
+    assert storage.reads == 1 and storage.stats == 2, "重新確認只需要 stat"
+    storage.put("thumb.jpg", b"new", "etag-2")
+    assert cache.fetch("results", "thumb.jpg").data == b"new", "ETag 不同時應重新讀取"
+
+    cache.revalidate_after = 3600
+    storage.put("thumb.jpg", b"newer", "etag-3")
+    cache.invalidate("results", "thumb.jpg")
+    assert cache.fetch("results", "thumb.jpg").etag == "etag-3", "寫入後應讀到新版本"
+    try:
+        cache.fetch("results", "missing.jpg")
+        raise AssertionError("不存在的物件應拋出 stat 的例外")
+    except KeyError:
+        pass
+
+    print("✅ 重新確認與失效測試通過")
+    return True
+
+
+def test_disk_tier():
+    """測試記憶體逐出與重新啟動後由磁碟讀取，且磁碟副本會先以 ETag 確認"""
+    storage = FakeStorage()
+    for index in range(3):
+        storage.put(f"thumb-{index}.jpg", bytes([index]) * 100, f"etag-{index}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        cache, _ = make_cache(storage, max_bytes=100, disk_dir=work_dir, disk_max_bytes=200)
+        for index in range(3):
+            cache.fetch("results", f"thumb-{index}.jpg")
+        assert list(cache.disk) == [("results", "thumb-1.jpg"), ("results", "thumb-2.jpg")], \
+            f"磁碟應逐出最久未使用的物件: {list(cache.disk)}"
+        assert len(list(Path(work_dir).iterdir())) == 4, "被逐出的磁碟檔案應刪除"
+
+        reopened, results = make_cache(storage, disk_dir=work_dir, disk_max_bytes=200)
+        reads = storage.reads
+        assert reopened.fetch("results", "thumb-1.jpg").data == b"\x01" * 100, "重新啟動後應由磁碟讀取"
+        assert storage.reads == reads and results == ["disk"], f"磁碟命中不應重新讀取內容: {results}"
+        assert reopened.fetch("results", "thumb-1.jpg") is not None and results[-1] == "memory", \
+            "磁碟命中後應放回記憶體"
+
+        storage.put("thumb-2.jpg", b"changed", "etag-changed")
+        assert reopened.fetch("results", "thumb-2.jpg").data == b"changed", "磁碟副本 ETag 不同時應重新讀取"
+
+    print("✅ 磁碟快取測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行小型物件快取單元測試...")
+
+    tests = [
+        test_memory_lru,
+        test_revalidate_and_invalidate,
+        test_disk_tier
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有小型物件快取測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+管線測試 - 測試影片處理的分階段執行
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.pipeline import run_serial, run_pipelined, bottleneck
+
+
+def test_pipeline_keeps_order():
+    """測試管線模式輸出順序與串行模式一致"""
+    def slow_square(x):
+        time.sleep(0.001 * (x % 3))
+        return x * x
+
+    serial_out, pipelined_out = [], []
+    run_serial(range(50), [("inference", slow_square), ("encode", serial_out.append)], {})
+    timings = {}
+    run_pipelined(range(50), [("inference", slow_square), ("encode", pipelined_out.append)], timings, queue_size=2)
+
+    assert pipelined_out == serial_out, "管線模式影格順序錯誤"
+    assert timings["decode"]["frames"] == 50, f"解碼影格數錯誤: {timings['decode']}"
+    assert timings["encode"]["frames"] == 50, f"編碼影格數錯誤: {timings['encode']}"
+    assert bottleneck(timings) == "inference", f"瓶頸判斷錯誤: {timings}"
+
+    print("✅ 管線順序測試通過")
+    return True
+
+
+def test_pipeline_propagates_error():
+    """測試階段發生錯誤時會回報給呼叫端"""
+    def fail(x):
+        if x == 5:
+            raise ValueError("bad frame")
+        return x
+
+    try:
+        run_pipelined(range(1000), [("inference", fail), ("encode", lambda x: x)], {}, queue_size=2)
+        assert False, "管線未回報錯誤"
+    except ValueError as e:
+        assert str(e) == "bad frame"
+
+    print("✅ 管線錯誤測試通過")
+    return True
+
+
+def test_pipeline_observe():
+    """測試兩種模式都逐格回報各階段耗時"""
+    for run in (run_serial, run_pipelined):
+        observed = {}
+        run(range(20), [("inference", lambda x: x), ("encode", lambda x: x)], {},
+            observe=lambda name, seconds: observed.setdefault(name, []).append(seconds))
+        counts = {name: len(values) for name, values in observed.items()}
+        assert counts == {"decode": 20, "inference": 20, "encode": 20}, f"{run.__name__} 回報次數錯誤: {counts}"
+
+    print("✅ 管線耗時回報測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行管線單元測試...")
+
+    tests = [
+        test_pipeline_keeps_order,
+        test_pipeline_propagates_error,
+        test_pipeline_observe
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有管線測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+結果快取測試 - 測試以內容雜湊與處理參數查找既有結果
+"""
+
+import io
+import json
+import sys
+from pathlib import Path
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.pose import ProcessOptions
+from utils.result_cache import ResultCache
+
+
+class NoSuchKey(Exception):
+    code = "NoSuchKey"
+
+
+class Response(io.BytesIO):
+    def release_conn(self):
+        pass
+
+
+class MemoryStorage:
+    """以字典模擬 MinIO，ETag 為寫入次數"""
+
+    def __init__(self):
+        self.objects = {}
+        self.writes = 0
+
+    def put(self, bucket, name, data=b""):
+        self.writes += 1
+        self.objects[(bucket, name)] = (data, str(self.writes))
+
+    def save_bytes(self, bucket, name, data, content_type="application/octet-stream"):
+        self.put(bucket, name, data)
+        return True
+
+    def get_resource(self, bucket, name):
+        if (bucket, name) not in self.objects:
+            raise NoSuchKey()
+        return Response(self.objects[(bucket, name)][0])
+
+    def get_etag(self, bucket, name):
+        entry = self.objects.get((bucket, name))
+        return entry[1] if entry else None
+
+
+RESULT = {
+    "output_file": "output_a.mp4",
+    "objects": {"uploads": ["uploads/a.mp4"], "results": ["results/output_a.mp4"]},
+}
+
+
+def make_cache():
+    storage = MemoryStorage()
+    storage.put("uploads", "uploads/a.mp4")
+    storage.put("results", "results/output_a.mp4")
+    return storage, ResultCache(storage, "result-index")
+
+
+def test_cache_hit():
+    """測試相同內容與參數時命中，且不受不影響輸出的參數干擾"""
+    storage, cache = make_cache()
+    key = cache.key("abc", ProcessOptions())
+    assert cache.lookup(key) is None, "尚未處理時不應命中"
+    assert cache.store(key, RESULT), "寫入索引失敗"
+
+    assert cache.lookup(cache.key("abc", ProcessOptions(pipelined=True))) == RESULT, "應命中既有結果"
+    assert cache.lookup(cache.key("abc", ProcessOptions(sample_every=3))) is None, "處理參數不同時不應命中"
+    assert cache.lookup(cache.key("def", ProcessOptions())) is None, "內容不同時不應命中"
+    assert json.loads(storage.objects[("result-index", key)][0])["etags"], "索引應記錄 ETag"
+
+    print("✅ 結果快取命中測試通過")
+    return True
+
+
+def test_cache_invalidated():
+    """測試結果物件被覆寫或刪除後不再命中"""
+    storage, cache = make_cache()
+    key = cache.key("abc", ProcessOptions())
+    cache.store(key, RESULT)
+
+    storage.put("results", "results/output_a.mp4", b"other")
+    assert cache.lookup(key) is None, "結果被覆寫後不應命中"
+
+    cache.store(key, RESULT)
+    del storage.objects[("uploads", "uploads/a.mp4")]
+    assert cache.lookup(key) is None, "原始影片被刪除後不應命中"
+    assert not cache.store(key, RESULT), "物件不存在時不應寫入索引"
+
+    print("✅ 結果快取失效測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行結果快取單元測試...")
+
+    tests = [
+        test_cache_hit,
+        test_cache_invalidated
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有結果快取測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
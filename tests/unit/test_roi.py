@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+ROI 追蹤測試 - 測試依前一格姿勢裁切推論與座標換算
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.landmarks import FrameLandmarks
+from utils.roi import RoiTracker
+
+FRAME_SHAPE = (720, 1280, 3)
+
+
+def make_frame(box):
+    # 黑色背景上的白色方塊代表人
+    img = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+    if box is not None:
+        x0, y0, x1, y1 = box
+        img[y0:y1, x0:x1] = 255
+    return img
+
+
+def fake_detect(img):
+    # 在輸入影像（整張或裁切）中找出白色方塊，回傳以該影像為基準的正規化座標
+    ys, xs = np.nonzero(img[:, :, 0])
+    if len(xs) == 0:
+        return FrameLandmarks()
+    height, width = img.shape[:2]
+    corners = [(xs.min(), ys.min()), (xs.max() + 1, ys.max() + 1)]
+    pose = np.array([(x / width, y / height, 0.0, 1.0) for x, y in corners] * 17, dtype=np.float32)[:33]
+    return FrameLandmarks(pose=pose)
+
+
+def test_roi_maps_back_to_frame():
+    """測試裁切推論的關鍵點換算回整張影格座標，且人在範圍內時不移動區域"""
+    resets = []
+    tracker = RoiTracker(fake_detect, (520, 300), margin=0.5, reset=lambda: resets.append(True))
+    for step in range(6):
+        box = (400 + step * 4, 200, 500 + step * 4, 400)
+        landmarks = tracker.process(make_frame(box))
+        expected = np.array([[box[0] / 1280, box[1] / 720], [box[2] / 1280, box[3] / 720]])
+        assert np.allclose(landmarks.pose[:2, :2], expected, atol=0.01), f"座標換算錯誤: {landmarks.pose[:2, :2]}"
+
+    summary = tracker.summary()
+    assert summary["tracked_frames"] == 5, f"追蹤格數錯誤: {summary}"
+    assert summary["mean_crop_ratio"] < 0.2, f"裁切範圍過大: {summary}"
+    # 第一格使用整張影格，之後切換到裁切區域重設一次，小幅移動不需再重設
+    assert len(resets) == 1, f"重設次數錯誤: {len(resets)}"
+
+    print("✅ ROI 座標換算測試通過")
+    return True
+
+
+def test_roi_falls_back_when_lost():
+    """測試裁切區域內找不到人時同一格改用整張影格偵測"""
+    tracker = RoiTracker(fake_detect, (520, 300), margin=0.5)
+    tracker.process(make_frame((100, 100, 200, 300)))
+    assert tracker.region is not None, "第一格後應開始追蹤"
+
+    # 人跳到畫面另一側，裁切區域內找不到
+    landmarks = tracker.process(make_frame((1000, 300, 1100, 500)))
+    assert landmarks.pose is not None, "應以整張影格重新找到人"
+    assert abs(landmarks.pose[0, 0] - 1000 / 1280) < 0.01, f"整張影格座標錯誤: {landmarks.pose[0]}"
+    assert tracker.region is not None and tracker.region[0] > 500, f"應改追蹤新位置: {tracker.region}"
+
+    # 畫面中沒有人時停止追蹤
+    landmarks = tracker.process(make_frame(None))
+    assert landmarks.pose is None and tracker.region is None, "沒有人時應停止追蹤"
+
+    summary = tracker.summary()
+    assert summary["lost"] == 2, f"追蹤失敗次數錯誤: {summary}"
+    assert summary["full_frames"] == 3, f"整張影格次數錯誤: {summary}"
+
+    print("✅ ROI 追蹤失敗回退測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行 ROI 追蹤單元測試...")
+
+    tests = [
+        test_roi_maps_back_to_frame,
+        test_roi_falls_back_when_lost
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有 ROI 追蹤測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+抽樣推論測試 - 測試關鍵影格抽樣與關鍵點內插
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.landmarks import FrameLandmarks
+from utils.sampling import AdaptiveSampler
+
+
+def make_frame(index):
+    img = np.zeros((30, 52, 3), dtype=np.uint8)
+    img[0, 0, 0] = index
+    return img
+
+
+def fake_infer(img):
+    # 姿勢隨影格編號線性移動，內插結果應與實際推論完全一致
+    index = int(img[0, 0, 0])
+    pose = np.full((33, 4), index / 100, dtype=np.float32)
+    return FrameLandmarks(pose=pose, face=None)
+
+
+def run_sampler(sampler, frame_count):
+    outputs = []
+    for index in range(frame_count):
+        outputs.extend(sampler.process(make_frame(index)))
+    outputs.extend(sampler.flush())
+    return outputs
+
+
+def test_sampler_is_frame_complete():
+    """測試抽樣後每一格都有輸出且順序不變"""
+    sampler = AdaptiveSampler(fake_infer, max_stride=4, validate_every=0)
+    outputs = run_sampler(sampler, 23)
+
+    indices = [int(img[0, 0, 0]) for img, _ in outputs]
+    assert indices == list(range(23)), f"影格順序或數量錯誤: {indices}"
+    for img, landmarks in outputs:
+        expected = int(img[0, 0, 0]) / 100
+        assert np.allclose(landmarks.pose, expected, atol=1e-6), f"內插結果錯誤: {img[0, 0, 0]}"
+
+    summary = sampler.summary()
+    assert summary["inference_frames"] < 23 / 2, f"推論比例過高: {summary}"
+
+    print("✅ 抽樣完整性測試通過")
+    return True
+
+
+def test_sampler_error_bound():
+    """測試內插誤差超過上限時縮短關鍵影格間距"""
+    def jumpy_infer(img):
+        index = int(img[0, 0, 0])
+        return FrameLandmarks(pose=np.full((33, 4), (index % 2) * 0.5, dtype=np.float32))
+
+    sampler = AdaptiveSampler(jumpy_infer, max_stride=4, error_bound=0.02, validate_every=1)
+    run_sampler(sampler, 40)
+
+    summary = sampler.summary()
+    assert summary["interpolation_error"]["samples"] > 0, "未量測內插誤差"
+    assert summary["stride"] < 4, f"誤差超標卻未縮短間距: {summary}"
+
+    print("✅ 誤差上限測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行抽樣推論單元測試...")
+
+    tests = [
+        test_sampler_is_frame_complete,
+        test_sampler_error_bound
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有抽樣推論測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+影格排程測試 - 測試多支影片共用推論執行緒時的公平性與上限，以及實際以 process_video 同時處理長短片
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.encode import create_writer
+from utils.pose import ProcessOptions, process_video
+from utils.scheduler import FrameScheduler
+
+
+def run_jobs(scheduler, jobs, frames):
+    """先以閘門卡住唯一的推論執行緒，排好所有影格後再放行，回傳完成順序"""
+    gate = threading.Event()
+    blocker = scheduler.register()
+    blocked = blocker.submit(gate.wait)
+    order = []
+    futures = [job.submit(order.append, name) for name, job, count in zip("ab", jobs, frames) for _ in range(count)]
+    gate.set()
+    blocked.result()
+    for future in futures:
+        future.result(timeout=5)
+    return order
+
+
+def test_round_robin():
+    """測試短片與長片交錯處理，不必等長片結束"""
+    scheduler = FrameScheduler(workers=1, max_in_flight=1000)
+    long_job, short_job = scheduler.register(frames=100), scheduler.register(frames=10)
+    order = run_jobs(scheduler, [long_job, short_job], [100, 10])
+    last_short = max(index for index, name in enumerate(order) if name == "b")
+    assert last_short < 21, f"短片完成得太晚: 第 {last_short} 格"
+
+    print("✅ 輪流排程測試通過")
+    return True
+
+
+def test_weighted():
+    """測試 weighted 模式依權重分配推論次數"""
+    scheduler = FrameScheduler(workers=1, max_in_flight=1000, policy="weighted")
+    heavy, light = scheduler.register(weight=3), scheduler.register(weight=1)
+    order = run_jobs(scheduler, [heavy, light], [60, 60])
+    first = order[:40]
+    assert first.count("a") == 30, f"權重分配錯誤: {first.count('a')} / 40"
+    assert scheduler.weight_for(90) > scheduler.weight_for(900) == 1.0, "短片權重應較高"
+
+    print("✅ 權重排程測試通過")
+    return True
+
+
+def test_limits():
+    """測試單一工作同時只執行一格，且全域排隊數受限"""
+    scheduler = FrameScheduler(workers=3, max_in_flight=2)
+    job = scheduler.register()
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.005)
+        with lock:
+            active.pop()
+
+    futures = [job.submit(work) for _ in range(10)]
+    assert scheduler.in_flight <= 2, f"排隊數超過上限: {scheduler.in_flight}"
+    for future in futures:
+        future.result(timeout=5)
+    assert max(peak) == 1, f"同一工作同時執行了 {max(peak)} 格"
+    job.close()
+
+    print("✅ 排程上限測試通過")
+    return True
+
+
+class SlowDetector:
+    # 代替 Holistic：每格固定耗時，並記錄推論時排程器中的影格總數
+    def __init__(self, scheduler, peaks, seconds=0.004):
+        self.scheduler = scheduler
+        self.peaks = peaks
+        self.seconds = seconds
+
+    def process(self, img):
+        self.peaks.append(self.scheduler.in_flight)
+        time.sleep(self.seconds)
+        return SimpleNamespace(pose_landmarks=None, face_landmarks=None)
+
+    def reset(self):
+        pass
+
+
+def write_video(path, frames):
+    out = create_writer(path, 25.0, (64, 48), "mp4v")
+    for index in range(frames):
+        out.write(np.full((48, 64, 3), index % 256, dtype=np.uint8))
+    assert out.release(), "測試影片編碼應成功"
+    return path
+
+
+def test_process_video_jobs():
+    """測試兩支影片同時以 process_video 處理：長片先開始，短片仍先完成，且排隊影格總數不超過上限"""
+    scheduler = FrameScheduler(workers=1, max_in_flight=3, job_queue=4)
+    options = ProcessOptions(output_mode="landmarks", keep_aspect=False, frame_size=(64, 48), sprite_frames=0)
+    peaks = []
+    finished = []
+    stats = {"long": {}, "short": {}}
+
+    def run(name, path):
+        assert process_video(path, None, options, stats=stats[name], holistic=SlowDetector(scheduler, peaks),
+                             scheduler=scheduler), f"{name} 應處理成功"
+        finished.append(name)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        long_path = write_video(str(Path(work_dir) / "long.mp4"), 200)
+        short_path = write_video(str(Path(work_dir) / "short.mp4"), 20)
+        long_thread = threading.Thread(target=run, args=("long", long_path))
+        long_thread.start()
+        deadline = time.time() + 5
+        while len(peaks) < 20 and time.time() < deadline:
+            time.sleep(0.001)
+        short_thread = threading.Thread(target=run, args=("short", short_path))
+        short_thread.start()
+        for thread in (short_thread, long_thread):
+            thread.join(30)
+
+    assert finished == ["short", "long"], f"短片應先完成: {finished}"
+    assert stats["short"]["frames"] == 20 and stats["long"]["frames"] == 200, "每一格都應推論"
+    assert stats["short"]["scheduler"]["frames"] == 20, f"排程紀錄錯誤: {stats['short']['scheduler']}"
+    assert max(peaks) <= 3, f"排隊影格總數超過上限: {max(peaks)}"
+    assert max(peaks) > 1, "每個工作應保留多格排隊"
+    assert scheduler.in_flight == 0 and not scheduler.jobs, "工作結束後應清空排程"
+
+    print("✅ 影片工作排程測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行影格排程單元測試...")
+
+    tests = [
+        test_round_robin,
+        test_weighted,
+        test_limits,
+        test_process_video_jobs
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有影格排程測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+分段處理測試 - 測試段落切分的邊界、合併後的影格數與順序，以及與序列處理結果的比對
+"""
+
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.encode import create_writer
+from utils.pose import ProcessOptions
+from utils.segment import compare_videos, join_segments, process_video_segmented, reencode_segments, split_segments
+
+
+def write_segment(path, values, size=(64, 48)):
+    # 每格填入相差 20 的灰階值，合併後可由顏色判斷影格順序（編碼的色彩範圍轉換會有幾階誤差）
+    out = create_writer(path, 25.0, size, "mp4v")
+    for value in values:
+        out.write(np.full((size[1], size[0], 3), value, dtype=np.uint8))
+    assert out.release(), "片段編碼應成功"
+    return path
+
+
+def read_values(path):
+    cap = cv2.VideoCapture(path)
+    values = []
+    while True:
+        ret, img = cap.read()
+        if not ret:
+            break
+        values.append(int(round(float(img.mean()))))
+    cap.release()
+    return values
+
+
+def test_split_segments():
+    """測試段落連續、不重疊，最後一段讀到檔尾，且每段不少於 min_frames"""
+    assert split_segments(100, 4, 10) == [(0, 25), (25, 50), (50, 75), (75, None)], "應平均切分"
+    assert split_segments(101, 3, 10) == [(0, 33), (33, 67), (67, None)], "無法整除時段落長度最多差一格"
+    assert split_segments(100, 4, 40) == [(0, 50), (50, None)], "每段不足 min_frames 時應減少段數"
+    assert split_segments(30, 4, 60) == [(0, None)], "影片太短時只有一段"
+    assert split_segments(100, 4, 0) == [(0, 25), (25, 50), (50, 75), (75, None)], "min_frames 為 0 時不限制"
+
+    for frame_count, segments in ((150, 2), (997, 7), (61, 3)):
+        ranges = split_segments(frame_count, segments, 1)
+        covered = [index for start, end in ranges for index in range(start, frame_count if end is None else end)]
+        assert covered == list(range(frame_count)), f"段落應涵蓋每一格且不重複: {ranges}"
+
+    print("✅ 段落切分測試通過")
+    return True
+
+
+def test_join_segments():
+    """測試合併後的影格數與順序；有 ffmpeg 時直接串接，否則重新編碼"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        values = [[20, 40, 60], [80, 100], [120, 140, 160, 180]]
+        paths = [write_segment(str(Path(work_dir) / f"segment_{index}.mp4"), items)
+                 for index, items in enumerate(values)]
+        expected = [value for items in values for value in items]
+
+        output_path = str(Path(work_dir) / "joined.mp4")
+        method = join_segments(paths, output_path)
+        assert method == ("copy" if shutil.which("ffmpeg") else "reencode"), f"合併方式錯誤: {method}"
+        joined = read_values(output_path)
+        assert len(joined) == len(expected), f"合併後影格數錯誤: {len(joined)}"
+        assert all(abs(a - b) <= 8 for a, b in zip(joined, expected)), f"影格順序錯誤: {joined}"
+
+        reencoded_path = str(Path(work_dir) / "reencoded.mp4")
+        assert reencode_segments(paths, reencoded_path), "重新編碼應成功"
+        reencoded = read_values(reencoded_path)
+        assert len(reencoded) == len(expected), f"重新編碼後影格數錯誤: {len(reencoded)}"
+        assert all(abs(a - b) <= 8 for a, b in zip(reencoded, expected)), f"影格順序錯誤: {reencoded}"
+
+    print("✅ 片段合併測試通過")
+    return True
+
+
+def test_compare_videos():
+    """測試比對結果：相同影片沒有差異，少一格時判定影格數不符"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        expected = write_segment(str(Path(work_dir) / "expected.mp4"), [20, 40, 60, 80])
+        same = write_segment(str(Path(work_dir) / "same.mp4"), [20, 40, 60, 80])
+        shorter = write_segment(str(Path(work_dir) / "shorter.mp4"), [20, 40, 60])
+
+        report = compare_videos(expected, same)
+        assert report["frames_match"] and report["frames"] == 4, f"比對結果錯誤: {report}"
+        assert report["max_diff"] == 0.0, f"相同內容不應有差異: {report}"
+        assert not compare_videos(expected, shorter)["frames_match"], "影格數不同時應判定不符"
+
+    print("✅ 影片比對測試通過")
+    return True
+
+
+class NoPoseDetector:
+    # 代替 Holistic：每格都回傳沒有偵測到人
+    def process(self, img):
+        return SimpleNamespace(pose_landmarks=None, face_landmarks=None)
+
+    def reset(self):
+        pass
+
+
+def test_short_video_acquires_model():
+    """測試影片太短不分段時才取用模型，並在處理完成後歸還"""
+    acquired = []
+
+    @contextmanager
+    def acquire():
+        acquired.append("acquire")
+        yield NoPoseDetector()
+        acquired.append("release")
+
+    options = ProcessOptions(output_mode="landmarks", keep_aspect=False, frame_size=(64, 48), sprite_frames=0)
+    with tempfile.TemporaryDirectory() as work_dir:
+        source = write_segment(str(Path(work_dir) / "short.mp4"), [20, 40, 60, 80])
+        stats = {}
+        assert process_video_segmented(source, None, 4, min_frames=60, options=options, stats=stats,
+                                       acquire_holistic=acquire), "處理應成功"
+    assert acquired == ["acquire", "release"], f"單段時應取用並歸還一次模型: {acquired}"
+    assert stats["frames"] == 4 and "segments" not in stats, f"不分段時應在本行程處理: {stats}"
+
+    print("✅ 短片取用模型測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行分段處理單元測試...")
+
+    tests = [
+        test_split_segments,
+        test_join_segments,
+        test_compare_videos,
+        test_short_video_acquires_model
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有分段處理測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
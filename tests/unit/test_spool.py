@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+本機檔案管理測試 - 測試已保存檔案的刪除、讀取快取、容量上限與逾時
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.spool import LocalSpool
+
+
+def write(work_dir, name, size):
+    path = Path(work_dir) / name
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+
+def test_stored_files_released():
+    """測試使用中不刪除，已保存且無 ETag 的檔案釋放後刪除，有 ETag 的保留為讀取快取"""
+    spool = LocalSpool(max_bytes=10000, max_age=3600)
+    with tempfile.TemporaryDirectory() as work_dir:
+        upload, output = write(work_dir, "upload.mp4", 100), write(work_dir, "output.mp4", 200)
+        for path in (upload, output):
+            spool.track(path)
+        spool.stored(upload)
+        spool.stored(output, "etag-1")
+        assert Path(upload).exists() and Path(output).exists(), "使用中的檔案不應被刪除"
+
+        spool.release(upload)
+        spool.release(output)
+        assert not Path(upload).exists(), "無 ETag 的已保存檔案釋放後應刪除"
+        assert Path(output).exists() and spool.total == 200, f"讀取快取應保留: {spool.total}"
+
+        data = spool.open(output, "etag-1")
+        assert data is not None and len(data.read()) == 200, "ETag 相同時應開啟本機副本"
+        data.close()
+        assert spool.open(output, "etag-2") is None, "MinIO 版本不同時不應使用本機副本"
+        spool.track(output)
+        assert spool.open(output, "etag-1") is None, "改寫中的檔案不應作為讀取快取"
+        assert spool.hits == 1, f"命中次數錯誤: {spool.hits}"
+
+    print("✅ 已保存檔案釋放測試通過")
+    return True
+
+
+def test_size_budget_lru():
+    """測試總量超過上限時依最近存取順序刪除已保存的檔案"""
+    spool = LocalSpool(max_bytes=350, max_age=3600)
+    with tempfile.TemporaryDirectory() as work_dir:
+        paths = [write(work_dir, f"output-{index}.mp4", 100) for index in range(3)]
+        pending = write(work_dir, "pending.mp4", 100)
+        spool.track(pending)
+        spool.release(pending)
+        for index, path in enumerate(paths[:2]):
+            spool.track(path)
+            spool.release(path)
+            spool.stored(path, f"etag-{index}")
+        # 最早的檔案被讀取過，成為最近使用
+        spool.open(paths[0], "etag-0").close()
+        spool.track(paths[2])
+        spool.release(paths[2])
+        spool.stored(paths[2], "etag-2")
+
+        existing = [Path(path).exists() for path in paths]
+        assert existing == [True, False, True], f"應刪除最久未使用的檔案: {existing}"
+        assert Path(pending).exists(), "尚未寫入 MinIO 的檔案不應因容量被刪除"
+        assert spool.total == 300 and spool.evicted == 1, f"總量錯誤: {spool.total}"
+
+    print("✅ 容量上限測試通過")
+    return True
+
+
+def test_max_age():
+    """測試逾時未使用的檔案被刪除，尚待延後寫入的檔案保留"""
+    keep = set()
+    spool = LocalSpool(max_bytes=10000, max_age=0.05, in_use=lambda path: path in keep)
+    with tempfile.TemporaryDirectory() as work_dir:
+        orphan, waiting = write(work_dir, "orphan.mp4", 10), write(work_dir, "waiting.mp4", 10)
+        cached = write(work_dir, "cached.mp4", 10)
+        keep.add(waiting)
+        spool.adopt(orphan, False)
+        spool.adopt(waiting, False)
+        spool.adopt(cached, True, "etag")
+        spool.evict()
+        assert all(Path(path).exists() for path in (orphan, waiting, cached)), "未逾時的檔案不應被刪除"
+
+        time.sleep(0.1)
+        spool.evict()
+        assert not Path(orphan).exists() and not Path(cached).exists(), "逾時的檔案應被刪除"
+        assert Path(waiting).exists(), "尚待寫入 MinIO 的檔案不應被刪除"
+
+    print("✅ 逾時刪除測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行本機檔案管理單元測試...")
+
+    tests = [
+        test_stored_files_released,
+        test_size_budget_lru,
+        test_max_age
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有本機檔案管理測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
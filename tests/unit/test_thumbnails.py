@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+縮圖擷取測試 - 測試在處理流程中依時間點擷取縮圖、多種寬度的 WebP 與縮圖列
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.thumbnails import ThumbnailCapture, sprite_frames, thumbnail_paths, write_sprite
+
+
+def test_thumbnail_paths():
+    """測試第一個時間點沿用原本的縮圖檔名"""
+    paths = thumbnail_paths("a.mp4-thumbnail.jpg", (0, 2.5, 10))
+    assert paths == ["a.mp4-thumbnail.jpg", "a.mp4-thumbnail-2.5s.jpg", "a.mp4-thumbnail-10s.jpg"], f"檔名錯誤: {paths}"
+    paths = thumbnail_paths("a.mp4-thumbnail.jpg", (0, 2.5), (160, 320))
+    assert paths == ["a.mp4-thumbnail.jpg", "a.mp4-thumbnail-160w.webp", "a.mp4-thumbnail-320w.webp",
+                     "a.mp4-thumbnail-2.5s.jpg", "a.mp4-thumbnail-2.5s-160w.webp", "a.mp4-thumbnail-2.5s-320w.webp"], \
+        f"WebP 檔名錯誤: {paths}"
+
+    print("✅ 縮圖檔名測試通過")
+    return True
+
+
+def test_thumbnail_capture():
+    """測試只擷取落在區段內的影格並縮小寬度"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        original = str(Path(work_dir) / "in.mp4-thumbnail.jpg")
+        output = str(Path(work_dir) / "out.mp4-thumbnail.jpg")
+        capture = ThumbnailCapture((0, 1), fps=10, width=40, original_path=original, output_path=output,
+                                   start_frame=5, end_frame=20)
+        assert capture.wants_output, "應需要擷取結果縮圖"
+
+        frame = np.zeros((60, 80, 3), dtype=np.uint8)
+        for index in range(5, 20):
+            capture.capture_original(index, frame)
+            capture.capture_output(index, frame, lambda img: cv2.circle(img, (40, 30), 10, (255, 255, 255), -1))
+
+        expected = [str(Path(work_dir) / "in.mp4-thumbnail-1s.jpg"), str(Path(work_dir) / "out.mp4-thumbnail-1s.jpg")]
+        assert capture.written == expected, f"寫入的縮圖錯誤: {capture.written}"
+        thumbnail = cv2.imread(expected[1])
+        assert thumbnail.shape[:2] == (30, 40), f"縮圖尺寸錯誤: {thumbnail.shape}"
+        assert thumbnail.max() > 0, "結果縮圖應包含繪製內容"
+        assert frame.max() == 0, "繪製不應修改原始影格"
+
+    print("✅ 縮圖擷取測試通過")
+    return True
+
+
+def test_sizes_and_sprite():
+    """測試各寬度的 WebP，以及分段擷取的縮圖列影格合併後與整段處理相同"""
+    assert sprite_frames(20, 4) == [2, 7, 12, 17], f"縮圖列影格應平均分布: {sprite_frames(20, 4)}"
+    assert sprite_frames(3, 10) == [0, 1, 2] and sprite_frames(0, 10) == [], "影格不足時應減少格數"
+
+    def run(work_dir, name, ranges):
+        base = str(Path(work_dir) / f"{name}.mp4-thumbnail.jpg")
+        tiles = {}
+        captures = []
+        for start, end in ranges:
+            capture = ThumbnailCapture((0,), fps=10, original_path=base, start_frame=start, end_frame=end,
+                                       sizes=(40,), sprite_count=4, sprite_width=16, frame_count=20)
+            for index in range(start, end or 20):
+                capture.capture_original(index, np.full((60, 80, 3), index * 10, dtype=np.uint8))
+            for path, frames in capture.tiles.items():
+                tiles.setdefault(path, {}).update(frames)
+            captures.append(capture)
+        return base, tiles, captures
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        base, tiles, (capture,) = run(work_dir, "whole", [(0, None)])
+        capture.write_sprites()
+        sprite_path = base[:-len(".jpg")] + "-sprite.webp"
+        assert capture.written == [base, base[:-len(".jpg")] + "-40w.webp", sprite_path], f"寫入錯誤: {capture.written}"
+        assert cv2.imread(capture.written[1]).shape[:2] == (30, 40), "WebP 縮圖寬度錯誤"
+        assert capture.sprite == {"frames": 4, "tile_width": 16, "tile_height": 12}, f"縮圖列資訊錯誤: {capture.sprite}"
+        whole = cv2.imread(sprite_path)
+        assert whole.shape[:2] == (12, 64), f"縮圖列尺寸錯誤: {whole.shape}"
+
+        base, tiles, captures = run(work_dir, "split", [(0, 10), (10, None)])
+        assert [sorted(item.tiles[item.original_sprite]) for item in captures] == [[2, 7], [12, 17]], \
+            "每段只應擷取自己範圍內的縮圖列影格"
+        layout = write_sprite(base[:-len(".jpg")] + "-sprite.webp", tiles[base[:-len(".jpg")] + "-sprite.webp"])
+        merged = cv2.imread(base[:-len(".jpg")] + "-sprite.webp")
+        assert layout == capture.sprite and np.array_equal(merged, whole), "分段合併的縮圖列應與整段處理相同"
+
+    print("✅ 多種寬度與縮圖列測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行縮圖擷取單元測試...")
+
+    tests = [
+        test_thumbnail_paths,
+        test_thumbnail_capture,
+        test_sizes_and_sprite
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有縮圖擷取測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
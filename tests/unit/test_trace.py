@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+工作剖析測試 - 測試 Chrome trace 時間軸與取樣呼叫堆疊
+"""
+
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.pipeline import run_pipelined
+from utils.trace import JobTrace, StackSampler
+
+
+def test_trace_timeline():
+    """測試工作階段、每格階段與 MinIO 寫入都記錄成 Chrome trace 事件"""
+    trace = JobTrace("video.mp4")
+    with trace.span("process video"):
+        run_pipelined(range(10), [("inference", lambda x: x), ("encode", lambda x: x)], {},
+                      observe=trace.observe_stage)
+    trace.observe_write("put", "results", "results/output_video.mp4", 0.002)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        data = json.load(open(trace.save(str(Path(work_dir) / "trace.json"), {"source": "video.mp4"})))
+    events = [event for event in data["traceEvents"] if event["ph"] == "X"]
+    names = {event["args"]["name"] for event in data["traceEvents"] if event["ph"] == "M"}
+
+    frames = [event for event in events if event["cat"] == "frame"]
+    assert len(frames) == 30, f"每格事件數錯誤: {len(frames)}"
+    assert {"pipeline-decode", "pipeline-inference", "pipeline-encode"} <= names, f"執行緒名稱錯誤: {names}"
+    job = next(event for event in events if event["name"] == "process video")
+    assert all(job["ts"] <= event["ts"] <= job["ts"] + job["dur"] for event in frames), "每格事件應在工作階段內"
+    write = next(event for event in events if event["cat"] == "minio")
+    assert write["args"]["object"] == "results/output_video.mp4" and write["dur"] == 2000.0, f"MinIO 事件錯誤: {write}"
+    assert data["otherData"]["source"] == "video.mp4", f"附加資訊錯誤: {data['otherData']}"
+
+    print("✅ 工作時間軸測試通過")
+    return True
+
+
+def test_trace_event_limit():
+    """測試事件數超過上限時捨棄並記錄捨棄數量"""
+    trace = JobTrace("video.mp4", max_events=5)
+    for _ in range(8):
+        trace.observe_stage("inference", 0.001)
+
+    data = json.loads(trace.to_json())
+    assert len([event for event in data["traceEvents"] if event["ph"] == "X"]) == 5, "事件數應受上限限制"
+    assert data["otherData"]["dropped_events"] == 3, f"捨棄數量錯誤: {data['otherData']}"
+
+    print("✅ 時間軸事件上限測試通過")
+    return True
+
+
+def test_stack_sampler():
+    """測試只取樣工作相關執行緒的呼叫堆疊"""
+    stop = threading.Event()
+
+    def busy_loop():
+        while not stop.is_set():
+            sum(range(1000))
+
+    def unrelated_wait():
+        stop.wait()
+
+    worker = threading.Thread(target=busy_loop, name="pipeline-inference", daemon=True)
+    other = threading.Thread(target=unrelated_wait, name="unrelated", daemon=True)
+    worker.start()
+    other.start()
+    sampler = StackSampler(0.005, threading.get_ident()).start()
+    time.sleep(0.2)
+    sampler.stop()
+    stop.set()
+
+    stacks = list(sampler.stacks)
+    assert sampler.samples > 5, f"取樣次數過少: {sampler.samples}"
+    assert any("busy_loop" in stack for stack in stacks), "應取樣到管線執行緒"
+    assert any("test_stack_sampler" in stack for stack in stacks), "應取樣到工作執行緒"
+    assert not any("unrelated_wait" in stack for stack in stacks), "不應取樣無關執行緒"
+
+    print("✅ 取樣呼叫堆疊測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行工作剖析單元測試...")
+
+    tests = [
+        test_trace_timeline,
+        test_trace_event_limit,
+        test_stack_sampler
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有工作剖析測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+延後寫入測試 - 測試產出物日誌、失敗重試與重啟後接續上傳
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# 添加姿勢分析服務目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "pose-analysis-service"))
+
+from utils.write_behind import WriteBehindUploader
+
+
+class FlakyStorage:
+    """前 failures 次上傳失敗的模擬物件儲存"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.attempts = []
+        self.saved = set()
+        self.lock = threading.Lock()
+
+    def save_resource(self, bucket, path):
+        with self.lock:
+            self.attempts.append((bucket, path))
+            if self.failures > 0:
+                self.failures -= 1
+                return False
+            self.saved.add((bucket, path))
+            return True
+
+
+def make_files(work_dir, count):
+    paths = []
+    for index in range(count):
+        path = os.path.join(work_dir, f"file{index}.bin")
+        with open(path, "wb") as output:
+            output.write(b"x")
+        paths.append(path)
+    return paths
+
+
+def test_retry_until_stored():
+    """測試上傳失敗時退避重試，全部完成後才通知且清空日誌"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        journal = os.path.join(work_dir, "journal")
+        storage = FlakyStorage(failures=3)
+        uploader = WriteBehindUploader(storage, journal, workers=2, base_delay=0.01, max_delay=0.05)
+        done = threading.Event()
+        results = []
+
+        def on_complete(ok):
+            results.append(ok)
+            done.set()
+
+        items = [("results", path) for path in make_files(work_dir, 2)]
+        uploader.enqueue(items, on_complete=on_complete)
+        assert done.wait(5), "上傳未在時限內完成"
+        uploader.stop()
+
+        assert results == [True], f"完成通知錯誤: {results}"
+        assert storage.saved == set(items), f"未全部上傳: {storage.saved}"
+        assert len(storage.attempts) == 5, f"重試次數錯誤: {len(storage.attempts)}"
+        assert not os.listdir(journal), "完成後日誌應清空"
+
+    print("✅ 失敗重試測試通過")
+    return True
+
+
+def test_resume_from_journal():
+    """測試服務重啟後從日誌接續未完成的上傳"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        journal = os.path.join(work_dir, "journal")
+        paths = make_files(work_dir, 2)
+        # 儲存端一直失敗，模擬 MinIO 停機時服務被關閉
+        down = FlakyStorage(failures=10 ** 6)
+        uploader = WriteBehindUploader(down, journal, workers=1, base_delay=10)
+        uploader.enqueue([("uploads", path) for path in paths])
+        assert uploader.pending_file("uploads", paths[0]) == paths[0], "待上傳檔案應可由本機提供"
+        uploader.stop()
+        assert len(os.listdir(journal)) == 2, "未完成的上傳應保留在日誌中"
+
+        storage = FlakyStorage()
+        resumed = WriteBehindUploader(storage, journal, workers=1)
+        assert resumed.flush(5), "重啟後未完成上傳"
+        resumed.stop()
+        assert storage.saved == {("uploads", path) for path in paths}, f"接續上傳錯誤: {storage.saved}"
+        assert resumed.pending_file("uploads", paths[0]) is None, "上傳完成後不應再標記為待上傳"
+
+    print("✅ 日誌接續測試通過")
+    return True
+
+
+def main():
+    print("🔬 執行延後寫入單元測試...")
+
+    tests = [
+        test_retry_until_stored,
+        test_resume_from_journal
+    ]
+
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError as e:
+            print(f"❌ 測試失敗: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ 測試錯誤: {e}")
+            return False
+
+    print("🎉 所有延後寫入測試通過!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -3,7 +3,7 @@ import 'react-toastify/dist/ReactToastify.css';
 import React, {useEffect, useState} from "react";
 import {toast, ToastContainer} from "react-toastify";
 import {GetServerSideProps} from "next";
-import {UploadVideo} from "@/service/upload_video";
+import {PrepareMedia, UploadVideo} from "@/service/upload_video";
 import Link from "next/link";
 export interface ClientServiceProps{
     serviceUrl:string
@@ -112,8 +112,9 @@ const Home: React.FC<ClientServiceProps> = ({serviceUrl}) => {
                             if (String(item["name"]).includes("-thumbnail.jpg")) {
                                 return(
                                     <img width={200} height={200} className={"truncate w-full"} key={index}
-                                         src={serviceUrl+"/media/uploads/file/"+item["name"]}
-                                         onClick={()=>{setPlayResource(serviceUrl+"/media/uploads/file/"+originalItem[index-1]["name"])}}></img>
+                                         src={serviceUrl+"/media/uploads/file/"+String(item["name"]).replace("-thumbnail.jpg", "-thumbnail-320w.webp")}
+                                         onError={(e)=>{const jpg=serviceUrl+"/media/uploads/file/"+item["name"]; if (e.currentTarget.src !== jpg) e.currentTarget.src=jpg}}
+                                         onClick={()=>{setPlayResource(serviceUrl+"/media/uploads/file/"+String(item["name"]).substring(0,String(item["name"]).indexOf("-thumbnail.jpg")))}}></img>
                                 )
                             }
                         })}
@@ -126,8 +127,9 @@ const Home: React.FC<ClientServiceProps> = ({serviceUrl}) => {
                             if (String(item["name"]).includes("-thumbnail.jpg")) {
                                 return(
                                     <img width={200} height={200} className={"truncate w-full"} key={index}
-                                         src={serviceUrl+"/media/results/file/"+item["name"]}
-                                         onClick={()=>{setPlayResource(serviceUrl+"/media/results/file/"+String(item["name"]).substring(0,String(item["name"]).indexOf("-thumbnail.jpg")))}}></img>
+                                         src={serviceUrl+"/media/results/file/"+String(item["name"]).replace("-thumbnail.jpg", "-thumbnail-320w.webp")}
+                                         onError={(e)=>{const jpg=serviceUrl+"/media/results/file/"+item["name"]; if (e.currentTarget.src !== jpg) e.currentTarget.src=jpg}}
+                                         onClick={()=>{const video=serviceUrl+"/media/results/file/"+String(item["name"]).substring(0,String(item["name"]).indexOf("-thumbnail.jpg")); PrepareMedia(serviceUrl,video).then(()=>setPlayResource(video)).catch((e)=>toast.error(`影片繪製失敗 ${e}`))}}></img>
                                 )
                             }
                         })}
@@ -1,3 +1,34 @@
+const JOB_POLL_INTERVAL_MS = 2000;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+export const WaitForJob = async (serviceUrl: string, jobId: string): Promise<any> => {
+    while (true) {
+        const response = await fetch(`${serviceUrl}/jobs/${jobId}`);
+        if (!response.ok) {
+            const errorText = await response.text();
+            throw new Error(`Job status failed: ${errorText}`);
+        }
+        const job = await response.json();
+        if (job.status === 'done') {
+            return job.result;
+        }
+        if (job.status === 'failed') {
+            throw new Error(`Processing failed: ${job.error}`);
+        }
+        await sleep(JOB_POLL_INTERVAL_MS);
+    }
+};
+
+export const PrepareMedia = async (serviceUrl: string, url: string): Promise<void> => {
+    // 只有關鍵點的結果影片在第一次請求時才繪製，伺服器回應 202 時等繪製工作完成
+    const response = await fetch(url, {headers: {Range: 'bytes=0-0'}});
+    if (response.status === 202) {
+        const pending = await response.json();
+        await WaitForJob(serviceUrl, pending.job_id);
+    }
+};
+
 export const UploadVideo = async (serviceUrl: string, file: File): Promise<any> => {
     const formData = new FormData();
     formData.append('file', file);
@@ -13,9 +44,10 @@ export const UploadVideo = async (serviceUrl: string, file: File): Promise<any>
             throw new Error(`Upload failed: ${errorText}`);
         }
 
-        return await response.json();
+        const accepted = await response.json();
+        return await WaitForJob(serviceUrl, accepted.job_id);
     } catch (error) {
         console.error('Error uploading video:', error);
         throw error;
     }
-};
\ No newline at end of file
+};